@@ -0,0 +1,310 @@
+"""
+운세 생성 요청 수락 제어 (admission control)
+
+AI 호출에는 요금과 할당량이 있으므로 무제한으로 받지 않습니다.
+    - 클라이언트(IP)별 토큰 버킷: 짧은 시간에 너무 많이 요청하면 429 + Retry-After
+    - 전체 AI 동시 호출 상한: 이미 상한만큼 호출 중이면 AI를 기다리지 않고
+      바로 템플릿(백업) 운세로 응답 (load shedding)
+/get_fortune 에서 캐시/풀로 바로 응답할 수 있는 요청은 AI를 쓰지 않으므로 제한하지 않습니다.
+
+저장소:
+    - memory: 프로세스(워커)마다 따로 집계
+    - sqlite: 같은 서버의 여러 워커가 한 파일을 공유해 함께 집계
+      (워커가 죽어 반납되지 않은 슬롯은 lease 시간이 지나면 자동으로 풀림)
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class MemoryAdmissionStore:
+    """프로세스 메모리 저장소"""
+
+    def __init__(self, max_clients=100000):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets = {}  # 클라이언트 -> (남은 토큰, 갱신 시각)
+        self._slots = {}  # 슬롯 id -> 만료 시각
+        self._ids = itertools.count(1)
+
+    def take_token(self, key, rate, burst, now):
+        """
+        토큰 하나 사용
+
+        Returns:
+            float: 0이면 허용, 아니면 다음 토큰까지 기다릴 시간(초)
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if len(self._buckets) > self.max_clients:
+                # 가득 찬 버킷(오래 요청이 없던 클라이언트)은 지워도 결과가 같음
+                full = [k for k, (t, u) in self._buckets.items() if t + (now - u) * rate >= burst]
+                for k in full:
+                    del self._buckets[k]
+            return wait
+
+    def acquire_slot(self, limit, lease, now):
+        """동시 호출 슬롯 획득 (상한이면 None)"""
+        with self._lock:
+            self._expire(now)
+            if len(self._slots) >= limit:
+                return None
+            slot = next(self._ids)
+            self._slots[slot] = now + lease
+            return slot
+
+    def release_slot(self, slot):
+        with self._lock:
+            self._slots.pop(slot, None)
+
+    def inflight(self, now):
+        with self._lock:
+            self._expire(now)
+            return len(self._slots)
+
+    def _expire(self, now):
+        for slot in [s for s, expires in self._slots.items() if expires <= now]:
+            del self._slots[slot]
+
+
+class SQLiteAdmissionStore:
+    """SQLite 파일 저장소 - 같은 서버의 워커 프로세스 간 공유"""
+
+    def __init__(self, path="admission.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_admission_buckets_updated "
+            "ON admission_buckets (updated_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_slots ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, pid INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: BEGIN IMMEDIATE 로 직접 쓰기 잠금을 잡기 위해
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # 읽고-계산하고-쓰는 동안 다른 워커가 끼어들지 않도록 쓰기 잠금부터 잡음
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def take_token(self, key, rate, burst, now):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM admission_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row is not None else (burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait == 0.0:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO admission_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            # 버킷이 다시 가득 찼을 만큼 오래된 항목 정리
+            conn.execute("DELETE FROM admission_buckets WHERE updated_at < ?", (now - burst / rate,))
+        return wait
+
+    def acquire_slot(self, limit, lease, now):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admission_slots WHERE expires_at <= ?", (now,))
+            count = conn.execute("SELECT COUNT(*) FROM admission_slots").fetchone()[0]
+            if count >= limit:
+                return None
+            cursor = conn.execute(
+                "INSERT INTO admission_slots (pid, expires_at) VALUES (?, ?)", (os.getpid(), now + lease)
+            )
+            return cursor.lastrowid
+
+    def release_slot(self, slot):
+        self._conn().execute("DELETE FROM admission_slots WHERE id = ?", (slot,))
+
+    def inflight(self, now):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM admission_slots WHERE expires_at > ?", (now,)
+        ).fetchone()[0]
+
+
+class AdmissionController:
+    """클라이언트별 토큰 버킷 + 전체 AI 동시 호출 상한"""
+
+    def __init__(self, store=None, rate_per_minute=10, burst=5, max_inflight=16, lease=60.0,
+                 trusted_proxies=0):
+        """
+        Args:
+            store: MemoryAdmissionStore 또는 SQLiteAdmissionStore (None이면 메모리)
+            rate_per_minute: 클라이언트별 분당 AI 생성 요청 수 (0이면 제한 없음)
+            burst: 한 번에 몰아서 보낼 수 있는 요청 수
+            max_inflight: 동시에 진행할 AI 호출 수 (0이면 제한 없음)
+            lease: 슬롯 최대 보유 시간(초). 반납되지 않은 슬롯은 이후 자동 해제
+            trusted_proxies: 앱 앞에 있는 신뢰하는 프록시 수 (0이면 X-Forwarded-For 무시)
+        """
+        self.store = store or MemoryAdmissionStore()
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self.lease = lease
+        self.trusted_proxies = trusted_proxies
+        self._lock = threading.Lock()
+
+        # 통계 (프로세스별)
+        self.admitted = 0
+        self.shed = 0
+        self.rate_limited = 0
+        self.store_errors = 0
+
+    def client_key(self, remote_addr, forwarded_for=None):
+        """
+        클라이언트 식별자
+
+        X-Forwarded-For 의 앞쪽 주소는 클라이언트가 마음대로 채울 수 있습니다.
+        프록시는 자기에게 접속한 주소를 오른쪽 끝에 덧붙이므로 오른쪽에서 trusted_proxies 번째
+        주소(werkzeug ProxyFix x_for 와 같은 규칙)만 믿고, 프록시가 없거나 주소 수가 모자라면
+        접속 주소(remote_addr)를 사용합니다.
+        """
+        if self.trusted_proxies and forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return remote_addr or "unknown"
+
+    def check_rate(self, client):
+        """
+        클라이언트 요청 한 건 허용 여부
+
+        Returns:
+            float: 0이면 허용, 아니면 Retry-After 로 보낼 대기 시간(초)
+        """
+        if not self.rate:
+            return 0.0
+        try:
+            wait = self.store.take_token(client, self.rate, self.burst, time.time())
+        except Exception as e:
+            # 저장소 장애로 정상 사용자를 막지 않음
+            self._count("store_errors")
+            print(f"요청 제한 저장소 오류 (허용 처리): {e}")
+            return 0.0
+        if wait:
+            self._count("rate_limited")
+        return wait
+
+    def try_acquire(self):
+        """
+        AI 호출 슬롯 획득
+
+        Returns:
+            슬롯 id (release 로 반납). 상한이면 None → 백업 운세로 바로 응답
+        """
+        if not self.max_inflight:
+            self._count("admitted")
+            return 0
+        try:
+            slot = self.store.acquire_slot(self.max_inflight, self.lease, time.time())
+        except Exception as e:
+            self._count("store_errors")
+            print(f"요청 제한 저장소 오류 (허용 처리): {e}")
+            slot = 0
+        self._count("shed" if slot is None else "admitted")
+        return slot
+
+    def release(self, slot):
+        """슬롯 반납 (try_acquire 가 None 을 돌려준 경우는 호출하지 않음)"""
+        if not slot:
+            return
+        try:
+            self.store.release_slot(slot)
+        except Exception as e:
+            self._count("store_errors")
+            print(f"슬롯 반납 실패 (lease 만료 후 해제됨): {e}")
+
+    @contextmanager
+    def slot(self):
+        """
+        with 블록 동안 AI 호출 슬롯 보유
+
+            with admission.slot() as admitted:
+                if not admitted:
+                    ...  # 백업 운세
+        """
+        slot = self.try_acquire()
+        try:
+            yield slot is not None
+        finally:
+            if slot is not None:
+                self.release(slot)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        """수락 통계 (inflight 는 sqlite 저장소면 모든 워커 합계)"""
+        try:
+            inflight = self.store.inflight(time.time())
+        except Exception:
+            inflight = -1
+        with self._lock:
+            return {
+                "inflight": inflight,
+                "max_inflight": self.max_inflight,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "rate_limited": self.rate_limited,
+                "store_errors": self.store_errors,
+            }
+
+
+def create_admission_from_env():
+    """
+    환경변수 설정으로 수락 제어기 생성
+
+    FORTUNE_ADMISSION_BACKEND: memory(기본값) | sqlite
+    FORTUNE_ADMISSION_PATH: SQLite 파일 경로 (기본값 admission.db)
+    FORTUNE_RATE_PER_MINUTE: 클라이언트별 분당 AI 생성 요청 수 (기본값 10, 0이면 제한 없음)
+    FORTUNE_RATE_BURST: 순간 허용 요청 수 (기본값 5)
+    FORTUNE_MAX_INFLIGHT: 전체 AI 동시 호출 상한 (기본값 16, 0이면 제한 없음)
+    FORTUNE_TRUSTED_PROXIES: 앱 앞 프록시 수 (기본값 0 - X-Forwarded-For 를 믿지 않음, Vercel 은 1)
+    """
+    if os.getenv("FORTUNE_ADMISSION_BACKEND", "memory").lower() == "sqlite":
+        store = SQLiteAdmissionStore(os.getenv("FORTUNE_ADMISSION_PATH", "admission.db"))
+    else:
+        store = MemoryAdmissionStore()
+    return AdmissionController(
+        store,
+        rate_per_minute=float(os.getenv("FORTUNE_RATE_PER_MINUTE", "10")),
+        burst=float(os.getenv("FORTUNE_RATE_BURST", "5")),
+        max_inflight=int(os.getenv("FORTUNE_MAX_INFLIGHT", "16")),
+        trusted_proxies=int(os.getenv("FORTUNE_TRUSTED_PROXIES", "0")),
+    )
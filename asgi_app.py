@@ -0,0 +1,120 @@
+"""
+오늘의 운세 웹 애플리케이션 - 비동기(ASGI) 실행 모드
+
+/get_fortune 은 AI 호출과 쿠팡 상품 검색을 await 하므로 네트워크를 기다리는 동안
+워커 스레드를 점유하지 않습니다. 나머지 경로는 기존 Flask 앱으로 그대로 넘깁니다.
+
+실행:
+    uvicorn asgi_app:app --port 5001
+"""
+import asyncio
+import json
+import math
+
+from asgiref.wsgi import WsgiToAsgi
+
+import fortune_app
+from fortune_app import (
+    admission,
+    agenerate_coalesced,
+    calculate_zodiac,
+    fortune_cache,
+    get_random_quote,
+    parse_fortune_input,
+    serve_pooled_fortune,
+)
+from metrics import metrics
+from fortune_payload import plain_response, structured_response
+
+# 기존 Flask 라우트 (/, /static, /stream_fortune 등)
+flask_asgi = WsgiToAsgi(fortune_app.app)
+
+
+async def read_body(receive):
+    """요청 본문 전체 읽기"""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def send_json(send, data, status=200, headers=()):
+    """JSON 응답 전송"""
+    payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(payload)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+def scope_client(scope):
+    """요청 제한용 클라이언트 식별자 (fortune_app.request_client 와 같은 규칙)"""
+    headers = dict(scope.get("headers") or [])
+    forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1")
+    client = scope.get("client")
+    return admission.client_key(client[0] if client else None, forwarded)
+
+
+async def get_fortune(scope, receive, send):
+    """운세 생성 API (비동기)"""
+    try:
+        try:
+            data = json.loads(await read_body(receive) or b"null")
+            name, birth_date, gender = parse_fortune_input(data)
+        except ValueError as e:
+            await send_json(send, {"error": str(e)}, 400)
+            return
+
+        zodiac = calculate_zodiac(birth_date.year)
+
+        # 프리미엄 요청만 실시간 AI 생성, 그 외에는 미리 생성된 운세 풀 사용 (/get_fortune 과 같은 순서)
+        premium = bool(data.get('premium'))
+
+        cache_key = fortune_cache.make_key(name, birth_date, gender)
+        fortune = fortune_cache.get(cache_key)
+        if fortune is not None and premium and fortune.get("source") == "pool":
+            fortune = None
+        if fortune is not None:
+            metrics.inc("fortune_results_total", source="cache")
+        elif not premium:
+            # 로컬 SQLite 조회라 짧지만 이벤트 루프를 막지 않도록 스레드에서 실행
+            fortune = await asyncio.to_thread(serve_pooled_fortune, cache_key, name, birth_date, gender, zodiac)
+        if fortune is None:
+            wait = admission.check_rate(scope_client(scope))
+            if wait:
+                await send_json(send, {"error": "요청이 너무 많습니다. 잠시 후 다시 시도해주세요."}, 429,
+                                [(b"retry-after", str(math.ceil(wait)).encode())])
+                return
+            with metrics.span("async_generate"):
+                # 같은 사용자의 동시 요청은 AI 호출 한 번으로 병합 (캐시 저장/기록은 leader 만)
+                fortune = await agenerate_coalesced(cache_key, name, birth_date, gender, zodiac)
+
+        fortune['quote'] = get_random_quote()
+        if data.get('format') == 'structured':
+            await send_json(send, structured_response(fortune))
+        else:
+            await send_json(send, plain_response(fortune))
+
+    except Exception as e:
+        await send_json(send, {"error": f"오류가 발생했습니다: {str(e)}"}, 500)
+
+
+async def app(scope, receive, send):
+    """ASGI 진입점"""
+    if (
+        scope["type"] == "http"
+        and scope["path"] == "/get_fortune"
+        and scope["method"] == "POST"
+    ):
+        await get_fortune(scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
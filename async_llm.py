@@ -0,0 +1,207 @@
+"""
+AI 클라이언트 공용 이벤트 루프와 동시 호출 도구
+
+각 클라이언트(Gemini/Claude/OpenAI)의 실제 호출 코드는 SDK의 비동기 클라이언트를 쓰는
+코루틴 하나뿐입니다. 이 코루틴은 항상 백그라운드 스레드의 공용 이벤트 루프에서 실행됩니다.
+    - 동기 chat(): run_sync() 로 공용 루프에 넘기고 결과를 기다림
+    - 비동기 achat(): on_shared_loop() 로 공용 루프에서 실행하고 await
+SDK의 비동기 클라이언트(httpx, grpc.aio)는 처음 사용한 루프에 묶이므로, 호출한 쪽이
+ASGI 루프든 일반 스레드든 같은 루프에서 실행해야 연결을 재사용할 수 있습니다.
+
+여러 건을 한꺼번에 생성하는 스크립트(풀 생성, 프롬프트 A/B 테스트 등)는
+스레드 대신 gather_bounded() 로 제공자별 동시 호출 수/분당 호출 수를 지키며 실행합니다.
+
+로컬 가짜 API 서버로 100건 동시 생성 측정: python async_llm.py
+"""
+import asyncio
+import threading
+import time
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def shared_loop():
+    """공용 이벤트 루프 (처음 호출할 때 데몬 스레드에서 시작)"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def run_sync(coro, timeout=None):
+    """
+    코루틴을 공용 루프에서 실행하고 결과를 기다림 (동기 코드용)
+
+    Raises:
+        RuntimeError: 공용 루프 안에서 호출한 경우 (교착 방지, await 를 사용해야 함)
+    """
+    loop = shared_loop()
+    if _running_loop() is loop:
+        coro.close()
+        raise RuntimeError("공용 이벤트 루프 안에서는 run_sync 대신 await 를 사용하세요.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def on_shared_loop(coro):
+    """
+    코루틴을 공용 루프에서 실행하고 await (다른 이벤트 루프에서 호출해도 됨)
+
+    await 하던 쪽이 취소되면 공용 루프의 작업도 취소됩니다.
+    """
+    loop = shared_loop()
+    if _running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+class AsyncRateLimiter:
+    """분당 호출 수 제한 (fortune_pool.RateLimiter 의 비동기 버전)"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+
+    async def acquire(self):
+        # 이벤트 루프는 한 스레드에서 돌므로 잠금 없이 다음 순번을 예약
+        now = time.monotonic()
+        wait = self._next - now
+        self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def gather_bounded(jobs, concurrency=16, per_minute=None, provider_concurrency=None):
+    """
+    여러 AI 호출을 동시 실행 수와 제공자별 한도를 지키며 실행
+
+        results = await gather_bounded(
+            [("gemini", gemini.achat(p)) for p in prompts],
+            concurrency=32, per_minute={"gemini": 600}, provider_concurrency={"gemini": 8},
+        )
+
+    Args:
+        jobs: [(제공자 이름, 코루틴), ...]
+        concurrency: 전체 동시 실행 수
+        per_minute: 제공자별 분당 호출 수 {제공자: 횟수}
+        provider_concurrency: 제공자별 동시 실행 수 {제공자: 개수}
+
+    Returns:
+        list: jobs 순서대로 결과 (예외가 나면 그 자리에 예외 객체)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiters = {provider: AsyncRateLimiter(rpm) for provider, rpm in (per_minute or {}).items()}
+    provider_semaphores = {
+        provider: asyncio.Semaphore(limit) for provider, limit in (provider_concurrency or {}).items()
+    }
+
+    async def run(provider, coro):
+        # 제공자 한도를 먼저 기다려야 다른 제공자의 작업이 전체 슬롯을 쓸 수 있음
+        provider_semaphore = provider_semaphores.get(provider)
+        if provider_semaphore is not None:
+            await provider_semaphore.acquire()
+        try:
+            limiter = limiters.get(provider)
+            if limiter is not None:
+                await limiter.acquire()
+            async with semaphore:
+                return await coro
+        finally:
+            if provider_semaphore is not None:
+                provider_semaphore.release()
+
+    return await asyncio.gather(*(run(provider, coro) for provider, coro in jobs), return_exceptions=True)
+
+
+def gather_sync(jobs, **limits):
+    """동기 스크립트용 gather_bounded (공용 루프에서 실행)"""
+    return run_sync(gather_bounded(jobs, **limits))
+
+
+def _start_stub_server(latency):
+    """Anthropic Messages API 흉내를 내는 로컬 HTTP 서버 (요청마다 latency 초 지연)"""
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = json.dumps({
+        "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub",
+        "content": [{"type": "text", "text": "**오늘의 운세**\n좋은 하루입니다."}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": 100, "output_tokens": 20},
+    }).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 1024  # 동시 연결 100개가 거절되지 않도록 (기본값 5)
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """로컬 가짜 API로 순차 chat() 과 gather_bounded() 100건 동시 생성 비교"""
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="비동기 AI 클라이언트 동시 호출 측정 (로컬 가짜 API)")
+    parser.add_argument("-n", type=int, default=100, help="생성 건수")
+    parser.add_argument("--latency", type=float, default=0.1, help="가짜 API 응답 지연(초)")
+    parser.add_argument("--concurrency", type=int, default=100, help="동시 실행 수")
+    parser.add_argument("--sequential", type=int, default=10, help="순차 측정 건수 (나머지는 추정)")
+    args = parser.parse_args()
+
+    server = _start_stub_server(args.latency)
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    from claude_client import ClaudeClient
+
+    claude = ClaudeClient(api_key="stub")
+    claude.chat("연결 준비")
+
+    start = time.perf_counter()
+    for i in range(args.sequential):
+        claude.chat(f"사용자{i} 운세")
+    sequential = (time.perf_counter() - start) / args.sequential
+    print(f"순차 chat() : 건당 {sequential * 1000:.0f}ms → {args.n}건 약 {sequential * args.n:.1f}s")
+
+    jobs = [("claude", claude.achat(f"사용자{i} 운세")) for i in range(args.n)]
+    start = time.perf_counter()
+    results = gather_sync(jobs, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, Exception) or r.startswith("오류 발생")]
+    print(f"gather_bounded({args.concurrency}) : {args.n}건 {elapsed:.2f}s "
+          f"(실패 {len(failures)}건, 약 {sequential * args.n / elapsed:.0f}배)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+정적 파일 빌드: 압축(minify) + 내용 해시 파일명 + 미리 압축(gzip/brotli)
+
+    static/css/style.css  ->  static/dist/css/style.<해시>.css (+ .gz, .br)
+    static/js/script.js   ->  static/dist/js/script.<해시>.js  (+ .gz, .br)
+
+파일명에 내용 해시가 들어가므로 브라우저/CDN이 1년 동안 캐시해도 되고(immutable),
+내용이 바뀌면 파일명이 바뀌어 자동으로 새로 받습니다. 원본 경로 -> 해시 파일명은
+static/dist/manifest.json 에 기록되고 템플릿의 asset_url() 이 이를 사용합니다 (static_assets.py).
+
+brotli 압축은 brotli 패키지가 있을 때만 만듭니다 (pip install brotli).
+CSS/JS 를 수정한 뒤에는 다시 빌드하세요:
+    python build_assets.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성
+    brotli = None
+
+from static_assets import DIST_DIR, MANIFEST_NAME, MANIFEST_VERSION, STATIC_DIR, source_hash
+
+# 빌드 대상 (static/ 기준 경로)
+ASSETS = ("css/style.css", "js/script.js")
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_CSS_STRINGS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r":\s+")
+
+# 이 문자나 키워드 뒤의 "/" 는 나눗셈이 아니라 정규식 리터럴의 시작
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^\n")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "void", "in", "of", "delete", "throw"}
+_LAST_WORD = re.compile(r"[\w$]+$")
+_WORD = re.compile(r"[\w$]")
+# 이 문자 앞뒤의 줄바꿈은 세미콜론 자동 삽입과 무관하므로 지움
+_NO_ASI_AFTER = set("{;,([")
+_NO_ASI_BEFORE = set(")]},;")
+
+
+def minify_css(source):
+    """주석과 불필요한 공백 제거 (문자열 안은 그대로)"""
+    source = _CSS_TOKENS.sub(lambda match: match.group(1) or " ", source)
+    out = []
+    last = 0
+    for match in _CSS_STRINGS.finditer(source):
+        out.append(_squeeze_css(source[last:match.start()]))
+        out.append(match.group())
+        last = match.end()
+    out.append(_squeeze_css(source[last:]))
+    return "".join(out).replace(";}", "}").strip()
+
+
+def _squeeze_css(text):
+    text = _CSS_SPACE.sub(" ", text)
+    text = _CSS_PUNCT.sub(r"\1", text)
+    # "a :hover" 와 "a:hover" 는 다른 선택자이므로 콜론 앞 공백은 남김
+    return _CSS_COLON.sub(":", text)
+
+
+def minify_js(source):
+    """
+    주석과 들여쓰기 제거 (jsmin 방식의 보수적인 축소)
+
+    문자열/템플릿 리터럴/정규식 리터럴은 그대로 두고, 줄바꿈은 자동 세미콜론 삽입(ASI)이
+    바뀌지 않도록 하나로 줄이기만 합니다. 변수 이름은 바꾸지 않습니다.
+    """
+    out = []
+    i, n = 0, len(source)
+    pending = None  # 건너뛴 공백: None, " ", "\n"
+
+    while i < n:
+        c = source[i]
+        nxt = source[i + 1] if i + 1 < n else ""
+
+        if c in " \t\r\n":
+            pending = "\n" if c == "\n" or pending == "\n" else " "
+            i += 1
+            continue
+        if c == "/" and nxt == "/":
+            end = source.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if c == "/" and nxt == "*":
+            end = source.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            pending = pending or " "
+            continue
+
+        if pending:
+            prev = out[-1][-1] if out else ""
+            if pending == "\n" and prev and prev not in _NO_ASI_AFTER and c not in _NO_ASI_BEFORE:
+                out.append("\n")
+            elif prev and (_WORD.match(prev) and _WORD.match(c) or prev == c and c in "+-"):
+                out.append(" ")
+            pending = None
+
+        if c in "'\"`":
+            end = _skip_quoted(source, i, c)
+            out.append(source[i:end])
+            i = end
+        elif c == "/" and _regex_allowed(out):
+            end = _skip_regex(source, i)
+            out.append(source[i:end])
+            i = end
+        else:
+            out.append(c)
+            i += 1
+
+    return "".join(out).strip()
+
+
+def _regex_allowed(out):
+    tail = "".join(out[-12:])
+    if not tail or tail[-1] in _REGEX_PREFIX:
+        return True
+    word = _LAST_WORD.search(tail)
+    return word is not None and word.group() in _REGEX_KEYWORDS
+
+
+def _skip_quoted(source, start, quote):
+    i = start + 1
+    while i < len(source):
+        if source[i] == "\\":
+            i += 2
+            continue
+        if source[i] == quote:
+            return i + 1
+        i += 1
+    return len(source)
+
+
+def _skip_regex(source, start):
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < len(source) and source[i].isalpha():  # 플래그
+                i += 1
+            return i
+        elif c == "\n":
+            break
+        i += 1
+    return i
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def build_asset(path, dist_dir):
+    """
+    파일 하나를 축소/해시/압축해 dist_dir 에 쓰기
+
+    Returns:
+        dict: manifest 항목
+    """
+    with open(os.path.join(STATIC_DIR, path), encoding="utf-8") as f:
+        source = f.read()
+    base, ext = os.path.splitext(path)
+    body = MINIFIERS.get(ext, lambda text: text)(source).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    hashed = f"{base}.{digest}{ext}"
+
+    target = os.path.join(dist_dir, hashed)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(body)
+
+    # mtime=0: 같은 내용이면 .gz 도 바이트 단위로 같게
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    with open(target + ".gz", "wb") as f:
+        f.write(gzipped)
+
+    entry = {
+        "file": hashed,
+        "source_hash": source_hash(source.encode("utf-8")),
+        "size": len(source.encode("utf-8")),
+        "minified": len(body),
+        "gzip": len(gzipped),
+        "br": None,
+    }
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        with open(target + ".br", "wb") as f:
+            f.write(compressed)
+        entry["br"] = len(compressed)
+    return entry
+
+
+def build(assets=ASSETS, dist_dir=DIST_DIR):
+    """
+    dist_dir 를 비우고 전체 빌드 후 manifest.json 작성
+
+    Returns:
+        dict: manifest
+    """
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+    manifest = {"version": MANIFEST_VERSION, "assets": {path: build_asset(path, dist_dir) for path in assets}}
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="정적 파일 축소/해시/압축 빌드")
+    parser.parse_args()
+
+    manifest = build()
+    if brotli is None:
+        print("brotli 패키지가 없어 .br 파일은 만들지 않았습니다 (pip install brotli)")
+    for path, entry in manifest["assets"].items():
+        br = f" | br {entry['br']:6d}B" if entry["br"] is not None else ""
+        print(f"{path:16s} -> dist/{entry['file']:28s} | 원본 {entry['size']:6d}B | "
+              f"축소 {entry['minified']:6d}B | gzip {entry['gzip']:6d}B{br}")
+
+
+if __name__ == "__main__":
+    main()
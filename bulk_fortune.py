@@ -0,0 +1,272 @@
+"""
+캠페인용 대량 운세 생성 (NumPy 벡터화)
+
+구독자 수십만 명에게 보낼 "오늘의 운세"를 FortuneGenerator.generate_fortune 으로
+한 명씩 만들면 사용자마다 난수 생성, 로또 추첨, 상품 검색을 반복합니다. 여기서는
+열(column) 단위 사용자 목록을 받아 띠, 행운의 색상, 로또 번호, 전체운 문장을 NumPy로
+한꺼번에 계산하고, 상품 검색은 색상별로 한 번만 한 뒤 JSON Lines로 흘려보냅니다.
+
+난수는 fortune_rng 의 splitmix64 카운터 방식을 uint64 배열로 그대로 옮긴 것이라,
+같은 날 같은 사용자는 웹에서 받은 운세와 똑같은 색상/로또 번호를 받습니다.
+
+실행:
+    python bulk_fortune.py users.csv -o fortunes.jsonl
+    python bulk_fortune.py --benchmark 1000000
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fortune_cache import today_kst
+from fortune_generator import FortuneGenerator
+from fortune_rng import GOLDEN_GAMMA, MASK64, SLOT_COLOR, SLOT_LOTTO, SLOT_OVERALL, seed_from_key
+from zodiac import ZODIAC_ANIMALS
+
+CHUNK_SIZE = 65536
+COLUMNS = ("name", "birth_date", "gender")
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("numpy 패키지가 설치되지 않았습니다. pip install numpy 후 다시 시도하세요.")
+
+
+def splitmix64_array(x):
+    """fortune_rng.splitmix64 의 uint64 배열 버전 (오버플로는 2^64 나머지로 동작)"""
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(GOLDEN_GAMMA)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def draw_array(seeds, slot):
+    """FortuneRNG.draw 의 배열 버전"""
+    with np.errstate(over="ignore"):
+        return splitmix64_array(seeds + np.uint64((slot * GOLDEN_GAMMA) & MASK64))
+
+
+def lotto_array(seeds, count=6, high=45):
+    """FortuneRNG.lotto 의 배열 버전: 행마다 부분 Fisher-Yates 셔플 후 정렬"""
+    n = len(seeds)
+    rows = np.arange(n)
+    balls = np.tile(np.arange(1, high + 1, dtype=np.uint8), (n, 1))
+    for i in range(count):
+        j = i + (draw_array(seeds, SLOT_LOTTO + i) % np.uint64(high - i)).astype(np.intp)
+        picked = balls[rows, j]
+        balls[rows, j] = balls[:, i]
+        balls[:, i] = picked
+    return np.sort(balls[:, :count], axis=1)
+
+
+def compute_seeds(names, birth_dates, genders, day):
+    """
+    사용자별 64비트 시드 (fortune_rng.fortune_seed 와 같은 값)
+
+    Args:
+        names, birth_dates, genders: 같은 길이의 열. 생년월일은 "YYYY-MM-DD" 문자열
+        day: 날짜 (date)
+    """
+    day_key = day.isoformat()
+    return np.fromiter(
+        (seed_from_key(name.strip(), birth, gender or "", day_key)
+         for name, birth, gender in zip(names, birth_dates, genders)),
+        dtype=np.uint64, count=len(names),
+    )
+
+
+def pick_lucky_columns(users, day):
+    """
+    띠, 행운의 색상, 전체운, 로또 번호를 열 단위로 계산
+
+    Args:
+        users: {"name": [...], "birth_date": [...], "gender": [...]}
+        day: 날짜 (date)
+
+    Returns:
+        dict: zodiac/color/overall (인덱스 배열), lotto ((N, 6) 배열)
+    """
+    _require_numpy()
+    birth_dates = users["birth_date"]
+    seeds = compute_seeds(users["name"], birth_dates, users["gender"], day)
+    years = np.fromiter((int(b[:4]) for b in birth_dates), dtype=np.int64, count=len(birth_dates))
+    return {
+        "zodiac": years % 12,
+        "color": draw_array(seeds, SLOT_COLOR) % np.uint64(len(FortuneGenerator.LUCKY_COLORS)),
+        "overall": draw_array(seeds, SLOT_OVERALL) % np.uint64(len(FortuneGenerator.OVERALL_FORTUNES)),
+        "lotto": lotto_array(seeds),
+    }
+
+
+def load_users(path):
+    """
+    사용자 목록을 열 단위로 읽기 (CSV 또는 Parquet)
+
+    name, birth_date(YYYY-MM-DD), gender 열이 필요합니다. Parquet는 pyarrow가 있을 때만 지원합니다.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet 파일을 읽으려면 pyarrow 패키지가 필요합니다. pip install pyarrow")
+        table = pq.read_table(path, columns=list(COLUMNS))
+        return {column: [str(v) for v in table.column(column).to_pylist()] for column in COLUMNS}
+
+    users = {column: [] for column in COLUMNS}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for column in COLUMNS:
+                users[column].append(row[column])
+    return users
+
+
+def iter_fortune_lines(users, day=None, generator=None, chunk_size=CHUNK_SIZE):
+    """
+    사용자별 운세를 JSON Lines 한 줄씩 생성
+
+    상품은 등장한 색상마다 한 번만 검색(상품 캐시 사용)하고 JSON 조각을 미리 만들어 둡니다.
+
+    Args:
+        users: {"name": [...], "birth_date": [...], "gender": [...]}
+        day: 날짜 (기본값: KST 오늘)
+        generator: FortuneGenerator (기본값: 새로 생성)
+        chunk_size: 한 번에 벡터 계산할 사용자 수 (메모리 사용량 제한)
+
+    Yields:
+        str: 줄바꿈으로 끝나는 JSON 문자열
+    """
+    _require_numpy()
+
+    day = day or today_kst()
+    generator = generator or FortuneGenerator()
+    colors = generator.LUCKY_COLORS
+    overall_texts = generator.OVERALL_FORTUNES
+    zodiac_names = [ZODIAC_ANIMALS[i]["name"] for i in range(12)]
+    day_key = day.isoformat()
+
+    products_by_color = {}
+    products_json = {}
+
+    total = len(users["name"])
+    for start in range(0, total, chunk_size):
+        chunk = {column: users[column][start:start + chunk_size] for column in COLUMNS}
+        picked = pick_lucky_columns(chunk, day)
+
+        for color_index in np.unique(picked["color"]).tolist():
+            if color_index not in products_by_color:
+                products = generator.find_products(colors[color_index])
+                products_by_color[color_index] = products
+                products_json[color_index] = json.dumps(products, ensure_ascii=False)
+
+        rows = zip(
+            chunk["name"], chunk["birth_date"], chunk["gender"],
+            picked["zodiac"].tolist(), picked["color"].tolist(),
+            picked["overall"].tolist(), picked["lotto"].tolist(),
+        )
+        for name, birth, gender, zodiac, color_index, overall_index, lotto in rows:
+            lucky_color = colors[color_index]
+            text, _ = generator.render(
+                lucky_color, ", ".join(map(str, lotto)), overall_texts[overall_index],
+                products_by_color[color_index],
+            )
+            head = json.dumps({
+                "date": day_key,
+                "name": name,
+                "birth_date": birth,
+                "gender": gender,
+                "zodiac": zodiac_names[zodiac],
+                "lucky_color": lucky_color,
+                "lotto": lotto,
+                "fortune": text,
+            }, ensure_ascii=False)
+            yield f'{head[:-1]}, "products": {products_json[color_index]}}}\n'
+
+
+def write_fortunes(users, out, day=None, generator=None):
+    """운세를 out 파일에 JSON Lines로 기록하고 건수 반환"""
+    count = 0
+    write = out.write
+    for line in iter_fortune_lines(users, day=day, generator=generator):
+        write(line)
+        count += 1
+    return count
+
+
+def synthetic_users(n):
+    """벤치마크용 가짜 사용자 목록"""
+    genders = ("남성", "여성")
+    return {
+        "name": [f"구독자{i}" for i in range(n)],
+        "birth_date": [f"{1950 + i % 60}-{1 + i % 12:02d}-{1 + i % 28:02d}" for i in range(n)],
+        "gender": [genders[i % 2] for i in range(n)],
+    }
+
+
+def verify(users, day, sample=1000):
+    """앞쪽 sample명의 결과가 FortuneGenerator.pick_lucky_items 와 같은지 확인"""
+    generator = FortuneGenerator()
+    head = {column: users[column][:sample] for column in COLUMNS}
+    picked = pick_lucky_columns(head, day)
+    for i, (name, birth, gender) in enumerate(zip(head["name"], head["birth_date"], head["gender"])):
+        lucky_color, lotto_str, overall = generator.pick_lucky_items(
+            name, date.fromisoformat(birth), gender, day
+        )
+        expected = (lucky_color, lotto_str, overall)
+        actual = (
+            generator.LUCKY_COLORS[int(picked["color"][i])],
+            ", ".join(map(str, picked["lotto"][i].tolist())),
+            generator.OVERALL_FORTUNES[int(picked["overall"][i])],
+        )
+        if actual != expected:
+            raise AssertionError(f"{name}: 벡터 계산 {actual} != 단건 계산 {expected}")
+    return len(head["name"])
+
+
+def main():
+    """CSV/Parquet 사용자 목록으로 운세 JSON Lines 생성"""
+    parser = argparse.ArgumentParser(description="캠페인용 대량 운세 생성")
+    parser.add_argument("input", nargs="?", help="사용자 목록 (CSV 또는 Parquet: name,birth_date,gender)")
+    parser.add_argument("-o", "--output", help="출력 JSON Lines 파일 (기본값: 표준 출력)")
+    parser.add_argument("--date", help="운세 날짜 (YYYY-MM-DD, 기본값: KST 오늘)")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="가짜 사용자 N명으로 처리량 측정")
+    args = parser.parse_args()
+
+    day = date.fromisoformat(args.date) if args.date else today_kst()
+
+    if args.benchmark:
+        users = synthetic_users(args.benchmark)
+        print(f"단건 계산과 일치 확인: {verify(users, day)}명")
+        generator = FortuneGenerator()
+        for color in generator.LUCKY_COLORS:
+            generator.find_products(color)  # 상품 캐시 예열 (네트워크 시간 제외)
+
+        start = time.perf_counter()
+        with open(args.output or "/dev/null", "w", encoding="utf-8") as out:
+            count = write_fortunes(users, out, day=day, generator=generator)
+        elapsed = time.perf_counter() - start
+        print(f"{count}건 / {elapsed:.2f}s = {count / elapsed * 60:,.0f}건/분")
+        return
+
+    if not args.input:
+        parser.error("사용자 목록 파일 또는 --benchmark 가 필요합니다.")
+
+    users = load_users(args.input)
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            count = write_fortunes(users, out, day=day)
+    else:
+        count = write_fortunes(users, sys.stdout, day=day)
+    print(f"📨 {day} 운세 {count}건 생성 - {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
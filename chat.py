@@ -3,18 +3,58 @@ Claude와의 대화형 채팅 인터페이스
 """
 import os
 import sys
+import time
 from anthropic import Anthropic
 
+from conversation_memory import create_memory_from_env, estimate_tokens
+
+CANCELLED_MARK = "(응답 중단됨)"
+
+
+class BatchedWriter:
+    """청크를 모았다가 시간/크기 기준으로 한 번에 출력 (청크마다 flush 하지 않음)"""
+    
+    def __init__(self, stream=None, max_delay=0.05, max_chars=256):
+        """
+        Args:
+            stream: 출력 스트림 (기본값: sys.stdout)
+            max_delay: 마지막 출력 후 이 시간(초)이 지나면 출력
+            max_chars: 모인 글자 수가 이 이상이면 출력
+        """
+        self.stream = stream or sys.stdout
+        self.max_delay = max_delay
+        self.max_chars = max_chars
+        self._buffer = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self.flushes = 0
+    
+    def write(self, text):
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars or time.monotonic() - self._last_flush >= self.max_delay:
+            self.flush()
+    
+    def flush(self):
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self.stream.flush()
+            self._buffer = []
+            self._size = 0
+            self.flushes += 1
+        self._last_flush = time.monotonic()
+
 
 class ChatInterface:
     """대화형 채팅 인터페이스"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, memory=None):
         """
         채팅 인터페이스 초기화
         
         Args:
             api_key: Anthropic API 키. None이면 환경변수에서 가져옵니다.
+            memory: ConversationMemory. None이면 환경변수 설정으로 생성합니다.
         """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
@@ -23,15 +63,62 @@ class ChatInterface:
                 "환경변수 ANTHROPIC_API_KEY를 설정하거나 api_key 파라미터를 제공하세요."
             )
         self.client = Anthropic(api_key=self.api_key)
-        self.conversation_history = []
+        self.memory = memory if memory is not None else create_memory_from_env(self.client)
         self.model = "claude-3-5-sonnet-20241022"
+        self.turns = []  # 턴별 요청 크기/스트리밍 지표
+    
+    @property
+    def conversation_history(self):
+        """현재 요청에 포함되는 대화 히스토리 (오래된 턴은 요약으로 대체됨)"""
+        return self.memory.messages()
     
     def add_message(self, role, content):
         """대화 히스토리에 메시지 추가"""
-        self.conversation_history.append({
-            "role": role,
-            "content": content
-        })
+        self.memory.add(role, content)
+    
+    def _request_options(self):
+        """API 요청 인자 (요약이 있으면 system 프롬프트로 전달)"""
+        options = {
+            "model": self.model,
+            "max_tokens": 4096,
+            "messages": self.memory.messages()
+        }
+        system = self.memory.system_prompt()
+        if system:
+            options["system"] = system
+        return options
+    
+    def _finish_turn(self, estimated, usage, **metrics):
+        """
+        턴 종료: 요청 크기와 지표 기록 후 예산을 넘은 히스토리 정리
+        
+        Args:
+            estimated: 요청에 들어간 히스토리 토큰 수 (추정)
+            usage: API 응답의 usage (없으면 None)
+            metrics: ttft, output_tokens, tokens_per_second, cancelled 등 스트리밍 지표
+        """
+        turn = {"estimated": estimated, "input_tokens": getattr(usage, "input_tokens", None)}
+        turn.update(metrics)
+        self.turns.append(turn)
+        self.memory.trim()
+    
+    def last_turn_report(self):
+        """마지막 턴의 요청 크기/스트리밍 지표 한 줄 요약"""
+        if not self.turns:
+            return ""
+        turn = self.turns[-1]
+        stats = self.memory.stats()
+        report = f"요청 크기: 히스토리 약 {turn['estimated']:,} 토큰"
+        if turn["input_tokens"] is not None:
+            report += f" (실제 입력 {turn['input_tokens']:,} 토큰)"
+        report += f" | 예산 {stats['budget_tokens']:,} | 요약된 메시지 {stats['evicted']}개"
+        if turn.get("ttft") is not None:
+            report += f" | 첫 토큰 {turn['ttft']:.2f}s"
+        if turn.get("tokens_per_second"):
+            report += f" | {turn['tokens_per_second']:.1f} 토큰/초"
+        if turn.get("cancelled"):
+            report += " | 중단됨"
+        return report
     
     def chat(self, user_message):
         """
@@ -45,28 +132,31 @@ class ChatInterface:
         """
         # 사용자 메시지를 히스토리에 추가
         self.add_message("user", user_message)
+        estimated = self.memory.request_tokens()
         
         try:
             # Claude에게 메시지 전송
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=self.conversation_history
-            )
+            response = self.client.messages.create(**self._request_options())
             
             # 어시스턴트 응답을 히스토리에 추가
             assistant_message = response.content[0].text
             self.add_message("assistant", assistant_message)
+            self._finish_turn(estimated, getattr(response, "usage", None))
             
             return assistant_message
             
         except Exception as e:
+            # 응답을 받지 못한 사용자 메시지는 히스토리에서 제거 (user/assistant 순서 유지)
+            self.memory.pop()
             return f"오류 발생: {str(e)}"
     
     def stream_chat(self, user_message):
         """
         스트리밍 방식으로 응답을 받습니다.
         
+        청크는 리스트에 모았다가 끝날 때 한 번만 합칩니다. 소비자가 중간에 멈추면
+        (generator.close() 또는 Ctrl+C) 그때까지 받은 응답을 중단 표시와 함께 히스토리에 남깁니다.
+        
         Args:
             user_message: 사용자 메시지
             
@@ -75,47 +165,98 @@ class ChatInterface:
         """
         # 사용자 메시지를 히스토리에 추가
         self.add_message("user", user_message)
+        estimated = self.memory.request_tokens()
+        chunks = []
+        timing = {"start": time.perf_counter(), "first": None}
+        usage = None
         
         try:
             # 스트리밍으로 응답 받기
-            full_response = ""
-            
-            with self.client.messages.stream(
-                model=self.model,
-                max_tokens=4096,
-                messages=self.conversation_history
-            ) as stream:
+            with self.client.messages.stream(**self._request_options()) as stream:
                 for text in stream.text_stream:
-                    full_response += text
+                    if timing["first"] is None:
+                        timing["first"] = time.perf_counter()
+                    chunks.append(text)
                     yield text
-            
-            # 전체 응답을 히스토리에 추가
-            self.add_message("assistant", full_response)
-            
+                usage = getattr(stream.get_final_message(), "usage", None)
+        except (GeneratorExit, KeyboardInterrupt):
+            # 중단 → 받은 만큼 히스토리에 남기고 스트림 종료
+            self._save_streamed(chunks, estimated, usage, timing, cancelled=True)
+            raise
         except Exception as e:
-            error_msg = f"오류 발생: {str(e)}"
-            yield error_msg
+            if chunks:
+                self._save_streamed(chunks, estimated, usage, timing, cancelled=True)
+            else:
+                self.memory.pop()
+            yield f"오류 발생: {str(e)}"
+            return
+        
+        # 전체 응답을 히스토리에 추가
+        self._save_streamed(chunks, estimated, usage, timing, cancelled=False)
+    
+    def _save_streamed(self, chunks, estimated, usage, timing, cancelled):
+        """스트리밍 응답을 히스토리에 추가하고 첫 토큰 지연/초당 토큰 수 기록"""
+        end = time.perf_counter()
+        text = "".join(chunks)
+        if cancelled:
+            text = f"{text}\n{CANCELLED_MARK}" if text else CANCELLED_MARK
+        self.add_message("assistant", text)
+        
+        first = timing["first"]
+        output_tokens = getattr(usage, "output_tokens", None) or estimate_tokens("".join(chunks))
+        generating = end - first if first is not None else 0
+        self._finish_turn(
+            estimated, usage,
+            ttft=first - timing["start"] if first is not None else None,
+            output_tokens=output_tokens,
+            tokens_per_second=output_tokens / generating if generating > 0 else None,
+            cancelled=cancelled,
+        )
     
     def clear_history(self):
         """대화 히스토리 초기화"""
-        self.conversation_history = []
+        self.memory.clear()
+        self.turns = []
         print("\n✨ 대화 히스토리가 초기화되었습니다.\n")
     
     def show_history(self):
         """대화 히스토리 출력"""
-        if not self.conversation_history:
+        if not self.conversation_history and not self.memory.summary:
             print("\n대화 히스토리가 없습니다.\n")
             return
         
         print("\n" + "="*50)
         print("대화 히스토리")
         print("="*50)
+        if self.memory.summary:
+            print(f"\n[이전 대화 요약]\n{self.memory.summary}")
         for i, msg in enumerate(self.conversation_history, 1):
             role = "사용자" if msg["role"] == "user" else "Claude"
             print(f"\n[{i}] {role}:")
             print(msg["content"])
         print("\n" + "="*50 + "\n")
     
+    def show_memory(self):
+        """대화 메모리 상태와 턴별 요청 크기/스트리밍 지표 출력"""
+        stats = self.memory.stats()
+        print("\n" + "="*50)
+        print("대화 메모리")
+        print("="*50)
+        print(f"메시지 {stats['messages']}개 | 히스토리 {stats['message_tokens']:,} 토큰 "
+              f"+ 요약 {stats['summary_tokens']:,} 토큰 / 예산 {stats['budget_tokens']:,} 토큰")
+        print(f"요약된 메시지 {stats['evicted']}개 | 요약 {stats['summaries']}회 (실패 {stats['summary_failures']}회)")
+        for i, turn in enumerate(self.turns, 1):
+            actual = f"{turn['input_tokens']:,}" if turn["input_tokens"] is not None else "-"
+            line = f"  턴 {i}: 추정 {turn['estimated']:,} 토큰 | 실제 입력 {actual} 토큰"
+            if turn.get("ttft") is not None:
+                line += f" | 첫 토큰 {turn['ttft']:.2f}s"
+            if turn.get("tokens_per_second"):
+                line += f" | {turn['tokens_per_second']:.1f} 토큰/초"
+            if turn.get("cancelled"):
+                line += " | 중단됨"
+            print(line)
+        print("="*50 + "\n")
+    
     def run(self):
         """채팅 인터페이스 실행"""
         print("\n" + "="*50)
@@ -125,6 +266,8 @@ class ChatInterface:
         print("  - 메시지 입력: Claude와 대화")
         print("  - /clear: 대화 히스토리 초기화")
         print("  - /history: 대화 히스토리 보기")
+        print("  - /memory: 대화 메모리와 턴별 요청 크기/속도 보기")
+        print("  - 응답 중 Ctrl+C: 응답 중단 (받은 부분은 히스토리에 남음)")
         print("  - /exit, /quit: 종료")
         print("\n" + "="*50 + "\n")
         
@@ -149,11 +292,27 @@ class ChatInterface:
                     self.show_history()
                     continue
                 
+                elif user_input.lower() == "/memory":
+                    self.show_memory()
+                    continue
+                
                 # Claude 응답 받기 (스트리밍)
                 print("\nClaude: ", end="", flush=True)
-                for chunk in self.stream_chat(user_input):
-                    print(chunk, end="", flush=True)
+                turns = len(self.turns)
+                writer = BatchedWriter(sys.stdout)
+                stream = self.stream_chat(user_input)
+                try:
+                    for chunk in stream:
+                        writer.write(chunk)
+                except KeyboardInterrupt:
+                    # 응답만 중단하고 채팅은 계속
+                    stream.close()
+                    writer.write(f"\n{CANCELLED_MARK}")
+                finally:
+                    writer.flush()
                 print("\n")
+                if len(self.turns) > turns:
+                    print(f"({self.last_turn_report()})\n")
                 
             except KeyboardInterrupt:
                 print("\n\n👋 채팅을 종료합니다.\n")
@@ -2,7 +2,11 @@
 Claude API 클라이언트 연결 예제
 """
 import os
-from anthropic import Anthropic
+import time
+from anthropic import Anthropic, AsyncAnthropic
+
+from async_llm import on_shared_loop, run_sync
+from prompt_cache import CLAUDE_MIN_CACHE_TOKENS, estimate_tokens, prompt_cache_stats
 
 class ClaudeClient:
     """Claude API를 사용하기 위한 클라이언트 클래스"""
@@ -21,32 +25,80 @@ class ClaudeClient:
                 "환경변수 ANTHROPIC_API_KEY를 설정하거나 api_key 파라미터를 제공하세요."
             )
         self.client = Anthropic(api_key=self.api_key)
+        self._async_client = None  # 공용 이벤트 루프에서 처음 쓸 때 생성
+    
+    def warm_up(self):
+        """모델 목록을 조회해 API 연결을 미리 열어둡니다."""
+        self.client.models.list(limit=1)
+    
+    def _request_options(self, message, model, max_tokens, system):
+        """messages.create 인자 (충분히 긴 system 만 캐시 지점으로 표시)"""
+        options = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": message}
+            ]
+        }
+        if system and estimate_tokens(system) >= CLAUDE_MIN_CACHE_TOKENS:
+            # 고정 지침을 캐시 → 다음 요청부터 이 부분은 캐시 읽기 단가로 과금
+            options["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        elif system:
+            # 최소 길이보다 짧으면 Claude 가 캐싱하지 않으므로 일반 system 으로 보냄
+            options["system"] = system
+        return options
+    
+    def _record_usage(self, usage, elapsed):
+        """요청별 입력 토큰/캐시 토큰/지연 기록"""
+        if usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+        written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        prompt_cache_stats.record(
+            "claude", (usage.input_tokens or 0) + cached + written, cached, written, elapsed
+        )
     
-    def chat(self, message, model="claude-3-5-sonnet-20241022", max_tokens=1024):
+    async def _achat(self, message, model, max_tokens, system):
+        """실제 호출 (항상 공용 이벤트 루프에서 실행)"""
+        try:
+            if self._async_client is None:
+                self._async_client = AsyncAnthropic(api_key=self.api_key)
+            start = time.perf_counter()
+            message_obj = await self._async_client.messages.create(
+                **self._request_options(message, model, max_tokens, system)
+            )
+            self._record_usage(getattr(message_obj, "usage", None), time.perf_counter() - start)
+            return message_obj.content[0].text
+        except Exception as e:
+            return f"오류 발생: {str(e)}"
+    
+    def chat(self, message, model="claude-3-5-sonnet-20241022", max_tokens=1024, system=None):
         """
-        Claude와 대화하기
+        Claude와 대화하기 (공용 이벤트 루프의 achat 에 위임)
         
         Args:
             message: 사용자 메시지
             model: 사용할 Claude 모델 (기본값: claude-3-5-sonnet-20241022)
             max_tokens: 최대 토큰 수
+            system: 요청마다 같은 고정 지침 (프롬프트 캐시에 저장됨)
             
         Returns:
             Claude의 응답 메시지
         """
         try:
-            message_obj = self.client.messages.create(
-                model=model,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "user", "content": message}
-                ]
-            )
-            return message_obj.content[0].text
+            return run_sync(self._achat(message, model, max_tokens, system))
         except Exception as e:
             return f"오류 발생: {str(e)}"
     
-    def stream_chat(self, message, model="claude-3-5-sonnet-20241022", max_tokens=1024):
+    async def achat(self, message, model="claude-3-5-sonnet-20241022", max_tokens=1024, system=None):
+        """
+        Claude와 대화하기 (비동기 버전, 인자/반환값은 chat 과 같음)
+        """
+        return await on_shared_loop(self._achat(message, model, max_tokens, system))
+    
+    def stream_chat(self, message, model="claude-3-5-sonnet-20241022", max_tokens=1024, system=None):
         """
         Claude와 스트리밍 대화하기
         
@@ -54,21 +106,22 @@ class ClaudeClient:
             message: 사용자 메시지
             model: 사용할 Claude 모델
             max_tokens: 최대 토큰 수
+            system: 요청마다 같은 고정 지침 (프롬프트 캐시에 저장됨)
             
         Yields:
             스트리밍된 응답 청크
         """
         try:
+            start = time.perf_counter()
             stream = self.client.messages.create(
-                model=model,
-                max_tokens=max_tokens,
-                messages=[
-                    {"role": "user", "content": message}
-                ],
+                **self._request_options(message, model, max_tokens, system),
                 stream=True
             )
             for event in stream:
-                if event.type == "content_block_delta":
+                if event.type == "message_start":
+                    # 입력 토큰/캐시 사용량은 첫 이벤트에 들어 있음 (지연 = 첫 응답까지)
+                    self._record_usage(getattr(event.message, "usage", None), time.perf_counter() - start)
+                elif event.type == "content_block_delta":
                     yield event.delta.text
         except Exception as e:
             yield f"오류 발생: {str(e)}"
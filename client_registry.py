@@ -0,0 +1,138 @@
+"""
+AI 클라이언트 레지스트리 (프로세스 전역 재사용)
+
+요청마다 GeminiClient() 를 새로 만들면 genai.configure 와 GenerativeModel 생성,
+HTTP 연결 수립이 매번 반복됩니다. 이 모듈은 워커 프로세스마다 클라이언트를
+한 번만 만들어 여러 스레드에서 함께 사용하도록 합니다.
+"""
+import importlib
+import os
+import threading
+import time
+
+# 제공자 이름 -> (모듈, 클래스)
+PROVIDERS = {
+    "gemini": ("gemini_client", "GeminiClient"),
+    "claude": ("claude_client", "ClaudeClient"),
+    "openai": ("openai_client", "OpenAIClient"),
+}
+
+# 제공자 이름 -> API 키 환경변수
+API_KEY_ENV = {
+    "gemini": "GOOGLE_API_KEY",
+    "claude": "ANTHROPIC_API_KEY",
+    "openai": "OPENAI_API_KEY",
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(provider):
+    """
+    제공자별 공유 클라이언트 반환 (처음 호출 시 생성)
+
+    Args:
+        provider: "gemini", "claude", "openai" 중 하나
+
+    Returns:
+        클라이언트 인스턴스
+
+    Raises:
+        ValueError: 알 수 없는 제공자이거나 API 키가 없을 때
+    """
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+
+    if provider not in PROVIDERS:
+        raise ValueError(f"알 수 없는 AI 제공자입니다: {provider}")
+
+    with _lock:
+        # 다른 스레드가 먼저 만들었을 수 있으므로 다시 확인
+        client = _clients.get(provider)
+        if client is None:
+            module_name, class_name = PROVIDERS[provider]
+            client_class = getattr(importlib.import_module(module_name), class_name)
+            client = client_class()
+            _clients[provider] = client
+    return client
+
+
+def available_providers():
+    """API 키가 설정되어 있거나 이미 등록된 제공자 목록"""
+    return [
+        provider for provider in PROVIDERS
+        if provider in _clients or os.getenv(API_KEY_ENV[provider])
+    ]
+
+
+def warm_up(providers=None):
+    """
+    클라이언트를 미리 만들고 연결을 열어둡니다.
+
+    Args:
+        providers: 준비할 제공자 목록 (기본값: 전체)
+
+    Returns:
+        dict: 제공자별 준비 소요 시간(초). 실패한 제공자는 오류 메시지
+    """
+    report = {}
+    for provider in providers or PROVIDERS:
+        start = time.perf_counter()
+        try:
+            client = get_client(provider)
+            warm = getattr(client, "warm_up", None)
+            if warm is not None:
+                warm()
+            report[provider] = time.perf_counter() - start
+        except Exception as e:
+            report[provider] = f"실패: {e}"
+    return report
+
+
+def warm_up_in_background(providers=None):
+    """서버 시작을 막지 않도록 별도 스레드에서 warm_up 실행"""
+    def run():
+        for provider, result in warm_up(providers).items():
+            if isinstance(result, float):
+                print(f"🔥 {provider} 클라이언트 준비 완료 ({result * 1000:.0f}ms)")
+            else:
+                print(f"⚠️ {provider} 클라이언트 준비 {result}")
+
+    thread = threading.Thread(target=run, name="client-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def reset():
+    """등록된 클라이언트 모두 제거 (API 키 교체 시 사용)"""
+    with _lock:
+        _clients.clear()
+
+
+def main():
+    """요청당 클라이언트 준비 비용 비교 (매번 생성 vs 레지스트리)"""
+    provider = os.getenv("BENCH_PROVIDER", "gemini")
+    module_name, class_name = PROVIDERS[provider]
+    client_class = getattr(importlib.import_module(module_name), class_name)
+    n = 200
+
+    start = time.perf_counter()
+    for _ in range(n):
+        client_class(api_key="benchmark-key")
+    per_request_new = (time.perf_counter() - start) / n
+
+    _clients[provider] = client_class(api_key="benchmark-key")
+    start = time.perf_counter()
+    for _ in range(n):
+        get_client(provider)
+    per_request_shared = (time.perf_counter() - start) / n
+
+    print(f"{provider} 요청당 클라이언트 준비 비용 ({n}회 평균)")
+    print(f"  매번 생성:   {per_request_new * 1e6:10.1f}µs")
+    print(f"  레지스트리:  {per_request_shared * 1e6:10.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
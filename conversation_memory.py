@@ -0,0 +1,205 @@
+"""
+토큰 예산이 있는 대화 메모리
+
+대화 히스토리를 통째로 다시 보내면 턴마다 요청이 커져 지연 시간과 비용이 선형으로 늘고,
+긴 대화는 결국 컨텍스트 한도에 걸립니다. 이 메모리는 최근 메시지만 그대로 보내고(슬라이딩 윈도우),
+예산을 넘겨 밀려난 오래된 턴은 더 저렴한 모델로 요약해 system 프롬프트에 붙입니다.
+
+메시지별 토큰 수는 추가할 때 한 번만 계산해 두고 합계를 유지하므로
+턴마다 전체 히스토리를 다시 셀 필요가 없습니다.
+"""
+import os
+from collections import deque
+
+MESSAGE_OVERHEAD = 4  # 메시지마다 붙는 역할/구분자 토큰 (추정)
+
+
+def estimate_tokens(text):
+    """
+    토크나이저 없이 토큰 수 추정
+
+    영문/숫자는 약 4글자당 1토큰, 한글 등 비ASCII 문자는 글자당 약 1토큰으로 계산합니다.
+    """
+    ascii_chars = sum(1 for c in text if c < "\x80")
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+class ClaudeSummarizer:
+    """저렴한 Claude 모델로 오래된 대화를 요약"""
+
+    PROMPT = (
+        "다음은 사용자와 AI 비서의 이전 대화입니다. 이후 대화를 이어가는 데 필요한 사실, "
+        "사용자의 요청과 선호, 결정된 사항만 한국어로 간결하게 요약하세요."
+    )
+
+    def __init__(self, client, model="claude-3-5-haiku-20241022", max_tokens=512):
+        """
+        Args:
+            client: Anthropic 클라이언트
+            model: 요약에 사용할 모델 (대화 모델보다 저렴한 모델)
+            max_tokens: 요약 최대 토큰 수
+        """
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def __call__(self, previous_summary, messages):
+        """
+        이전 요약 + 밀려난 메시지를 새 요약 하나로 합침
+
+        Returns:
+            str: 새 요약
+        """
+        lines = []
+        if previous_summary:
+            lines.append(f"[이전 요약]\n{previous_summary}\n")
+        for message in messages:
+            role = "사용자" if message["role"] == "user" else "AI"
+            lines.append(f"{role}: {message['content']}")
+
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            system=self.PROMPT,
+            messages=[{"role": "user", "content": "\n".join(lines)}],
+        )
+        return response.content[0].text
+
+
+class ConversationMemory:
+    """슬라이딩 윈도우 + 누적 요약 대화 메모리"""
+
+    def __init__(self, budget_tokens=8000, keep_recent=4, low_watermark=0.75, summarizer=None):
+        """
+        Args:
+            budget_tokens: 한 요청에 보낼 히스토리(요약 포함)의 최대 토큰 수
+            keep_recent: 예산을 넘더라도 남겨 둘 최근 메시지 수
+            low_watermark: 예산을 넘으면 이 비율까지 줄임 (요약 호출 횟수를 줄이기 위해)
+            summarizer: summarizer(이전 요약, 밀려난 메시지 목록) -> 새 요약. None이면 요약 없이 버림
+        """
+        self.budget_tokens = budget_tokens
+        self.keep_recent = max(2, keep_recent)
+        self.low_watermark = low_watermark
+        self.summarizer = summarizer
+
+        self._messages = deque()  # (메시지, 토큰 수)
+        self._message_tokens = 0
+        self.summary = ""
+        self._summary_tokens = 0
+
+        # 통계
+        self.evicted = 0
+        self.summaries = 0
+        self.summary_failures = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def add(self, role, content):
+        """메시지 추가 (토큰 수는 여기서 한 번만 계산)"""
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD
+        self._messages.append(({"role": role, "content": content}, tokens))
+        self._message_tokens += tokens
+
+    def pop(self):
+        """마지막 메시지 제거 (응답을 받지 못한 사용자 메시지 되돌리기용)"""
+        message, tokens = self._messages.pop()
+        self._message_tokens -= tokens
+        return message
+
+    def messages(self):
+        """API에 보낼 메시지 목록"""
+        return [message for message, _ in self._messages]
+
+    def system_prompt(self, base=None):
+        """
+        요약을 포함한 system 프롬프트 (요약도 base도 없으면 None)
+
+        Args:
+            base: 항상 앞에 붙일 system 프롬프트
+        """
+        parts = [base] if base else []
+        if self.summary:
+            parts.append(f"[이전 대화 요약]\n{self.summary}")
+        return "\n\n".join(parts) or None
+
+    def request_tokens(self):
+        """다음 요청에 들어갈 히스토리 토큰 수 (추정)"""
+        return self._message_tokens + self._summary_tokens
+
+    def trim(self):
+        """
+        예산을 넘었으면 오래된 턴을 밀어내고 요약
+
+        사용자/AI 메시지 쌍 단위로 밀어내 메시지 순서(user로 시작, 번갈아 등장)를 유지합니다.
+        각 메시지는 한 번만 밀려나므로 턴당 비용은 상수입니다.
+
+        Returns:
+            int: 밀려난 메시지 수
+        """
+        if self.request_tokens() <= self.budget_tokens:
+            return 0
+
+        target = int(self.budget_tokens * self.low_watermark)
+        evicted = []
+        while len(self._messages) - 2 >= self.keep_recent and self.request_tokens() > target:
+            for _ in range(2):
+                message, tokens = self._messages.popleft()
+                self._message_tokens -= tokens
+                evicted.append(message)
+
+        if evicted:
+            self.evicted += len(evicted)
+            self._summarize(evicted)
+        return len(evicted)
+
+    def _summarize(self, evicted):
+        if self.summarizer is None:
+            return
+        try:
+            self.summary = self.summarizer(self.summary, evicted)
+            self.summaries += 1
+        except Exception as e:
+            # 요약 실패 시 이전 요약 유지 (밀려난 턴은 잃지만 대화는 계속)
+            self.summary_failures += 1
+            print(f"대화 요약 실패: {e}")
+        self._summary_tokens = estimate_tokens(self.summary) + MESSAGE_OVERHEAD if self.summary else 0
+
+    def clear(self):
+        """메시지와 요약 모두 초기화"""
+        self._messages.clear()
+        self._message_tokens = 0
+        self.summary = ""
+        self._summary_tokens = 0
+
+    def stats(self):
+        """메모리 상태"""
+        return {
+            "messages": len(self._messages),
+            "message_tokens": self._message_tokens,
+            "summary_tokens": self._summary_tokens,
+            "request_tokens": self.request_tokens(),
+            "budget_tokens": self.budget_tokens,
+            "evicted": self.evicted,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+        }
+
+
+def create_memory_from_env(client=None):
+    """
+    환경변수 설정으로 대화 메모리 생성
+
+    CHAT_TOKEN_BUDGET: 히스토리 토큰 예산 (기본값 8000)
+    CHAT_KEEP_RECENT: 항상 남겨 둘 최근 메시지 수 (기본값 4)
+    CHAT_SUMMARY_MODEL: 요약 모델 (기본값 claude-3-5-haiku-20241022, "none"이면 요약 없이 버림)
+    """
+    summary_model = os.getenv("CHAT_SUMMARY_MODEL", "claude-3-5-haiku-20241022")
+    summarizer = None
+    if client is not None and summary_model.lower() != "none":
+        summarizer = ClaudeSummarizer(client, model=summary_model)
+    return ConversationMemory(
+        budget_tokens=int(os.getenv("CHAT_TOKEN_BUDGET", "8000")),
+        keep_recent=int(os.getenv("CHAT_KEEP_RECENT", "4")),
+        summarizer=summarizer,
+    )
@@ -2,13 +2,14 @@
 쿠팡 파트너스 API 클라이언트
 """
 import os
-import requests
 import hmac
 import hashlib
 import base64
 from datetime import datetime
 from urllib.parse import quote
 
+from http_session import get_session
+
 class CoupangClient:
     """쿠팡 파트너스 API를 사용하기 위한 클라이언트 클래스"""
     
@@ -29,6 +30,16 @@ class CoupangClient:
             self.secret_key = None
         
         self.base_url = "https://api-gateway.coupang.com/v2/providers/affiliate_open_api/apis/openapi/products/search"
+        
+        # keep-alive 연결 풀 + 429/5xx 재시도 (프로세스 전역 공유)
+        # 재시도를 모두 합쳐도 COUPANG_TIMEOUT(기본 5초) 안에 끝냄
+        self.session = get_session(
+            "coupang",
+            pool_maxsize=int(os.getenv("COUPANG_POOL_SIZE", "16")),
+            connect_timeout=2.0,
+            read_timeout=5.0,
+            total_timeout=float(os.getenv("COUPANG_TIMEOUT", "5"))
+        )
     
     def _generate_signature(self, method, path, secret_key, access_key):
         """쿠팡 API 서명 생성"""
@@ -43,6 +54,38 @@ class CoupangClient:
         ).decode('utf-8')
         return timestamp, signature
     
+    def _build_request(self, keyword):
+        """검색 요청 URL과 서명 헤더 생성"""
+        # 검색어 URL 인코딩
+        keyword_encoded = quote(keyword)
+        path = f"/v2/providers/affiliate_open_api/apis/openapi/products/search?keyword={keyword_encoded}"
+        
+        # 서명 생성
+        timestamp, signature = self._generate_signature("GET", path, self.secret_key, self.access_key)
+        
+        # 헤더 설정
+        headers = {
+            "Authorization": f"CEA algorithm=HmacSHA256, access-key={self.access_key}, signed-date={timestamp}, signature={signature}",
+            "Content-Type": "application/json;charset=UTF-8"
+        }
+        return f"https://api-gateway.coupang.com{path}", headers
+    
+    def _parse_products(self, data, limit):
+        """API 응답에서 상품 정보 추출"""
+        products = []
+        if "data" in data and "productData" in data["data"]:
+            for item in data["data"]["productData"][:limit]:
+                product = {
+                    "name": item.get("productName", ""),
+                    "price": item.get("productPrice", 0),
+                    "image": item.get("productImage", ""),
+                    "link": item.get("productUrl", ""),
+                    "rating": item.get("rating", 0),
+                    "reviews": item.get("reviewCount", 0)
+                }
+                products.append(product)
+        return products
+    
     def search_products(self, keyword, limit=3):
         """
         상품 검색
@@ -58,44 +101,13 @@ class CoupangClient:
             return []
         
         try:
-            # 검색어 URL 인코딩
-            keyword_encoded = quote(keyword)
-            path = f"/v2/providers/affiliate_open_api/apis/openapi/products/search?keyword={keyword_encoded}"
-            
-            # 서명 생성
-            timestamp, signature = self._generate_signature("GET", path, self.secret_key, self.access_key)
-            
-            # 헤더 설정
-            headers = {
-                "Authorization": f"CEA algorithm=HmacSHA256, access-key={self.access_key}, signed-date={timestamp}, signature={signature}",
-                "Content-Type": "application/json;charset=UTF-8"
-            }
+            url, headers = self._build_request(keyword)
             
             # API 호출
-            response = requests.get(
-                f"https://api-gateway.coupang.com{path}",
-                headers=headers,
-                timeout=5
-            )
+            response = self.session.get(url, headers=headers)
             
             if response.status_code == 200:
-                data = response.json()
-                products = []
-                
-                # 상품 정보 추출
-                if "data" in data and "productData" in data["data"]:
-                    for item in data["data"]["productData"][:limit]:
-                        product = {
-                            "name": item.get("productName", ""),
-                            "price": item.get("productPrice", 0),
-                            "image": item.get("productImage", ""),
-                            "link": item.get("productUrl", ""),
-                            "rating": item.get("rating", 0),
-                            "reviews": item.get("reviewCount", 0)
-                        }
-                        products.append(product)
-                
-                return products
+                return self._parse_products(response.json(), limit)
             else:
                 return []
                 
@@ -103,18 +115,8 @@ class CoupangClient:
             print(f"쿠팡 API 오류: {e}")
             return []
     
-    def search_by_color(self, color, product_type="의류", limit=3):
-        """
-        색상별 상품 검색
-        
-        Args:
-            color: 색상 (예: "빨간색", "파란색")
-            product_type: 상품 유형 (기본값: "의류")
-            limit: 반환할 상품 개수
-            
-        Returns:
-            list: 상품 정보 리스트
-        """
+    def color_keyword(self, color, product_type="의류"):
+        """색상별 검색어 생성"""
         # 색상별 검색어 매핑
         color_keywords = {
             "빨간색": f"{color} {product_type}",
@@ -134,6 +136,18 @@ class CoupangClient:
             "청록색": f"{color} {product_type}"
         }
         
-        keyword = color_keywords.get(color, f"{color} {product_type}")
-        return self.search_products(keyword, limit)
-
+        return color_keywords.get(color, f"{color} {product_type}")
+    
+    def search_by_color(self, color, product_type="의류", limit=3):
+        """
+        색상별 상품 검색
+        
+        Args:
+            color: 색상 (예: "빨간색", "파란색")
+            product_type: 상품 유형 (기본값: "의류")
+            limit: 반환할 상품 개수
+            
+        Returns:
+            list: 상품 정보 리스트
+        """
+        return self.search_products(self.color_keyword(color, product_type), limit)
@@ -0,0 +1,271 @@
+"""
+마감 시간(deadline) 기반 실행기
+
+signal.alarm 은 메인 스레드에서만 동작하므로 스레드 기반 워커(Flask, gunicorn)에서는
+타임아웃이 걸리지 않습니다. 이 실행기는 느린 호출(AI 등)을 제한된 스레드 풀에서 실행하고,
+마감 시간이 지나면 호출 측에 즉시 제어를 돌려줍니다. 늦게 도착한 결과는 버리지 않고
+on_late 콜백으로 넘겨 캐시 등에 저장할 수 있습니다.
+"""
+import inspect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class DeadlineExceeded(TimeoutError):
+    """마감 시간 안에 결과가 오지 않음"""
+
+
+class ExecutorBusy(RuntimeError):
+    """대기열이 가득 차서 작업을 받을 수 없음"""
+
+
+class DeadlineExecutor:
+    """제한된 스레드 풀 + 요청별 마감 시간"""
+
+    def __init__(self, max_workers=8, max_queue=32, timeout=5.0):
+        """
+        Args:
+            max_workers: 동시에 실행할 최대 작업 수
+            max_queue: 실행 대기 중인 작업의 최대 개수 (초과 시 ExecutorBusy)
+            timeout: 기본 마감 시간(초)
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deadline")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # 통계
+        self.submitted = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.late_saved = 0
+        self.abandoned = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, timeout=None, on_late=None, **kwargs):
+        """
+        fn(*args, **kwargs)를 풀에 넣고 바로 반환 (마감 시간은 지금부터 계산)
+
+        기다리는 동안 호출 측 스레드가 다른 일(상품 검색 등)을 할 수 있습니다.
+
+        Args:
+            fn: 실행할 함수
+            timeout: 마감 시간(초). None이면 기본값 사용
+            on_late: 마감 후 결과가 도착했을 때 호출할 콜백 (인자: 결과)
+
+        Returns:
+            DeadlineCall: result()로 결과를 기다리는 핸들
+
+        Raises:
+            ExecutorBusy: 대기열 초과
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy("실행 대기열이 가득 찼습니다.")
+            self._in_flight += 1
+            self.submitted += 1
+
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._release)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        return DeadlineCall(self, future, deadline, on_late)
+
+    def run(self, fn, *args, timeout=None, on_late=None, **kwargs):
+        """
+        fn(*args, **kwargs)를 풀에서 실행하고 마감 시간까지 결과를 기다림
+
+        Returns:
+            fn의 반환값
+
+        Raises:
+            DeadlineExceeded: 마감 시간 초과
+            ExecutorBusy: 대기열 초과
+        """
+        return self.submit(fn, *args, timeout=timeout, on_late=on_late, **kwargs).result()
+
+    def stream(self, fn, *args, timeout=None, idle_timeout=None, total_timeout=None, **kwargs):
+        """
+        fn(*args, **kwargs) 가 돌려주는 이터레이터(스트리밍 응답)를 풀에서 읽어 항목을 하나씩 전달
+
+        첫 항목은 timeout 안에, 이후 항목은 idle_timeout 간격 안에 도착해야 하고,
+        total_timeout 을 주면 스트림 전체가 그 시간 안에 끝나야 합니다.
+        마감을 넘기거나 호출 측이 읽기를 멈추면(클라이언트 연결 종료 등) 호출 측에는 바로
+        제어가 돌아오고, 풀의 작업은 다음 항목에서 읽기를 멈춥니다.
+
+        주의: 상류가 항목 사이에서 멈춘 경우 풀 스레드는 그 읽기가 끝날 때까지 돌아오지 않습니다.
+        fn 이 close() 를 가진 일반 이터레이터(SDK 스트림 응답 등)를 돌려주면 멈출 때 close() 로
+        연결을 끊어 읽기를 깨우지만, 제너레이터는 다른 스레드에서 닫을 수 없으므로 제공자
+        클라이언트의 읽기 timeout 이 풀 스레드를 붙잡는 최대 시간이 됩니다.
+
+        Args:
+            timeout: 첫 항목 마감 시간(초). None이면 기본값 사용
+            idle_timeout: 항목 사이 최대 간격(초). None이면 timeout 과 같음
+            total_timeout: 스트림 전체 마감 시간(초). None이면 제한 없음 (조각이 계속 오면 계속 읽음)
+
+        Yields:
+            이터레이터의 항목
+
+        Raises:
+            DeadlineExceeded: 마감 시간 초과
+            ExecutorBusy: 대기열 초과
+            Exception: fn 이 스트림을 열거나 읽다가 던진 예외 (그대로 전달)
+        """
+        items = queue.Queue()
+        stop = threading.Event()
+        opened = []
+        end = object()
+
+        def pump():
+            iterator = None
+            try:
+                # 스트림 열기(인증 실패, 4xx 등)에서 난 예외도 마감까지 기다리지 않고 바로 전달
+                iterator = fn(*args, **kwargs)
+                opened.append(iterator)
+                for item in iterator:
+                    if stop.is_set():
+                        break
+                    items.put((item, None))
+                items.put((end, None))
+            except BaseException as e:
+                items.put((end, e))
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+
+        first = self.timeout if timeout is None else timeout
+        deadline = None if total_timeout is None else time.monotonic() + total_timeout
+        self.submit(pump)
+        wait = first
+        try:
+            while True:
+                if deadline is not None:
+                    wait = min(wait, max(deadline - time.monotonic(), 0))
+                try:
+                    item, error = items.get(timeout=wait)
+                except queue.Empty:
+                    with self._lock:
+                        self.timed_out += 1
+                    raise DeadlineExceeded("스트리밍 응답 마감 시간을 초과했습니다.")
+                if item is end:
+                    if error is not None:
+                        raise error
+                    with self._lock:
+                        self.completed += 1
+                    return
+                yield item
+                wait = first if idle_timeout is None else idle_timeout
+        finally:
+            stop.set()
+            self._close_upstream(opened)
+
+    @staticmethod
+    def _close_upstream(opened):
+        """멈춘 스트림의 상류 연결 끊기 (제너레이터는 실행 중일 수 있어 pump 가 직접 닫음)"""
+        if not opened or inspect.isgenerator(opened[0]):
+            return
+        close = getattr(opened[0], "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                print(f"스트림 연결 종료 실패: {e}")
+
+    def _expire(self, future, on_late):
+        """마감 시간이 지난 작업 정리"""
+        with self._lock:
+            self.timed_out += 1
+        # 아직 시작도 못 한 작업은 취소, 실행 중인 작업은 늦은 결과를 처리
+        if future.cancel():
+            with self._lock:
+                self.abandoned += 1
+        else:
+            future.add_done_callback(lambda f: self._handle_late(f, on_late))
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _handle_late(self, future, on_late):
+        """마감 이후 도착한 결과 처리"""
+        saved = False
+        if on_late is not None and not future.cancelled() and future.exception() is None:
+            try:
+                saved = on_late(future.result()) is not False
+            except Exception as e:
+                print(f"늦은 결과 처리 실패: {e}")
+        with self._lock:
+            if saved:
+                self.late_saved += 1
+            else:
+                self.abandoned += 1
+
+    def stats(self):
+        """실행 통계"""
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "late_saved": self.late_saved,
+                "abandoned": self.abandoned,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait=False):
+        """풀 종료"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class DeadlineCall:
+    """DeadlineExecutor.submit 이 돌려주는 결과 핸들"""
+
+    def __init__(self, executor, future, deadline, on_late):
+        self._executor = executor
+        self._future = future
+        self._deadline = deadline
+        self._on_late = on_late
+
+    def result(self):
+        """
+        마감 시간까지 결과를 기다림
+
+        Raises:
+            DeadlineExceeded: 마감 시간 초과
+        """
+        try:
+            result = self._future.result(timeout=max(0.0, self._deadline - time.monotonic()))
+        except FutureTimeoutError:
+            self._executor._expire(self._future, self._on_late)
+            raise DeadlineExceeded("마감 시간을 초과했습니다.")
+        with self._executor._lock:
+            self._executor.completed += 1
+        return result
+
+    def add_done_callback(self, fn):
+        """작업이 끝나거나(마감 이후 포함) 취소되면 fn() 호출"""
+        self._future.add_done_callback(lambda future: fn())
+
+
+def create_executor_from_env(prefix="FORTUNE_LLM", max_workers=8, max_queue=32, timeout=5.0):
+    """
+    환경변수 설정으로 실행기 생성
+
+    {prefix}_TIMEOUT: 마감 시간(초, 기본값 5)
+    {prefix}_POOL_SIZE: 스레드 풀 크기 (기본값 8)
+    {prefix}_MAX_QUEUE: 최대 대기 작업 수 (기본값 32)
+
+    AI 호출은 FORTUNE_LLM_*, 추천 상품 검색은 FORTUNE_PRODUCT_* 를 사용합니다.
+    """
+    return DeadlineExecutor(
+        max_workers=int(os.getenv(f"{prefix}_POOL_SIZE", str(max_workers))),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(max_queue))),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+    )
@@ -2,38 +2,121 @@
 오늘의 운세 웹 애플리케이션
 """
 import os
+import json
+import math
 import random  # random 모듈 추가
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 
-try:
-    from dotenv import load_dotenv
-    # .env 파일 로드 (로컬 개발용)
-    load_dotenv()
-except ImportError:
-    # 배포 환경에서는 dotenv가 없을 수 있음 (무시)
-    pass
+# .env 파일 로드 (로컬 개발용). 파일이 없는 배포 환경에서는 dotenv 를 가져오지 않음
+_env_dirs = (os.path.dirname(os.path.abspath(__file__)), os.getcwd())
+if any(os.path.exists(os.path.join(d, ".env")) for d in _env_dirs):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # 배포 환경에서는 dotenv가 없을 수 있음 (무시)
+        pass
 
-from gemini_client import GeminiClient
+from client_registry import get_client, warm_up_in_background
 from fortune_generator import FortuneGenerator  # 백업용 생성기 추가
+from admission import create_admission_from_env
+from fortune_cache import create_fortune_cache_from_env
+from deadline_executor import DeadlineExceeded, ExecutorBusy, create_executor_from_env
+from llm_router import create_router_from_env
+from fortune_payload import plain_response, structured_response, with_payload
+from fortune_pool import age_bucket, create_pool_from_env, personalize
+from fortune_cache import today_kst
+from fortune_history import create_history_from_env, user_key
+from fortune_prompt import FORTUNE_INSTRUCTIONS, build_fortune_prompt, fortune_date
+from http_session import collect_session_stats
+from product_cache import collect_product_cache_stats
+from prompt_cache import collect_prompt_cache_stats
+from metrics import metrics
+from single_flight import FlightAborted, SingleFlight
+from static_assets import register_assets
+from zodiac import calculate_zodiac
 
 app = Flask(__name__)
 
-# 12띠 정보
-ZODIAC_ANIMALS = {
-    0: {"name": "원숭이", "emoji": "🐵"},
-    1: {"name": "닭", "emoji": "🐔"},
-    2: {"name": "개", "emoji": "🐶"},
-    3: {"name": "돼지", "emoji": "🐷"},
-    4: {"name": "쥐", "emoji": "🐭"},
-    5: {"name": "소", "emoji": "🐮"},
-    6: {"name": "호랑이", "emoji": "🐯"},
-    7: {"name": "토끼", "emoji": "🐰"},
-    8: {"name": "용", "emoji": "🐲"},
-    9: {"name": "뱀", "emoji": "🐍"},
-    10: {"name": "말", "emoji": "🐴"},
-    11: {"name": "양", "emoji": "🐑"}
-}
+# 빌드된 정적 파일 (asset_url() + 미리 압축된 /static/dist/ 제공)
+register_assets(app)
+
+# 사용자별 · 날짜별 운세 캐시 (KST 자정 만료)
+fortune_cache = create_fortune_cache_from_env()
+
+# AI 호출용 스레드 풀 (요청별 마감 시간 적용)
+llm_executor = create_executor_from_env()
+
+# 추천 상품 검색용 작은 풀 (쿠팡이 느려져도 AI 호출 풀을 채우지 않도록 분리, 마감은 AI 와 같음)
+product_executor = create_executor_from_env(
+    "FORTUNE_PRODUCT", max_workers=4, max_queue=16, timeout=llm_executor.timeout
+)
+
+# Gemini / Claude / OpenAI 라우터 (API 키가 설정된 제공자만 사용)
+llm_router = create_router_from_env()
+
+# 미리 생성해 둔 일일 운세 풀 (파일이 없으면 None → 항상 실시간 생성)
+fortune_pool = create_pool_from_env()
+
+# 클라이언트별 요청 제한 + AI 동시 호출 상한 (초과 시 백업 운세로 바로 응답)
+admission = create_admission_from_env()
+
+# AI 스트리밍 전체 마감 시간 (조각이 계속 와도 이 시간이 지나면 백업 운세로 교체)
+stream_timeout = float(os.getenv("FORTUNE_STREAM_TIMEOUT", str(llm_executor.timeout * 3)))
+
+# 같은 사용자의 동시 요청(더블 클릭, 여러 탭)은 AI 호출 한 번으로 병합
+# (기다리는 요청은 가장 긴 AI 마감 시간 + 상품 검색/저장 여유까지만 대기
+#  → leader 는 항상 기다리는 요청보다 먼저 끝나므로 늦게 저장되는 운세와 엇갈리지 않음)
+fortune_flight = SingleFlight(timeout=max(llm_executor.timeout, stream_timeout) + 3)
+
+# 생성한 운세 기록 (FORTUNE_HISTORY_PATH 가 없으면 None → 기록 안 함)
+fortune_history = create_history_from_env()
+
+
+
+def collect_runtime_stats():
+    """/metrics 용 캐시/실행기/라우터 상태 (누적값은 counter, 현재값은 gauge)"""
+    cache = fortune_cache.stats()
+    yield "fortune_cache_hits_total", {}, cache["hits"], "counter"
+    yield "fortune_cache_misses_total", {}, cache["misses"], "counter"
+    executor = llm_executor.stats()
+    yield "llm_executor_in_flight", {}, executor.pop("in_flight")
+    for key, value in executor.items():
+        yield "llm_executor_tasks_total", {"state": key}, value, "counter"
+    executor = product_executor.stats()
+    yield "product_executor_in_flight", {}, executor.pop("in_flight")
+    for key, value in executor.items():
+        yield "product_executor_tasks_total", {"state": key}, value, "counter"
+    router = llm_router.stats()
+    yield "llm_router_hedges_total", {}, router["hedges"], "counter"
+    yield "llm_router_hedge_wins_total", {}, router["hedge_wins"], "counter"
+    yield "llm_router_failovers_total", {}, router["failovers"], "counter"
+    admitted = admission.stats()
+    yield "admission_inflight", {}, admitted["inflight"]
+    yield "admission_max_inflight", {}, admitted["max_inflight"]
+    for key in ("admitted", "shed", "rate_limited"):
+        yield "admission_decisions_total", {"decision": key}, admitted[key], "counter"
+    flight = fortune_flight.stats()
+    yield "fortune_flight_leaders_total", {}, flight["leaders"], "counter"
+    yield "fortune_coalesced_total", {}, flight["coalesced"], "counter"
+    yield "fortune_coalesce_timeouts_total", {}, flight["timeouts"], "counter"
+    if fortune_history is not None:
+        history = fortune_history.stats()
+        yield "fortune_history_queued", {}, history["queued"]
+        for key in ("written", "dropped", "errors"):
+            yield "fortune_history_rows_total", {"state": key}, history[key], "counter"
+
+
+metrics.register_collector(collect_runtime_stats)
+metrics.register_collector(collect_session_stats)
+metrics.register_collector(collect_product_cache_stats)
+metrics.register_collector(collect_prompt_cache_stats)
+
+# 첫 사용자 요청 전에 AI 클라이언트 연결 준비 (선택)
+if os.getenv("FORTUNE_WARMUP", "").lower() in ("1", "true", "yes"):
+    warm_up_in_background(["gemini"])
 
 # 영감을 주는 명언 모음
 QUOTES = [
@@ -55,124 +138,480 @@ QUOTES = [
 ]
 
 
-def calculate_zodiac(birth_year):
+# 명언 전용 난수 생성기 (운세용 난수와 상태를 공유하지 않음)
+_quote_random = random.Random()
+
+
+def get_random_quote():
+    """랜덤 명언 가져오기"""
+    return _quote_random.choice(QUOTES)
+
+
+def build_backup_result(name, zodiac, text, products):
+    """백업 생성기 결과를 응답 형식으로 변환"""
+    metrics.inc("fortune_backup_total")
+    result = {
+        "full_text": text,
+        "name": name,
+        "zodiac": zodiac,
+        "date": fortune_date(),
+        "is_backup": True
+    }
+    # 상품 정보가 있으면 추가
+    if products:
+        result["products"] = products
+    return result
+
+
+def build_error_result(name, zodiac, error):
+    """백업마저 실패했을 때의 최소한의 응답"""
+    return {
+        "full_text": f"운세 생성 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.\n(Error: {str(error)})",
+        "name": name,
+        "zodiac": zodiac,
+        "date": fortune_date(),
+        "error": str(error) # 프론트엔드가 에러로 인식하도록
+    }
+
+
+def generate_backup_fortune(name, birth_date, gender, zodiac, error_msg="Unknown Error"):
+    """AI 호출 실패 시 템플릿 기반 백업 생성기로 운세 생성"""
+    print(f"⚠️ AI 호출 실패 (백업 모드 전환): {error_msg}")
+    try:
+        fortune_gen = FortuneGenerator()
+        age = today_kst().year - birth_date.year
+        backup_response, products = fortune_gen.generate_fortune(name, age, gender, zodiac, birth_date)
+        return build_backup_result(name, zodiac, backup_response, products)
+    except Exception as e:
+        return build_error_result(name, zodiac, e)
+
+
+def lookup_pooled_fortune(name, birth_date, gender, zodiac):
     """
-    생년으로 띠 계산
-    
-    Args:
-        birth_year: 생년 (int)
-        
+    운세 풀에서 띠/성별/연령대에 맞는 운세를 꺼내 이름과 로또 번호를 채움
+
     Returns:
-        dict: 띠 정보 (이름, 이모지)
+        dict: 운세 정보 (풀이 없거나 해당 항목이 없으면 None)
     """
-    zodiac_index = birth_year % 12
-    return ZODIAC_ANIMALS[zodiac_index]
+    if fortune_pool is None:
+        return None
+    age = today_kst().year - birth_date.year
+    try:
+        entry = fortune_pool.get(today_kst(), zodiac['name'], gender, age_bucket(age))
+    except Exception as e:
+        print(f"운세 풀 조회 실패: {e}")
+        return None
+    if entry is None:
+        return None
 
+    text, provider = entry
+    _, lotto_str, _ = FortuneGenerator().pick_lucky_items(name, birth_date, gender)
+    return {
+        "full_text": personalize(text, name, lotto_str),
+        "name": name,
+        "zodiac": zodiac,
+        "date": fortune_date(),
+        "provider": provider,
+        "source": "pool"
+    }
 
-def get_random_quote():
-    """랜덤 명언 가져오기"""
-    return random.choice(QUOTES)
+
+def serve_pooled_fortune(cache_key, name, birth_date, gender, zodiac):
+    """
+    운세 풀에서 찾은 운세에 payload 를 붙여 캐시에 저장하고 기록 (/get_fortune, 스트리밍, ASGI 공통)
+
+    Returns:
+        dict: 운세 정보 (풀이 없거나 해당 항목이 없으면 None → AI 생성)
+    """
+    started = time.perf_counter()
+    with metrics.span("pool"):
+        fortune = lookup_pooled_fortune(name, birth_date, gender, zodiac)
+    if fortune is None:
+        return None
+    with metrics.span("payload"):
+        with_payload(fortune)
+    fortune_cache.set(cache_key, fortune)
+    metrics.inc("fortune_results_total", source=result_source(fortune))
+    record_history(name, birth_date, gender, zodiac, fortune, started)
+    return fortune
+
+
+def start_product_search(fortune_gen, lucky_color):
+    """
+    추천 상품 검색을 상품 전용 실행기에서 시작 (AI 호출과 동시에 진행)
+
+    Returns:
+        function: 결과를 기다리는 함수. AI 마감 시간(시작부터)을 넘기거나 상품 풀이 가득 차면
+            더미 상품을 반환 (늦게 끝난 검색 결과는 상품 캐시에 남아 다음 요청이 사용)
+    """
+    try:
+        call = product_executor.submit(fortune_gen.find_products, lucky_color)
+    except ExecutorBusy:
+        print("추천 상품 검색 대기열 초과 (더미 상품 사용)")
+        call = None
+
+    def result():
+        if call is None:
+            return fortune_gen._get_dummy_products(lucky_color)
+        try:
+            return call.result()
+        except Exception as e:
+            print(f"추천 상품 검색 실패: {e}")
+            return fortune_gen._get_dummy_products(lucky_color)
+
+    return result
 
 
 def generate_fortune(name, birth_date, gender, zodiac):
     """
-    Claude AI를 사용하여 개인화된 운세 생성 (실패 시 백업 생성기 사용)
+    AI 라우터를 사용하여 개인화된 운세 생성 (실패 시 백업 생성기 사용)
+
+    서로 의존하지 않는 작업은 동시에 진행합니다:
+    행운의 색상과 로또 번호를 먼저 로컬에서 정한 뒤, AI 호출과 추천 상품 검색을 함께
+    실행기에서 실행합니다. 둘 다 같은 마감 시간을 가지므로 전체 지연은 합이 아니라
+    max(AI, 상품 검색)이며 마감 시간을 넘지 않습니다.
     """
-    # 기본값: 백업 모드 실행
-    def run_backup_mode(error_msg="Unknown Error"):
-        print(f"⚠️ AI 호출 실패 (백업 모드 전환): {error_msg}")
+    today = fortune_date()
+    fortune_gen = FortuneGenerator()
+    lucky_color, lotto_str, overall = fortune_gen.pick_lucky_items(name, birth_date, gender)
+    prompt = build_fortune_prompt(name, birth_date, gender, zodiac, lucky_color, lotto_str)
+    found = {"products": []}
+
+    def build_result(response, provider):
+        return {
+            "full_text": response,
+            "name": name,
+            "zodiac": zodiac,
+            "date": today,
+            "provider": provider,
+            "products": found["products"]
+        }
+
+    def save_late_response(routed):
+        # 마감 후 도착한 AI 응답은 다음 요청을 위해 캐시에 저장
+        fortune_cache.set(fortune_cache.make_key(name, birth_date, gender), with_payload(build_result(*routed)))
+        return True
+
+    # AI 동시 호출이 상한이면 기다리지 않고 바로 백업 운세 (슬롯은 늦은 응답까지 보유)
+    slot = admission.try_acquire()
+    if slot is None:
+        call, error_msg = None, "Overloaded"
+    else:
         try:
-            fortune_gen = FortuneGenerator()
-            age = datetime.now().year - birth_date.year
-            backup_response, products = fortune_gen.generate_fortune(name, age, gender, zodiac)
-            result = {
-                "full_text": backup_response,
-                "name": name,
-                "zodiac": zodiac,
-                "date": datetime.now().strftime("%Y년 %m월 %d일"),
-                "is_backup": True
-            }
-            # 상품 정보가 있으면 추가
-            if products:
-                result["products"] = products
-            return result
+            # 1차 시도: AI 라우터 (Gemini 우선, 느리면 다른 제공자로 헤징)
+            call = llm_executor.submit(llm_router.generate, prompt, system=FORTUNE_INSTRUCTIONS,
+                                       on_late=save_late_response)
+            call.add_done_callback(lambda: admission.release(slot))
         except Exception as e:
-            # 백업마저 실패하면 정말 최소한의 응답 반환
-            return {
-                "full_text": f"운세 생성 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.\n(Error: {str(e)})",
-                "name": name,
-                "zodiac": zodiac,
-                "date": datetime.now().strftime("%Y년 %m월 %d일"),
-                "error": str(e) # 프론트엔드가 에러로 인식하도록
-            }
-
-    try:
-        # 1차 시도: Google Gemini AI 사용
-        # 타임아웃 처리를 위한 설정
-        import signal
-        
-        def handler(signum, frame):
-            raise TimeoutError("AI Response Timeout")
-            
+            admission.release(slot)
+            call, error_msg = None, str(e)
+
+    # AI 응답을 기다리는 동안 추천 상품 검색 (AI 마감 시간까지만)
+    wait_products = start_product_search(fortune_gen, lucky_color)
+    with metrics.span("products"):
+        found["products"] = wait_products()
+
+    if call is not None:
         try:
-            signal.signal(signal.SIGALRM, handler)
-            signal.alarm(5) # 5초 제한
-        except AttributeError:
-            pass
+            # 마감 시간 초과 시 즉시 백업 모드 (상품 검색 후 남은 대기 시간만 기록)
+            with metrics.span("llm_wait"):
+                response, provider = call.result()
+            return build_result(response, provider)
+        except DeadlineExceeded:
+            error_msg = "AI Response Timeout"
+        except Exception as e:
+            # AllProvidersFailed 등
+            error_msg = str(e)
 
-        gemini_client = GeminiClient()
-        
-        today = datetime.now().strftime("%Y년 %m월 %d일")
-        birth_str = birth_date.strftime("%Y년 %m월 %d일")
-        age = datetime.now().year - birth_date.year
-        
-        prompt = f"""
-당신은 전문 운세 상담가입니다. 다음 정보를 바탕으로 오늘의 운세를 작성해주세요:
+    # 백업 모드: 이미 정한 색상/번호/상품으로 바로 작성
+    print(f"⚠️ AI 호출 실패 (백업 모드 전환): {error_msg}")
+    try:
+        with metrics.span("render"):
+            text, products = fortune_gen.render(lucky_color, lotto_str, overall, found["products"])
+        return build_backup_result(name, zodiac, text, products)
+    except Exception as e:
+        return build_error_result(name, zodiac, e)
 
-- 이름: {name}님
-- 생년월일: {birth_str} (만 {age}세)
-- 성별: {gender}
-- 띠: {zodiac['emoji']} {zodiac['name']}띠
-- 오늘 날짜: {today}
 
-다음 형식으로 운세를 작성해주세요. 순서를 정확히 지켜주세요:
+def generate_coalesced(cache_key, name, birth_date, gender, zodiac):
+    """
+    generate_fortune + 같은 캐시 키의 동시 요청 병합
 
-**오늘의 운세**
-[전체적인 오늘의 운세를 2-3문장으로 구체적이고 긍정적으로 작성]
+    먼저 온 요청(leader)만 AI를 호출하고 payload 를 붙여 캐시에 저장합니다.
+    함께 기다린 요청은 그 결과의 복사본을 받고 (source="coalesced" 로 집계),
+    기다리다 시간이 지나거나 leader 가 실패하면 백업 운세로 응답합니다 (캐시에는 저장하지 않음).
+    """
+    led = []
 
-**행운의 로또 번호**
-[1부터 45까지의 숫자 중 6개를 쉼표로 구분하여 작성. 예: 7, 12, 23, 31, 38, 42]
+    def lead():
+        led.append(True)
+        started = time.perf_counter()
+        fortune = generate_fortune(name, birth_date, gender, zodiac)
+        return finish_generated(cache_key, fortune, name, birth_date, gender, zodiac, started)
 
-**행운의 색상**
-[하나의 색상만 작성. 예: 빨간색, 파란색, 노란색 등]
+    try:
+        fortune = fortune_flight.do(cache_key, lead)
+    except Exception as e:
+        # 대기 시간 초과, leader 중단, leader 가 던진 예외 모두 500 대신 백업 운세로
+        return coalesce_timeout_fortune(name, birth_date, gender, zodiac, e)
+    return fortune if led else coalesced_copy(fortune)
 
-**추천 상품**
-[행운의 색상과 어울리는 구체적인 상품 2-3개를 추천. 예: 빨간색 티셔츠, 빨간색 가방, 빨간색 액세서리]
 
-각 항목을 명확하게 구분하여 작성해주세요.
-"""
-        
-        response = gemini_client.chat(prompt, max_tokens=2048)
-        
-        # 타임아웃 해제
-        try:
-            signal.alarm(0)
-        except AttributeError:
-            pass
-        
-        # AI 응답이 에러 메시지를 포함하는지 확인
-        if "오류 발생" in response:
-            return run_backup_mode(response)
-            
+async def agenerate_coalesced(cache_key, name, birth_date, gender, zodiac):
+    """generate_coalesced 의 비동기 버전 (agenerate_fortune, 같은 이벤트 루프 안에서 병합)"""
+    led = []
+
+    async def lead():
+        led.append(True)
+        started = time.perf_counter()
+        fortune = await agenerate_fortune(name, birth_date, gender, zodiac)
+        return finish_generated(cache_key, fortune, name, birth_date, gender, zodiac, started)
+
+    try:
+        fortune = await fortune_flight.ado(cache_key, lead)
+    except Exception as e:
+        return coalesce_timeout_fortune(name, birth_date, gender, zodiac, e)
+    return fortune if led else coalesced_copy(fortune)
+
+
+def finish_generated(cache_key, fortune, name, birth_date, gender, zodiac, started):
+    """leader 가 새로 만든 운세에 payload 를 붙여 캐시에 저장하고 기록 (생성 1번에 1번만 실행)"""
+    with metrics.span("payload"):
+        with_payload(fortune)
+    fortune_cache.set(cache_key, fortune)
+    metrics.inc("fortune_results_total", source=result_source(fortune))
+    record_history(name, birth_date, gender, zodiac, fortune, started)
+    return fortune
+
+
+def coalesced_copy(fortune):
+    """leader 결과를 함께 받은 요청용 복사본 (명언 등을 덧붙여도 leader 응답에 영향 없음)"""
+    metrics.inc("fortune_results_total", source="coalesced")
+    return dict(fortune)
+
+
+def coalesce_timeout_fortune(name, birth_date, gender, zodiac, error):
+    """leader 를 기다리다 시간 초과(또는 leader 중단/실패) → 백업 운세 (캐시에는 leader 결과만 저장)"""
+    fortune = with_payload(generate_backup_fortune(name, birth_date, gender, zodiac, str(error)))
+    metrics.inc("fortune_results_total", source=result_source(fortune))
+    return fortune
+
+
+async def agenerate_fortune(name, birth_date, gender, zodiac):
+    """
+    generate_fortune 의 비동기 버전 (ASGI 모드용)
+
+    AI 라우터(agenerate: 헤징/장애 전환/서킷 브레이커)와 상품 검색을 동시에 await 하며
+    스레드를 점유하지 않습니다. 마감 시간이 지나면 백업 운세를 반환하고,
+    늦게 도착한 AI 응답은 캐시에 저장합니다.
+    """
+    import asyncio  # ASGI 모드에서만 필요 (WSGI 콜드 스타트에서 제외)
+
+    today = fortune_date()
+    fortune_gen = FortuneGenerator()
+    lucky_color, lotto_str, overall = fortune_gen.pick_lucky_items(name, birth_date, gender)
+    prompt = build_fortune_prompt(name, birth_date, gender, zodiac, lucky_color, lotto_str)
+
+    def build_result(routed, products):
+        response, provider = routed
         return {
             "full_text": response,
             "name": name,
             "zodiac": zodiac,
-            "date": today
+            "date": today,
+            "provider": provider,
+            "products": products
         }
-        
+
+    slot = admission.try_acquire()
+    if slot is not None:
+        llm_task = asyncio.ensure_future(llm_router.agenerate(prompt, system=FORTUNE_INSTRUCTIONS))
+        llm_task.add_done_callback(lambda task: admission.release(slot))
+    products_task = asyncio.ensure_future(fortune_gen.afind_products(lucky_color))
+    deadline = asyncio.get_running_loop().time() + llm_executor.timeout
+
+    def save_late_response(task):
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        def save(done):
+            if done.cancelled() or done.exception() is not None:
+                products = fortune_gen._get_dummy_products(lucky_color)
+            else:
+                products = done.result()
+            fortune_cache.set(
+                fortune_cache.make_key(name, birth_date, gender),
+                with_payload(build_result(task.result(), products))
+            )
+
+        # 상품 검색이 아직 끝나지 않았으면 끝난 뒤에 저장 (늦은 AI 응답을 버리지 않음)
+        products_task.add_done_callback(save)
+
+    try:
+        if slot is None:
+            raise RuntimeError("Overloaded")
+        routed = await asyncio.wait_for(asyncio.shield(llm_task), timeout=llm_executor.timeout)
+        error_msg = None
+    except asyncio.TimeoutError:
+        llm_task.add_done_callback(save_late_response)
+        error_msg = "AI Response Timeout"
+    except Exception as e:
+        error_msg = str(e)
+
+    try:
+        # 추천 상품도 AI 마감 시간까지만 기다림 (늦은 결과는 상품 캐시에 남음)
+        remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+        products = await asyncio.wait_for(asyncio.shield(products_task), timeout=remaining)
+    except asyncio.TimeoutError:
+        products = fortune_gen._get_dummy_products(lucky_color)
+    if error_msg is None:
+        return build_result(routed, products)
+
+    print(f"⚠️ AI 호출 실패 (백업 모드 전환): {error_msg}")
+    try:
+        text, products = fortune_gen.render(lucky_color, lotto_str, overall, products)
+        return build_backup_result(name, zodiac, text, products)
     except Exception as e:
-        return run_backup_mode(str(e))
+        return build_error_result(name, zodiac, e)
+
+
+def generate_fortune_stream(name, birth_date, gender, zodiac, provider="gemini"):
+    """
+    AI 스트리밍으로 운세 생성 (delta/reset 이벤트를 내보내고 최종 운세를 반환)
+
+        fortune = yield from generate_fortune_stream(name, birth_date, gender, zodiac)
+
+    generate_fortune 과 같은 규칙을 따릅니다: 행운의 색상/로또 번호를 먼저 정해 프롬프트에 넣고,
+    추천 상품은 AI 스트림을 읽는 동안 풀에서 검색합니다. 스트림은 실행기에서 읽으므로
+    첫 조각이 마감 시간 안에 오지 않거나, 중간에 멈추거나, 전체가 stream_timeout 안에
+    끝나지 않으면 백업 운세로 교체합니다.
+    """
+    today = fortune_date()
+    fortune_gen = FortuneGenerator()
+    lucky_color, lotto_str, overall = fortune_gen.pick_lucky_items(name, birth_date, gender)
+    prompt = build_fortune_prompt(name, birth_date, gender, zodiac, lucky_color, lotto_str)
+    wait_products = start_product_search(fortune_gen, lucky_color)
+
+    chunks = []
+    error_msg = None
+    with admission.slot() as admitted:
+        if not admitted:
+            error_msg = "Overloaded"
+        else:
+            try:
+                client = get_client(provider)
+                stream = llm_executor.stream(client.stream_chat, prompt, max_tokens=2048,
+                                             system=FORTUNE_INSTRUCTIONS, total_timeout=stream_timeout)
+                for text in stream:
+                    if text.startswith("오류 발생"):
+                        error_msg = text
+                        break
+                    chunks.append(text)
+                    yield sse_event("delta", {"text": text})
+            except DeadlineExceeded:
+                error_msg = "AI Response Timeout"
+            except Exception as e:
+                error_msg = str(e)
+
+    with metrics.span("products"):
+        products = wait_products()
+
+    if error_msg is None and chunks:
+        return {
+            "full_text": "".join(chunks),
+            "name": name,
+            "zodiac": zodiac,
+            "date": today,
+            "provider": provider,
+            "products": products
+        }
+
+    # 같은 스트림 안에서 백업 운세로 교체 (이미 정한 색상/번호/상품 사용)
+    if chunks:
+        yield sse_event("reset", {})
+    print(f"⚠️ AI 호출 실패 (백업 모드 전환): {error_msg or 'Empty Response'}")
+    try:
+        text, products = fortune_gen.render(lucky_color, lotto_str, overall, products)
+        fortune = build_backup_result(name, zodiac, text, products)
+    except Exception as e:
+        fortune = build_error_result(name, zodiac, e)
+    yield sse_event("delta", {"text": fortune["full_text"]})
+    return fortune
+
+
+def stream_fortune_events(name, birth_date, gender, zodiac, provider="gemini", premium=False):
+    """
+    운세를 생성하면서 SSE(server-sent events) 메시지를 순서대로 만들어냅니다.
+
+    /get_fortune 과 같은 순서로 캐시 → 운세 풀(premium 이 아닐 때) → AI 스트리밍을 사용합니다.
+
+    이벤트 종류:
+        meta: 이름, 띠, 날짜, 명언 (가장 먼저 전송)
+        delta: 생성된 텍스트 조각
+        reset: AI 생성이 중간에 실패해 지금까지의 텍스트를 지우라는 신호
+        done: 최종 운세 (full_text, products, is_backup)
+
+    Yields:
+        str: SSE 형식의 메시지
+    """
+    today = fortune_date()
+    yield sse_event("meta", {
+        "name": name,
+        "zodiac": zodiac,
+        "date": today,
+        "quote": get_random_quote()
+    })
+
+    cache_key = fortune_cache.make_key(name, birth_date, gender)
+    fortune = fortune_cache.get(cache_key)
+    if fortune is not None and premium and fortune.get("source") == "pool":
+        fortune = None
+
+    if fortune is None and not premium:
+        fortune = serve_pooled_fortune(cache_key, name, birth_date, gender, zodiac)
+    if fortune is None:
+        fortune = yield from stream_coalesced(cache_key, name, birth_date, gender, zodiac, provider)
+    else:
+        yield sse_event("delta", {"text": fortune["full_text"]})
+
+    # 본문은 이미 delta 로 보냈으므로 구조화된 payload만 전송
+    yield sse_event("done", structured_response(fortune))
+
+
+def stream_coalesced(cache_key, name, birth_date, gender, zodiac, provider="gemini"):
+    """
+    generate_fortune_stream + 같은 캐시 키의 동시 요청 병합 (/get_fortune 과 같은 키)
+
+    먼저 온 요청(leader)만 AI 스트림을 읽어 조각을 보내고 캐시에 저장합니다.
+    함께 기다린 요청은 완성된 운세의 복사본을 한 번에 보냅니다. leader 의 연결이 끊기거나
+    leader 가 실패하거나 기다리다 시간이 지나면 백업 운세로 응답합니다.
+    """
+    call, leader = fortune_flight.claim(cache_key)
+    if not leader:
+        try:
+            fortune = coalesced_copy(fortune_flight.wait(call))
+        except Exception as e:
+            fortune = coalesce_timeout_fortune(name, birth_date, gender, zodiac, e)
+        yield sse_event("delta", {"text": fortune["full_text"]})
+        return fortune
+
+    fortune = None
+    started = time.perf_counter()
+    try:
+        fortune = yield from generate_fortune_stream(name, birth_date, gender, zodiac, provider)
+        finish_generated(cache_key, fortune, name, birth_date, gender, zodiac, started)
+    finally:
+        # 클라이언트가 끊겨 생성기가 닫히면(GeneratorExit) 기다리던 요청은 백업 경로로
+        if fortune is None:
+            fortune_flight.finish(cache_key, call, error=FlightAborted("운세 스트림이 중단되었습니다."))
+        else:
+            fortune_flight.finish(cache_key, call, fortune)
+    return fortune
+
+
+def sse_event(event, data):
+    """SSE 메시지 한 건 작성"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @app.route('/')
@@ -181,42 +620,173 @@ def index():
     return render_template('index.html')
 
 
+def parse_fortune_input(data):
+    """
+    요청 본문에서 이름, 생년월일, 성별 추출 및 검증
+
+    Returns:
+        tuple: (name, birth_date, gender)
+
+    Raises:
+        ValueError: 입력값이 비었거나 날짜 형식이 잘못된 경우 (사용자용 메시지)
+    """
+    data = data or {}
+    name = data.get('name', '').strip()
+    birth_date_str = data.get('birth_date', '')
+    gender = data.get('gender', '')
+    
+    if not all([name, birth_date_str, gender]):
+        raise ValueError("모든 정보를 입력해주세요.")
+    
+    # 생년월일 파싱
+    try:
+        birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("올바른 날짜 형식이 아닙니다.")
+    
+    return name, birth_date, gender
+
+
+def request_client():
+    """요청 제한용 클라이언트 식별자"""
+    return admission.client_key(request.remote_addr, request.headers.get("X-Forwarded-For"))
+
+
+def rate_limited_response(wait):
+    """클라이언트별 요청 한도 초과 (429 + Retry-After)"""
+    response = jsonify({"error": "요청이 너무 많습니다. 잠시 후 다시 시도해주세요."})
+    response.headers["Retry-After"] = str(math.ceil(wait))
+    return response, 429
+
+
+def record_history(name, birth_date, gender, zodiac, fortune, started):
+    """
+    새로 만든 운세를 기록 대기열에 추가 (저장은 백그라운드에서)
+
+    AI 생성 결과는 병합된 요청 수와 관계없이 leader 만 기록합니다 (finish_generated).
+    """
+    if fortune_history is not None:
+        fortune_history.record(name, birth_date, gender, zodiac, fortune, time.perf_counter() - started)
+
+
+def result_source(fortune):
+    """응답 출처 (지표 레이블용): pool / ai / backup / error (병합 대기 요청은 coalesced)"""
+    if "error" in fortune:
+        return "error"
+    if fortune.get("is_backup"):
+        return "backup"
+    return fortune.get("source", "ai")
+
+
 @app.route('/get_fortune', methods=['POST'])
+@metrics.timed("request")
 def get_fortune():
     """운세 생성 API"""
     try:
-        data = request.json
-        
         # 입력 데이터 검증
-        name = data.get('name', '').strip()
-        birth_date_str = data.get('birth_date', '')
-        gender = data.get('gender', '')
-        
-        if not all([name, birth_date_str, gender]):
-            return jsonify({"error": "모든 정보를 입력해주세요."}), 400
-        
-        # 생년월일 파싱
         try:
-            birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d")
-        except ValueError:
-            return jsonify({"error": "올바른 날짜 형식이 아닙니다."}), 400
+            name, birth_date, gender = parse_fortune_input(request.json)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # 띠 계산
         zodiac = calculate_zodiac(birth_date.year)
         
-        # 운세 생성
-        fortune = generate_fortune(name, birth_date, gender, zodiac)
+        # 프리미엄 요청만 실시간 AI 생성, 그 외에는 미리 생성된 운세 풀 사용
+        premium = bool(request.json.get('premium'))
+        
+        # 운세 생성 (같은 날 같은 사용자는 캐시에서 바로 반환)
+        cache_key = fortune_cache.make_key(name, birth_date, gender)
+        with metrics.span("cache"):
+            fortune = fortune_cache.get(cache_key)
+        if fortune is not None and premium and fortune.get("source") == "pool":
+            fortune = None
+        if fortune is not None:
+            metrics.inc("fortune_results_total", source="cache")
+        elif not premium:
+            fortune = serve_pooled_fortune(cache_key, name, birth_date, gender, zodiac)
+        if fortune is None:
+            # AI 생성이 필요한 요청만 클라이언트별 한도 적용
+            wait = admission.check_rate(request_client())
+            if wait:
+                return rate_limited_response(wait)
+            fortune = generate_coalesced(cache_key, name, birth_date, gender, zodiac)
         
-        # 명언 추가
+        # 명언 추가 (캐시 적중 시에도 매번 새로 뽑음)
         quote = get_random_quote()
         fortune['quote'] = quote
         
-        return jsonify(fortune)
+        # "format": "structured" 클라이언트는 파싱된 payload만, 그 외에는 기존 형식
+        with metrics.span("serialize"):
+            if request.json.get('format') == 'structured':
+                return jsonify(structured_response(fortune))
+            return jsonify(plain_response(fortune))
         
     except Exception as e:
         return jsonify({"error": f"오류가 발생했습니다: {str(e)}"}), 500
 
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 텍스트 형식 지표 (단계별 지연, 백업 모드, 제공자 실패 등)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/history', methods=['POST'])
+def fortune_history_page():
+    """지난 운세 기록 (최신순, next_cursor 로 다음 페이지)"""
+    if fortune_history is None:
+        return jsonify({"error": "운세 기록이 설정되지 않았습니다."}), 404
+    try:
+        name, birth_date, gender = parse_fortune_input(request.json)
+        try:
+            limit = int((request.json or {}).get('limit', 20))
+        except (TypeError, ValueError):
+            # null/목록/객체는 int() 가 TypeError 를 던지므로 함께 잡음
+            raise ValueError("limit 은 숫자여야 합니다.")
+        page = fortune_history.query(
+            user=user_key(name, birth_date, gender), limit=limit, cursor=request.json.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 입력한 본인 정보는 다시 보내지 않음
+    for item in page["items"]:
+        for field in ("name", "birth_date", "gender"):
+            item.pop(field)
+    return jsonify(page)
+
+
+@app.route('/stream_fortune', methods=['POST'])
+def stream_fortune():
+    """운세 스트리밍 API (server-sent events)"""
+    try:
+        name, birth_date, gender = parse_fortune_input(request.json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    provider = (request.json or {}).get('provider', 'gemini')
+    if provider not in ('gemini', 'claude'):
+        return jsonify({"error": "지원하지 않는 AI 제공자입니다."}), 400
+
+    # 스트림을 시작한 뒤에는 상태 코드를 바꿀 수 없으므로 캐시 여부와 관계없이 먼저 확인
+    wait = admission.check_rate(request_client())
+    if wait:
+        return rate_limited_response(wait)
+    
+    zodiac = calculate_zodiac(birth_date.year)
+    premium = bool((request.json or {}).get('premium'))
+    events = stream_fortune_events(name, birth_date, gender, zodiac, provider, premium)
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # 프록시 버퍼링 방지
+        }
+    )
+
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🔮 오늘의 운세 웹 애플리케이션 (Google Gemini 2.5 Flash)")
@@ -0,0 +1,324 @@
+"""
+운세 결과 캐시 (사용자별 · 날짜별)
+
+같은 날 같은 이름/생년월일/성별로 다시 요청하면 AI를 다시 호출하지 않고
+저장된 운세를 돌려줍니다. 캐시는 한국 시간(KST) 자정에 만료됩니다.
+
+백엔드별 동작 확인 (Redis 는 가짜 클라이언트): python fortune_cache.py
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+# 한국 표준시 (UTC+9)
+KST = timezone(timedelta(hours=9))
+
+
+def today_kst(now=None):
+    """KST 기준 오늘 날짜(date) 반환"""
+    return (now or datetime.now(KST)).astimezone(KST).date()
+
+
+def seconds_until_midnight_kst(now=None):
+    """KST 자정까지 남은 시간(초)"""
+    now = (now or datetime.now(KST)).astimezone(KST)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=KST)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class MemoryBackend:
+    """프로세스 내 LRU 딕셔너리 백엔드"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """디스크(SQLite) 백엔드 - 워커 프로세스 간 공유 가능"""
+
+    def __init__(self, path="fortune_cache.db", max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.evictions = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fortune_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_fortune_cache_accessed "
+            "ON fortune_cache (accessed_at)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 연결은 스레드 간 공유하지 않음
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM fortune_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM fortune_cache WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE fortune_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO fortune_cache (key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl, now)
+        )
+        # 만료 항목 정리 후 용량 초과분은 오래 안 쓴 순서로 제거
+        conn.execute("DELETE FROM fortune_cache WHERE expires_at <= ?", (now,))
+        count = conn.execute("SELECT COUNT(*) FROM fortune_cache").fetchone()[0]
+        if count > self.max_entries:
+            overflow = count - self.max_entries
+            conn.execute(
+                "DELETE FROM fortune_cache WHERE key IN ("
+                "SELECT key FROM fortune_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+        conn.commit()
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM fortune_cache").fetchone()[0]
+
+
+class RedisBackend:
+    """
+    Redis 프로토콜 백엔드
+
+    get/set(ex=)/scan_iter 를 지원하는 클라이언트라면 무엇이든 사용할 수 있습니다.
+    (redis-py, 테스트용 가짜 클라이언트 등) LRU 정리는 Redis의
+    maxmemory-policy 설정(allkeys-lru)에 맡깁니다.
+    """
+
+    def __init__(self, client=None, url=None, prefix="fortune:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ValueError(
+                    "redis 패키지가 설치되지 않았습니다. "
+                    "pip install redis 후 다시 시도하거나 다른 캐시 백엔드를 사용하세요."
+                )
+            client = redis.Redis.from_url(url or os.getenv("FORTUNE_CACHE_URL", "redis://localhost:6379/0"))
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=int(ttl))
+
+    def __len__(self):
+        # KEYS 는 전체 키를 한 번에 훑는 동안 Redis 를 막으므로 SCAN 으로 나눠서 셈 (점검용)
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+
+class FortuneCache:
+    """운세 결과 캐시 (TTL: KST 자정까지)"""
+
+    def __init__(self, backend=None, backup_ttl=60):
+        """
+        Args:
+            backend: 저장소 백엔드 (기본값: MemoryBackend)
+            backup_ttl: 백업 모드 결과의 보관 시간(초). AI가 복구되면 곧바로 다시 시도하도록 짧게 둡니다.
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.backup_ttl = backup_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(name, birth_date, gender, day=None):
+        """(이름, 생년월일, 성별, KST 날짜)로 캐시 키 생성"""
+        day = day or today_kst()
+        return "|".join([
+            name.strip(),
+            birth_date.strftime("%Y-%m-%d"),
+            gender,
+            day.isoformat()
+        ])
+
+    def get(self, key):
+        """캐시된 운세 조회 (없으면 None)"""
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"캐시 조회 실패: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # 호출 측에서 명언 등을 덧붙이므로 얕은 복사본을 반환
+        return dict(value) if value is not None else None
+
+    def set(self, key, fortune):
+        """운세 저장 (오류 응답은 저장하지 않음)"""
+        if "error" in fortune:
+            return
+        ttl = seconds_until_midnight_kst()
+        value = {k: v for k, v in fortune.items() if k != "quote"}
+        try:
+            if fortune.get("is_backup"):
+                ttl = min(ttl, self.backup_ttl)
+                # 늦게 도착한 AI 운세가 이미 저장돼 있으면 백업 결과로 덮어쓰지 않음
+                existing = self.backend.get(key)
+                if existing is not None and not existing.get("is_backup"):
+                    return
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            print(f"캐시 저장 실패: {e}")
+
+    def stats(self):
+        """적중/실패 통계"""
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+
+
+def create_fortune_cache_from_env():
+    """
+    환경변수 설정으로 캐시 생성
+
+    FORTUNE_CACHE_BACKEND: memory(기본값) | sqlite | redis
+    FORTUNE_CACHE_PATH: SQLite 파일 경로
+    FORTUNE_CACHE_URL: Redis URL
+    FORTUNE_CACHE_MAX_ENTRIES: 최대 항목 수
+    """
+    kind = os.getenv("FORTUNE_CACHE_BACKEND", "memory").lower()
+    max_entries = int(os.getenv("FORTUNE_CACHE_MAX_ENTRIES", "10000"))
+    if kind == "sqlite":
+        backend = SQLiteBackend(os.getenv("FORTUNE_CACHE_PATH", "fortune_cache.db"), max_entries)
+    elif kind == "redis":
+        backend = RedisBackend(url=os.getenv("FORTUNE_CACHE_URL"))
+    else:
+        backend = MemoryBackend(max_entries)
+    return FortuneCache(backend)
+
+
+class _FakeRedis:
+    """main() 점검용 가짜 Redis 클라이언트 (get / set(ex=) / scan_iter 만 흉내)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del self.data[key]  # Redis 처럼 만료된 키는 사라짐
+            entry = None
+        return entry[0].encode("utf-8") if entry is not None else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex if ex else float("inf"))
+
+    def scan_iter(self, match=None, count=None):
+        prefix = (match or "*").rstrip("*")
+        return iter([key for key in self.data if key.startswith(prefix)])
+
+
+def main():
+    """백엔드별(memory, sqlite, 가짜 redis) 저장/조회, 백업 덮어쓰기 방지, 만료 확인"""
+    import tempfile
+    from datetime import date
+
+    ai = {"full_text": "AI 운세", "is_backup": False, "quote": {"text": "명언"}}
+    backup = {"full_text": "백업 운세", "is_backup": True}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            MemoryBackend(),
+            SQLiteBackend(os.path.join(tmp, "cache.db")),
+            RedisBackend(client=_FakeRedis()),
+        ]
+        for backend in backends:
+            cache = FortuneCache(backend, backup_ttl=60)
+            key = cache.make_key("홍길동", date(1990, 5, 1), "남성")
+            assert cache.get(key) is None
+
+            cache.set(key, ai)
+            cached = cache.get(key)
+            assert cached["full_text"] == "AI 운세" and "quote" not in cached, cached
+            cached["quote"] = "다른 명언"  # 복사본이므로 저장된 값은 그대로
+            assert "quote" not in cache.get(key)
+
+            # 늦게 도착한 AI 운세가 있으면 백업 결과로 덮어쓰지 않음
+            cache.set(key, backup)
+            assert cache.get(key)["full_text"] == "AI 운세"
+
+            # 만료된 항목은 없는 것으로 처리
+            backend.set("만료", {"full_text": "어제"}, -1)
+            assert backend.get("만료") is None
+
+            assert len(backend) >= 1
+            print(f"{type(backend).__name__:14s} | 항목 {len(backend)}개 | {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 """
 API 없이 작동하는 운세 생성기
 """
-import random
 from coupang_client import CoupangClient
+from product_cache import get_product_cache
+from fortune_cache import today_kst
+from fortune_rng import FortuneRNG, SLOT_COLOR, SLOT_OVERALL, fortune_seed
+from fortune_template import FORTUNE_LAYOUT, format_product_lines
 
 class FortuneGenerator:
     """운세 템플릿 기반 생성기"""
@@ -78,7 +81,7 @@ class FortuneGenerator:
         "청록색": "청록색 후드티, 청록색 가방, 청록색 운동화"
     }
     
-    def generate_fortune(self, name, age, gender, zodiac):
+    def generate_fortune(self, name, age, gender, zodiac, birth_date=None):
         """
         개인화된 운세 생성
         
@@ -87,112 +90,178 @@ class FortuneGenerator:
             age: 나이
             gender: 성별
             zodiac: 띠 정보
+            birth_date: 생년월일 (있으면 나이 대신 시드에 사용)
             
         Returns:
-            dict: 운세 정보
+            tuple: (운세 텍스트, 상품 정보 리스트)
         """
-        # 이름과 나이를 기반으로 시드 설정 (같은 날 같은 결과)
-        seed = sum(ord(c) for c in name) + age
-        random.seed(seed)
-        
-        # 행운의 색상 선택
-        lucky_color = random.choice(self.LUCKY_COLORS)
+        lucky_color, lotto_str, overall = self.pick_lucky_items(name, birth_date or age, gender)
+        products = self.find_products(lucky_color)
+        return self.render(lucky_color, lotto_str, overall, products)
+    
+    async def agenerate_fortune(self, name, age, gender, zodiac, birth_date=None):
+        """
+        개인화된 운세 생성 (비동기 버전, 상품 검색을 await)
         
-        # 행운의 로또 번호 6개 생성 (1~45 중복 없이)
-        lotto_numbers = sorted(random.sample(range(1, 46), 6))
-        lotto_str = ", ".join(map(str, lotto_numbers))
+        Returns:
+            tuple: (운세 텍스트, 상품 정보 리스트)
+        """
+        lucky_color, lotto_str, overall = self.pick_lucky_items(name, birth_date or age, gender)
+        products = await self.afind_products(lucky_color)
+        return self.render(lucky_color, lotto_str, overall, products)
+    
+    def find_products(self, lucky_color):
+        """
+        행운의 색상에 어울리는 추천 상품 검색
         
-        # 쿠팡 API로 실제 상품 검색 시도
+        Returns:
+            list: 쿠팡 상품 정보 (실패 시 더미 상품)
+        """
+        # 쿠팡 API로 실제 상품 검색 시도 (검색어별 캐시 사용)
         products = []
         try:
-            coupang = CoupangClient()
-            products = coupang.search_by_color(lucky_color, limit=3)
+            keyword = CoupangClient().color_keyword(lucky_color)
+            products = get_product_cache().get(keyword, limit=3)
         except Exception as e:
             print(f"쿠팡 상품 검색 실패: {e}")
         
         # API 실패 시 더미 상품 데이터 생성 (테스트용)
-        if not products:
-            products = self._get_dummy_products(lucky_color)
+        return products or self._get_dummy_products(lucky_color)
+    
+    async def afind_products(self, lucky_color):
+        """find_products 의 비동기 버전"""
+        products = []
+        try:
+            keyword = CoupangClient().color_keyword(lucky_color)
+            products = await get_product_cache().aget(keyword, limit=3)
+        except Exception as e:
+            print(f"쿠팡 상품 검색 실패: {e}")
+        
+        return products or self._get_dummy_products(lucky_color)
+    
+    def pick_lucky_items(self, name, birth, gender=None, day=None):
+        """
+        행운의 색상, 로또 번호, 전체운 문장 선택
+        
+        (이름, 생년월일, 성별, 날짜)로 만든 요청별 난수를 사용하므로
+        같은 날 같은 사용자는 항상 같은 결과를 받고, 전역 random 상태는 건드리지 않습니다.
+        
+        Args:
+            name: 이름
+            birth: 생년월일(date/datetime) 또는 나이(int)
+            gender: 성별
+            day: 날짜 (기본값: KST 오늘)
+        """
+        rng = FortuneRNG(fortune_seed(name, birth, gender, day or today_kst()))
+        
+        # 행운의 색상 선택
+        lucky_color = rng.choice(self.LUCKY_COLORS, SLOT_COLOR)
         
-        # 상품 정보 포맷팅 (텍스트용)
+        # 행운의 로또 번호 6개 생성 (1~45 중복 없이)
+        lotto_str = ", ".join(map(str, rng.lotto()))
+        
+        overall = rng.choice(self.OVERALL_FORTUNES, SLOT_OVERALL)
+        return lucky_color, lotto_str, overall
+    
+    def render(self, lucky_color, lotto_str, overall, products):
+        """운세 텍스트 작성 (컴파일된 레이아웃에 사용자별 값만 채움)"""
+        # 상품 정보 포맷팅 (텍스트용) - 같은 상품 목록이면 색상별로 한 번만 포맷
         if products:
-            product_recommendation = "\n".join([
-                f"- {p['name']} ({p['price']:,}원)" for p in products
-            ])
+            cached = _product_blocks.get(lucky_color)
+            if cached is not None and cached[0] is products:
+                product_recommendation = cached[1]
+            else:
+                product_recommendation = format_product_lines(products)
+                _product_blocks[lucky_color] = (products, product_recommendation)
         else:
             # 최후의 수단: 기본 텍스트
             product_recommendation = self.COLOR_PRODUCTS.get(lucky_color, "해당 색상의 액세서리나 의류")
         
-        fortune_text = f"""**오늘의 운세**
-{random.choice(self.OVERALL_FORTUNES)}
-
-**행운의 로또 번호**
-{lotto_str}
-
-**행운의 색상**
-{lucky_color}
-
-**추천 상품**
-{product_recommendation}
-"""
+        fortune_text = FORTUNE_LAYOUT.render(
+            overall=overall, lotto=lotto_str, color=lucky_color, products=product_recommendation
+        )
         
         return fortune_text, products  # 상품 정보도 함께 반환
     
     def _get_zodiac_fortune(self, zodiac_name):
         """띠별 특별 운세"""
-        zodiac_fortunes = {
-            "쥐": "지혜롭고 민첩한 성격이 빛을 발할 것입니다. 오늘은 기회를 포착하는 능력이 뛰어난 날입니다.",
-            "소": "성실함과 끈기가 인정받는 날입니다. 꾸준한 노력이 결실을 맺을 것입니다.",
-            "호랑이": "용기와 자신감이 넘치는 하루입니다. 리더십을 발휘할 기회가 찾아올 것입니다.",
-            "토끼": "온화하고 세심한 당신의 장점이 빛나는 날입니다. 주변 사람들과의 조화가 중요합니다.",
-            "용": "카리스마와 추진력이 강해지는 날입니다. 큰 목표를 향해 나아가기 좋은 시기입니다.",
-            "뱀": "지혜와 직관력이 뛰어난 날입니다. 중요한 결정을 내리기에 좋은 시기입니다.",
-            "말": "활발하고 긍정적인 에너지가 넘치는 날입니다. 새로운 도전을 시작하기 좋습니다.",
-            "양": "예술적 감각과 창의력이 돋보이는 날입니다. 평화로운 하루를 보내세요.",
-            "원숭이": "재치와 유머 감각이 빛나는 날입니다. 사교적인 활동이 행운을 가져다줄 것입니다.",
-            "닭": "계획성과 조직력이 뛰어난 날입니다. 체계적으로 일을 처리하면 좋은 결과를 얻을 것입니다.",
-            "개": "충직하고 성실한 당신의 모습이 신뢰를 받는 날입니다. 진심이 통하는 하루가 될 것입니다.",
-            "돼지": "관대하고 낙천적인 성격이 행운을 부릅니다. 여유로운 마음가짐이 좋은 기회를 가져다줄 것입니다."
-        }
-        
-        return zodiac_fortunes.get(zodiac_name, "오늘은 특별히 행운이 따르는 날입니다. 긍정적인 마음으로 하루를 보내세요.")
+        return ZODIAC_FORTUNES.get(zodiac_name, DEFAULT_ZODIAC_FORTUNE)
     
     def _get_dummy_products(self, color):
-        """테스트용 더미 상품 데이터 생성"""
-        dummy_products = {
-            "빨간색": [
-                {"name": f"{color} 기본 티셔츠", "price": 19900, "image": "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Tee", "link": "#", "rating": 4.5, "reviews": 123},
-                {"name": f"{color} 캐주얼 가방", "price": 39000, "image": "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Bag", "link": "#", "rating": 4.3, "reviews": 87},
-                {"name": f"{color} 스니커즈", "price": 89000, "image": "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Shoes", "link": "#", "rating": 4.7, "reviews": 256}
-            ],
-            "파란색": [
-                {"name": f"{color} 후드티", "price": 45000, "image": "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Hoodie", "link": "#", "rating": 4.6, "reviews": 198},
-                {"name": f"{color} 운동화", "price": 129000, "image": "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Shoes", "link": "#", "rating": 4.8, "reviews": 342},
-                {"name": f"{color} 시계", "price": 159000, "image": "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Watch", "link": "#", "rating": 4.4, "reviews": 156}
-            ],
-            "노란색": [
-                {"name": f"{color} 스카프", "price": 25000, "image": "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Scarf", "link": "#", "rating": 4.2, "reviews": 94},
-                {"name": f"{color} 지갑", "price": 59000, "image": "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Wallet", "link": "#", "rating": 4.5, "reviews": 178},
-                {"name": f"{color} 케이스", "price": 15000, "image": "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Case", "link": "#", "rating": 4.3, "reviews": 67}
-            ],
-            "초록색": [
-                {"name": f"{color} 후드티", "price": 42000, "image": "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Hoodie", "link": "#", "rating": 4.5, "reviews": 145},
-                {"name": f"{color} 가방", "price": 68000, "image": "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Bag", "link": "#", "rating": 4.4, "reviews": 112},
-                {"name": f"{color} 모자", "price": 28000, "image": "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Cap", "link": "#", "rating": 4.6, "reviews": 203}
-            ],
-            "보라색": [
-                {"name": f"{color} 스웨터", "price": 89000, "image": "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Sweater", "link": "#", "rating": 4.7, "reviews": 234},
-                {"name": f"{color} 액세서리", "price": 35000, "image": "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Accessory", "link": "#", "rating": 4.3, "reviews": 98},
-                {"name": f"{color} 양말", "price": 12000, "image": "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Socks", "link": "#", "rating": 4.4, "reviews": 156}
-            ]
-        }
-        
-        # 기본 더미 상품 (색상별 매칭이 안 될 경우)
-        default_products = [
-            {"name": f"{color} 기본 상품 1", "price": 30000, "image": "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+1", "link": "#", "rating": 4.5, "reviews": 100},
-            {"name": f"{color} 기본 상품 2", "price": 50000, "image": "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+2", "link": "#", "rating": 4.3, "reviews": 80},
-            {"name": f"{color} 기본 상품 3", "price": 70000, "image": "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+3", "link": "#", "rating": 4.6, "reviews": 120}
-        ]
+        """
+        테스트용 더미 상품 데이터
         
-        return dummy_products.get(color, default_products)
+        행운의 색상 목록에 있는 색상은 import 시 만들어 둔 목록을 공유하므로 수정하지 마세요.
+        """
+        products = DUMMY_PRODUCTS.get(color)
+        return products if products is not None else _build_dummy_products(color)
+
+
+# 띠별 특별 운세 (import 시 한 번만 생성)
+ZODIAC_FORTUNES = {
+    "쥐": "지혜롭고 민첩한 성격이 빛을 발할 것입니다. 오늘은 기회를 포착하는 능력이 뛰어난 날입니다.",
+    "소": "성실함과 끈기가 인정받는 날입니다. 꾸준한 노력이 결실을 맺을 것입니다.",
+    "호랑이": "용기와 자신감이 넘치는 하루입니다. 리더십을 발휘할 기회가 찾아올 것입니다.",
+    "토끼": "온화하고 세심한 당신의 장점이 빛나는 날입니다. 주변 사람들과의 조화가 중요합니다.",
+    "용": "카리스마와 추진력이 강해지는 날입니다. 큰 목표를 향해 나아가기 좋은 시기입니다.",
+    "뱀": "지혜와 직관력이 뛰어난 날입니다. 중요한 결정을 내리기에 좋은 시기입니다.",
+    "말": "활발하고 긍정적인 에너지가 넘치는 날입니다. 새로운 도전을 시작하기 좋습니다.",
+    "양": "예술적 감각과 창의력이 돋보이는 날입니다. 평화로운 하루를 보내세요.",
+    "원숭이": "재치와 유머 감각이 빛나는 날입니다. 사교적인 활동이 행운을 가져다줄 것입니다.",
+    "닭": "계획성과 조직력이 뛰어난 날입니다. 체계적으로 일을 처리하면 좋은 결과를 얻을 것입니다.",
+    "개": "충직하고 성실한 당신의 모습이 신뢰를 받는 날입니다. 진심이 통하는 하루가 될 것입니다.",
+    "돼지": "관대하고 낙천적인 성격이 행운을 부릅니다. 여유로운 마음가짐이 좋은 기회를 가져다줄 것입니다."
+}
+
+DEFAULT_ZODIAC_FORTUNE = "오늘은 특별히 행운이 따르는 날입니다. 긍정적인 마음으로 하루를 보내세요."
+
+# 테스트용 더미 상품: (이름, 가격, 이미지, 평점, 리뷰 수), 이름 앞에 색상이 붙음
+DUMMY_PRODUCT_SPECS = {
+    "빨간색": (
+        ("기본 티셔츠", 19900, "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Tee", 4.5, 123),
+        ("캐주얼 가방", 39000, "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Bag", 4.3, 87),
+        ("스니커즈", 89000, "https://via.placeholder.com/200x200/FF0000/FFFFFF?text=Red+Shoes", 4.7, 256),
+    ),
+    "파란색": (
+        ("후드티", 45000, "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Hoodie", 4.6, 198),
+        ("운동화", 129000, "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Shoes", 4.8, 342),
+        ("시계", 159000, "https://via.placeholder.com/200x200/0000FF/FFFFFF?text=Blue+Watch", 4.4, 156),
+    ),
+    "노란색": (
+        ("스카프", 25000, "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Scarf", 4.2, 94),
+        ("지갑", 59000, "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Wallet", 4.5, 178),
+        ("케이스", 15000, "https://via.placeholder.com/200x200/FFFF00/000000?text=Yellow+Case", 4.3, 67),
+    ),
+    "초록색": (
+        ("후드티", 42000, "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Hoodie", 4.5, 145),
+        ("가방", 68000, "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Bag", 4.4, 112),
+        ("모자", 28000, "https://via.placeholder.com/200x200/00FF00/000000?text=Green+Cap", 4.6, 203),
+    ),
+    "보라색": (
+        ("스웨터", 89000, "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Sweater", 4.7, 234),
+        ("액세서리", 35000, "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Accessory", 4.3, 98),
+        ("양말", 12000, "https://via.placeholder.com/200x200/800080/FFFFFF?text=Purple+Socks", 4.4, 156),
+    ),
+}
+
+# 기본 더미 상품 (색상별 매칭이 안 될 경우)
+DEFAULT_DUMMY_SPECS = (
+    ("기본 상품 1", 30000, "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+1", 4.5, 100),
+    ("기본 상품 2", 50000, "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+2", 4.3, 80),
+    ("기본 상품 3", 70000, "https://via.placeholder.com/200x200/CCCCCC/666666?text=Product+3", 4.6, 120),
+)
+
+
+def _build_dummy_products(color):
+    """색상 이름을 붙인 더미 상품 목록 생성"""
+    specs = DUMMY_PRODUCT_SPECS.get(color, DEFAULT_DUMMY_SPECS)
+    return [
+        {"name": f"{color} {name}", "price": price, "image": image, "link": "#", "rating": rating, "reviews": reviews}
+        for name, price, image, rating, reviews in specs
+    ]
+
+
+DUMMY_PRODUCTS = {color: _build_dummy_products(color) for color in FortuneGenerator.LUCKY_COLORS}
 
+# 색상별로 마지막에 포맷한 상품 목록: (상품 목록, 텍스트)
+_product_blocks = {}
@@ -0,0 +1,291 @@
+"""
+생성한 운세 기록 (추가 전용 SQLite 저장소)
+
+응답을 보내고 나면 사라지던 운세를 입력값, 제공자, 생성 시간, 백업 여부와 함께 남겨
+"어제의 운세" 조회나 제공자별 품질/지연 분석에 사용합니다.
+
+    - 저장은 백그라운드 스레드가 모아서 한 트랜잭션으로 기록하므로 요청 지연에 영향이 없음
+      (대기열이 가득 차면 기다리지 않고 버리고 dropped 로 집계)
+    - 수정/삭제 없이 추가만 함 (WAL 모드라 기록 중에도 조회가 막히지 않음)
+    - (사용자, 날짜), (띠, 날짜) 인덱스 + keyset 페이지네이션 (OFFSET 없이 커서 다음부터 조회)
+
+FORTUNE_HISTORY_PATH 를 설정해야 기록합니다 (서버리스 환경은 파일 시스템이 읽기 전용).
+
+조회:
+    python fortune_history.py --zodiac 쥐 --from 2026-10-01
+"""
+import base64
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from fortune_cache import today_kst
+
+MAX_PAGE_SIZE = 100
+
+
+def user_key(name, birth_date, gender):
+    """사용자 식별 키 (이름, 생년월일, 성별 해시 - 인덱스를 작게 유지)"""
+    raw = "|".join([name.strip(), birth_date.strftime("%Y-%m-%d"), gender])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def encode_cursor(day, row_id):
+    """마지막으로 받은 항목의 (날짜, id) → 다음 페이지 커서"""
+    return base64.urlsafe_b64encode(f"{day}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Raises:
+        ValueError: 잘못된 커서
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, row_id = raw.split("|")
+        return day, int(row_id)
+    except Exception:
+        raise ValueError("잘못된 커서입니다.")
+
+
+class FortuneHistory:
+    """운세 기록 저장소 (백그라운드 일괄 기록)"""
+
+    def __init__(self, path="fortune_history.db", batch_size=200, linger=0.2, max_queue=10000):
+        """
+        Args:
+            path: SQLite 파일 경로
+            batch_size: 한 트랜잭션에 기록할 최대 건수
+            linger: 첫 항목이 들어온 뒤 더 모으기 위해 기다리는 시간(초)
+            max_queue: 기록 대기열 크기 (가득 차면 새 항목을 버림)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        # 통계
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.batches = 0
+
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fortune_history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_key TEXT NOT NULL, day TEXT NOT NULL, "
+            "name TEXT NOT NULL, birth_date TEXT NOT NULL, gender TEXT NOT NULL, zodiac TEXT NOT NULL, "
+            "provider TEXT, source TEXT NOT NULL, is_backup INTEGER NOT NULL, latency_ms REAL, "
+            "full_text TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        # 인덱스 끝에 rowid(id)가 붙으므로 (day DESC, id DESC) 정렬도 인덱스만으로 처리
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user_day ON fortune_history (user_key, day)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_history_zodiac_day ON fortune_history (zodiac, day)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, name, birth_date, gender, zodiac, fortune, latency=None, day=None):
+        """
+        운세 한 건 기록 예약 (즉시 반환, 오류 응답은 기록하지 않음)
+
+        Args:
+            zodiac: 띠 정보 (name, emoji)
+            fortune: 응답 dict (full_text, provider, is_backup, source)
+            latency: 생성에 걸린 시간(초)
+        """
+        if "error" in fortune or not fortune.get("full_text"):
+            return
+        row = (
+            user_key(name, birth_date, gender),
+            (day or today_kst()).isoformat(),
+            name.strip(),
+            birth_date.strftime("%Y-%m-%d"),
+            gender,
+            zodiac["name"],
+            fortune.get("provider"),
+            "backup" if fortune.get("is_backup") else fortune.get("source", "ai"),
+            1 if fortune.get("is_backup") else 0,
+            None if latency is None else round(latency * 1000, 1),
+            fortune["full_text"],
+            time.time(),
+        )
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    thread = threading.Thread(target=self._run, name="fortune-history", daemon=True)
+                    thread.start()
+                    self._writer = thread
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, rows):
+        conn = self._conn()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO fortune_history (user_key, day, name, birth_date, gender, zodiac, provider, "
+                    "source, is_backup, latency_ms, full_text, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"운세 기록 저장 실패 ({len(rows)}건): {e}")
+            return
+        with self._lock:
+            self.written += len(rows)
+            self.batches += 1
+
+    def flush(self, timeout=5.0):
+        """대기 중인 기록을 모두 저장할 때까지 대기 (종료 직전, 점검용)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def query(self, user=None, zodiac=None, day_from=None, day_to=None, limit=20, cursor=None):
+        """
+        최신순 기록 조회 (keyset 페이지네이션)
+
+        Args:
+            user: user_key() 값
+            zodiac: 띠 이름
+            day_from, day_to: 날짜 범위 (date, 양 끝 포함)
+            limit: 페이지 크기 (최대 MAX_PAGE_SIZE)
+            cursor: 이전 페이지의 next_cursor
+
+        Returns:
+            dict: {"items": [...], "next_cursor": 다음 페이지 커서 또는 None}
+
+        Raises:
+            ValueError: 잘못된 커서
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where, params = [], []
+        if user is not None:
+            where.append("user_key = ?")
+            params.append(user)
+        if zodiac is not None:
+            where.append("zodiac = ?")
+            params.append(zodiac)
+        if day_from is not None:
+            where.append("day >= ?")
+            params.append(day_from.isoformat())
+        if day_to is not None:
+            where.append("day <= ?")
+            params.append(day_to.isoformat())
+        if cursor:
+            day, row_id = decode_cursor(cursor)
+            where.append("(day < ? OR (day = ? AND id < ?))")
+            params.extend([day, day, row_id])
+
+        sql = (
+            "SELECT id, day, name, birth_date, gender, zodiac, provider, source, is_backup, latency_ms, "
+            "full_text, created_at FROM fortune_history"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY day DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(sql, params + [limit + 1]).fetchall()
+
+        items = [
+            {
+                "id": row[0], "date": row[1], "name": row[2], "birth_date": row[3], "gender": row[4],
+                "zodiac": row[5], "provider": row[6], "source": row[7], "is_backup": bool(row[8]),
+                "latency_ms": row[9], "full_text": row[10], "created_at": row[11],
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = encode_cursor(items[-1]["date"], items[-1]["id"]) if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def stats(self):
+        """기록 통계"""
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "batches": self.batches,
+            }
+
+
+def create_history_from_env():
+    """FORTUNE_HISTORY_PATH 가 설정돼 있으면 기록 저장소를 열고, 없으면 None (기록 안 함)"""
+    path = os.getenv("FORTUNE_HISTORY_PATH")
+    if not path:
+        return None
+    return FortuneHistory(path)
+
+
+def main():
+    """기록 조회 (띠/날짜별)"""
+    import argparse
+    from datetime import date
+
+    parser = argparse.ArgumentParser(description="운세 기록 조회")
+    parser.add_argument("--path", default=os.getenv("FORTUNE_HISTORY_PATH", "fortune_history.db"))
+    parser.add_argument("--zodiac", help="띠 이름 (예: 쥐)")
+    parser.add_argument("--from", dest="day_from", help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="day_to", help="끝 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cursor", help="이전 조회의 다음 페이지 커서")
+    args = parser.parse_args()
+
+    history = FortuneHistory(args.path)
+    page = history.query(
+        zodiac=args.zodiac,
+        day_from=date.fromisoformat(args.day_from) if args.day_from else None,
+        day_to=date.fromisoformat(args.day_to) if args.day_to else None,
+        limit=args.limit,
+        cursor=args.cursor,
+    )
+    for item in page["items"]:
+        backup = " (백업)" if item["is_backup"] else ""
+        print(f"{item['date']} {item['zodiac']}띠 {item['gender']} {item['provider'] or '-'}{backup} "
+              f"{item['latency_ms'] or 0:.0f}ms | {item['full_text'][:40].replace(chr(10), ' ')}")
+    if page["next_cursor"]:
+        print(f"\n다음 페이지: --cursor {page['next_cursor']}")
+    print(json.dumps(history.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
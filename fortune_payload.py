@@ -0,0 +1,146 @@
+"""
+구조화된 운세 응답 (payload)
+
+AI나 템플릿이 만든 마크다운 운세 텍스트를 서버에서 한 번만 파싱해
+섹션 목록, 로또 번호(정수), 행운의 색상, 추천 상품으로 나눠 둡니다.
+결과는 운세와 함께 캐시되므로 캐시 적중 시에는 다시 파싱하지 않고,
+브라우저는 정규식 변환 없이 바로 DOM을 만들 수 있습니다.
+/get_fortune 에 "format": "structured" 를 보내면 full_text/products 없이 payload만,
+보내지 않으면 기존 형식(full_text + products)만 받습니다.
+
+형식 (PAYLOAD_VERSION = 1):
+    {
+        "version": 1,
+        "sections": [{"title": "오늘의 운세", "body": "..."}, ...],
+        "lotto": [3, 11, 19, 27, 35, 42],
+        "lucky_color": "빨간색",
+        "products": [{"name": ..., "price": ..., ...}, ...]
+    }
+
+응답 크기 비교: python fortune_payload.py
+"""
+import re
+
+PAYLOAD_VERSION = 1
+
+_SECTION_TITLE = re.compile(r"\*\*([^*]+)\*\*")
+_NUMBER = re.compile(r"\d+")
+
+
+def parse_sections(text):
+    """
+    "**제목**" 단위로 본문을 나눔
+
+    첫 제목 앞에 글이 있으면 제목이 빈 섹션으로 넣습니다.
+
+    Returns:
+        list: [{"title": 제목, "body": 본문}, ...]
+    """
+    parts = _SECTION_TITLE.split(text or "")
+    sections = []
+    intro = parts[0].strip()
+    if intro:
+        sections.append({"title": "", "body": intro})
+    for i in range(1, len(parts), 2):
+        sections.append({"title": parts[i].strip(), "body": parts[i + 1].strip()})
+    return sections
+
+
+def find_lotto(sections):
+    """"로또" 섹션에서 1~45 사이 번호 최대 6개 (없으면 빈 리스트)"""
+    for section in sections:
+        if "로또" in section["title"]:
+            numbers = [int(n) for n in _NUMBER.findall(section["body"])]
+            return [n for n in numbers if 1 <= n <= 45][:6]
+    return []
+
+
+def find_lucky_color(sections):
+    """"색상" 섹션의 첫 줄 (없으면 None)"""
+    for section in sections:
+        if "색상" in section["title"] and section["body"]:
+            return section["body"].splitlines()[0].strip(" -*")
+    return None
+
+
+def build_payload(text, products=None):
+    """운세 텍스트와 추천 상품으로 payload 생성"""
+    sections = parse_sections(text)
+    return {
+        "version": PAYLOAD_VERSION,
+        "sections": sections,
+        "lotto": find_lotto(sections),
+        "lucky_color": find_lucky_color(sections),
+        "products": products or [],
+    }
+
+
+def with_payload(fortune):
+    """
+    운세 응답에 payload를 붙여 반환 (이미 현재 버전이 있으면 그대로)
+
+    오류 응답은 건드리지 않습니다.
+
+    Args:
+        fortune: full_text 가 들어 있는 운세 응답 dict (제자리에서 수정)
+    """
+    if "error" in fortune:
+        return fortune
+    payload = fortune.get("payload")
+    if payload is not None and payload.get("version") == PAYLOAD_VERSION:
+        return fortune
+    fortune["payload"] = build_payload(fortune.get("full_text", ""), fortune.get("products"))
+    return fortune
+
+
+def structured_response(fortune):
+    """
+    payload만 쓰는 클라이언트용 응답 (full_text 제외한 얕은 복사본)
+
+    캐시에 있는 원본은 스트리밍 등에서 full_text 가 필요하므로 건드리지 않습니다.
+    """
+    response = dict(with_payload(fortune))
+    if "payload" in response:
+        response.pop("full_text", None)
+        response.pop("products", None)
+    return response
+
+
+def plain_response(fortune):
+    """기존 형식(full_text + products) 응답 (payload 제외한 얕은 복사본)"""
+    response = dict(fortune)
+    response.pop("payload", None)
+    return response
+
+
+def main():
+    """기존 응답(full_text + products)과 payload 응답의 크기/파싱 시간 비교"""
+    import gzip
+    import json
+    import time
+    from datetime import date
+
+    from fortune_generator import FortuneGenerator
+
+    generator = FortuneGenerator()
+    color, lotto, overall = generator.pick_lucky_items("홍길동", date(1990, 5, 1), "남성")
+    text, products = generator.render(color, lotto, overall, generator._get_dummy_products(color))
+    base = {"full_text": text, "name": "홍길동", "zodiac": {"name": "말", "emoji": "🐴"},
+            "date": "2026년 01월 01일", "is_backup": True}
+
+    legacy = plain_response(with_payload(dict(base, products=products)))
+    structured = structured_response(dict(base, products=products))
+
+    for label, response in (("기존 (full_text + products)", legacy), ("payload (format=structured)", structured)):
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        print(f"{label:28s} | {len(body):5d}B | gzip {len(gzip.compress(body)):5d}B")
+
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        build_payload(text, products)
+    print(f"서버 파싱 1건당 {(time.perf_counter() - start) / n * 1e6:.1f}µs (캐시 적중 시 0)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+미리 생성해 두는 일일 운세 풀
+
+운세 프롬프트에서 실제로 결과를 바꾸는 입력은 띠(12), 성별(2), 연령대, 날짜뿐입니다.
+매일 밤 이 조합 전체에 대해 AI 운세를 한 번씩 생성해 SQLite 파일에 저장해 두면,
+요청 시에는 이름과 로또 번호만 채워 넣어 AI 호출 없이 바로 응답할 수 있습니다.
+
+배치 실행 (중단 후 다시 실행하면 빠진 항목만 생성):
+    python fortune_pool.py --date 2026-10-19 --concurrency 4 --rpm 60
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from fortune_cache import today_kst
+from zodiac import ZODIAC_ANIMALS
+
+GENDERS = ("남성", "여성")
+AGE_BUCKETS = (1, 2, 3, 4, 5, 6)  # 10대 이하 ~ 60대 이상
+
+# AI가 이름 대신 적도록 요청하는 자리표시자
+NAME_PLACEHOLDER = "{name}"
+
+
+def age_bucket(age):
+    """나이 -> 연령대 (1: 10대 이하, ..., 6: 60대 이상)"""
+    return min(max(age // 10, 1), 6)
+
+
+def age_label(bucket):
+    if bucket == 1:
+        return "10대 이하"
+    if bucket == 6:
+        return "60대 이상"
+    return f"{bucket * 10}대"
+
+
+def build_pool_prompt(zodiac, gender, bucket, day):
+    """풀 항목 생성용 프롬프트 (개인 정보 없이 띠/성별/연령대만 사용)"""
+    return f"""
+당신은 전문 운세 상담가입니다. 다음 조건에 해당하는 사람에게 보여줄 오늘의 운세를 작성해주세요:
+
+- 띠: {zodiac['emoji']} {zodiac['name']}띠
+- 성별: {gender}
+- 연령대: {age_label(bucket)}
+- 오늘 날짜: {day.strftime("%Y년 %m월 %d일")}
+
+사람 이름이 들어갈 자리는 반드시 {NAME_PLACEHOLDER} 로 적어주세요. (예: {NAME_PLACEHOLDER}님)
+
+다음 형식으로 운세를 작성해주세요. 순서를 정확히 지켜주세요:
+
+**오늘의 운세**
+[전체적인 오늘의 운세를 2-3문장으로 구체적이고 긍정적으로 작성]
+
+**행운의 색상**
+[하나의 색상만 작성. 예: 빨간색, 파란색, 노란색 등]
+
+**추천 상품**
+[행운의 색상과 어울리는 구체적인 상품 2-3개를 추천. 예: 빨간색 티셔츠, 빨간색 가방, 빨간색 액세서리]
+
+각 항목을 명확하게 구분하여 작성해주세요.
+"""
+
+
+def personalize(text, name, lotto_str):
+    """풀 항목에 이름과 로또 번호 채워 넣기"""
+    text = text.replace(NAME_PLACEHOLDER, name)
+    lotto_section = f"**행운의 로또 번호**\n{lotto_str}\n\n"
+    index = text.find("**행운의 색상**")
+    if index == -1:
+        return text.rstrip() + "\n\n" + lotto_section
+    return text[:index] + lotto_section + text[index:]
+
+
+class RateLimiter:
+    """분당 호출 수 제한 (여러 스레드에서 공유)"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FortunePool:
+    """(날짜, 띠, 성별, 연령대)로 색인된 운세 풀 파일"""
+
+    def __init__(self, path="fortune_pool.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fortune_pool ("
+            "day TEXT NOT NULL, zodiac TEXT NOT NULL, gender TEXT NOT NULL, "
+            "age_bucket INTEGER NOT NULL, text TEXT NOT NULL, provider TEXT, "
+            "created_at REAL NOT NULL, "
+            "PRIMARY KEY (day, zodiac, gender, age_bucket)) WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, day, zodiac_name, gender, bucket):
+        """
+        풀 항목 조회
+
+        Returns:
+            tuple: (텍스트, 제공자) 또는 None
+        """
+        return self._conn().execute(
+            "SELECT text, provider FROM fortune_pool "
+            "WHERE day = ? AND zodiac = ? AND gender = ? AND age_bucket = ?",
+            (day.isoformat(), zodiac_name, gender, bucket)
+        ).fetchone()
+
+    def put(self, day, zodiac_name, gender, bucket, text, provider=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO fortune_pool VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (day.isoformat(), zodiac_name, gender, bucket, text, provider, time.time())
+        )
+        conn.commit()
+
+    def existing_keys(self, day):
+        rows = self._conn().execute(
+            "SELECT zodiac, gender, age_bucket FROM fortune_pool WHERE day = ?",
+            (day.isoformat(),)
+        )
+        return set(rows)
+
+    def count(self, day):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM fortune_pool WHERE day = ?", (day.isoformat(),)
+        ).fetchone()[0]
+
+    def prune(self, before):
+        """지난 날짜 항목 삭제"""
+        conn = self._conn()
+        conn.execute("DELETE FROM fortune_pool WHERE day < ?", (before.isoformat(),))
+        conn.commit()
+
+
+def fill_pool(pool, generate, zodiacs, day, concurrency=4, per_minute=60):
+    """
+    빠진 풀 항목만 생성해 저장 (재시작 가능)
+
+    Args:
+        pool: FortunePool
+        generate: prompt -> (텍스트, 제공자) 함수
+        zodiacs: 띠 정보 목록 (name, emoji)
+        day: 생성할 날짜
+        concurrency: 동시 AI 호출 수
+        per_minute: 분당 최대 AI 호출 수
+
+    Returns:
+        dict: 생성/실패/건너뜀 건수
+    """
+    existing = pool.existing_keys(day)
+    todo = [
+        (zodiac, gender, bucket)
+        for zodiac in zodiacs
+        for gender in GENDERS
+        for bucket in AGE_BUCKETS
+        if (zodiac["name"], gender, bucket) not in existing
+    ]
+    limiter = RateLimiter(per_minute)
+    result = {"created": 0, "failed": 0, "skipped": len(existing)}
+
+    def work(zodiac, gender, bucket):
+        limiter.acquire()
+        text, provider = generate(build_pool_prompt(zodiac, gender, bucket, day))
+        if not text or "오류 발생" in text:
+            raise RuntimeError(text or "빈 응답")
+        pool.put(day, zodiac["name"], gender, bucket, text, provider)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(work, *item): item for item in todo}
+        for future in as_completed(futures):
+            zodiac, gender, bucket = futures[future]
+            try:
+                future.result()
+                result["created"] += 1
+            except Exception as e:
+                result["failed"] += 1
+                print(f"⚠️ 생성 실패 ({zodiac['name']}띠/{gender}/{age_label(bucket)}): {e}")
+    return result
+
+
+def create_pool_from_env():
+    """FORTUNE_POOL_PATH 파일이 있으면 풀을 열고, 없으면 None (풀 미사용)"""
+    path = os.getenv("FORTUNE_POOL_PATH", "fortune_pool.db")
+    if not os.path.exists(path):
+        return None
+    return FortunePool(path)
+
+
+def main():
+    """운세 풀 배치 생성"""
+    parser = argparse.ArgumentParser(description="일일 운세 풀 미리 생성")
+    parser.add_argument("--date", help="생성할 날짜 (YYYY-MM-DD, 기본값: KST 오늘)")
+    parser.add_argument("--path", default=os.getenv("FORTUNE_POOL_PATH", "fortune_pool.db"))
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 AI 호출 수")
+    parser.add_argument("--rpm", type=int, default=60, help="분당 최대 AI 호출 수")
+    args = parser.parse_args()
+
+    from llm_router import create_router_from_env
+
+    day = date.fromisoformat(args.date) if args.date else today_kst()
+    pool = FortunePool(args.path)
+    router = create_router_from_env()
+
+    start = time.perf_counter()
+    result = fill_pool(pool, router.generate, list(ZODIAC_ANIMALS.values()), day,
+                       concurrency=args.concurrency, per_minute=args.rpm)
+    pool.prune(today_kst())  # 지난 날짜 정리
+
+    total = len(ZODIAC_ANIMALS) * len(GENDERS) * len(AGE_BUCKETS)
+    print(f"\n📦 {day} 운세 풀: {pool.count(day)}/{total}건 "
+          f"(새로 생성 {result['created']}, 실패 {result['failed']}, 기존 {result['skipped']}) "
+          f"- {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+AI 운세 프롬프트 (고정 지침 + 사용자별 프롬프트)
+
+웹 앱과 배치/점검 스크립트가 같은 프롬프트를 쓰도록 Flask 앱과 분리해 둡니다.
+"""
+from fortune_cache import today_kst
+
+# 운세 작성 지침 (모든 요청에 공통인 고정 부분 → system 프롬프트로 보내 제공자 캐시 사용)
+FORTUNE_INSTRUCTIONS = """당신은 전문 운세 상담가입니다. 사용자 메시지로 주어지는 정보를 바탕으로 오늘의 운세를 작성해주세요.
+
+다음 형식으로 운세를 작성해주세요. 순서를 정확히 지켜주세요:
+
+**오늘의 운세**
+[전체적인 오늘의 운세를 2-3문장으로 구체적이고 긍정적으로 작성]
+
+**행운의 로또 번호**
+[지정된 로또 번호가 있으면 그대로 작성. 없으면 1부터 45까지의 숫자 중 6개를 쉼표로 구분하여 작성. 예: 7, 12, 23, 31, 38, 42]
+
+**행운의 색상**
+[지정된 색상이 있으면 그대로 작성. 없으면 하나의 색상만 작성. 예: 빨간색, 파란색, 노란색 등]
+
+**추천 상품**
+[행운의 색상과 어울리는 구체적인 상품 2-3개를 추천. 예: 빨간색 티셔츠, 빨간색 가방, 빨간색 액세서리]
+
+각 항목을 명확하게 구분하여 작성해주세요.
+"""
+
+
+def fortune_date(day=None):
+    """운세 날짜 표시 문자열 (캐시 키, 난수, 풀, 기록과 같은 KST 날짜)"""
+    return (day or today_kst()).strftime("%Y년 %m월 %d일")
+
+
+def build_fortune_prompt(name, birth_date, gender, zodiac, lucky_color=None, lotto_str=None, day=None):
+    """
+    운세 생성용 사용자 프롬프트 작성 (요청마다 바뀌는 부분만)
+
+    작성 형식은 FORTUNE_INSTRUCTIONS 에 있으므로 system 프롬프트로 함께 보내야 합니다.
+    lucky_color, lotto_str 를 주면 AI가 새로 고르지 않고 그대로 쓰도록 요청합니다.
+    (미리 검색해 둔 추천 상품과 색상을 맞추기 위함)
+    day: 운세 날짜 (기본값: KST 오늘)
+    """
+    day = day or today_kst()
+    today = fortune_date(day)
+    birth_str = birth_date.strftime("%Y년 %m월 %d일")
+    age = day.year - birth_date.year
+    
+    return f"""- 이름: {name}님
+- 생년월일: {birth_str} (만 {age}세)
+- 성별: {gender}
+- 띠: {zodiac['emoji']} {zodiac['name']}띠
+- 오늘 날짜: {today}
+- 지정된 로또 번호: {lotto_str or "없음"}
+- 지정된 행운의 색상: {lucky_color or "없음"}
+"""
@@ -0,0 +1,115 @@
+"""
+요청별 결정적(deterministic) 운세 난수
+
+random.seed() 로 전역 난수 상태를 바꾸면 동시에 처리되는 요청끼리 난수 순서가 섞이고,
+sum(ord(c)) 시드는 글자 순서만 바뀐 이름(애너그램)끼리 충돌하며 날짜가 빠져 있어
+"오늘의" 운세가 매일 같았습니다.
+
+여기서는 (이름, 생년월일, 성별, 날짜)의 안정적인 해시를 시드로 삼고, 각 추첨을
+"시드 + 슬롯 번호"만으로 계산하는 카운터 방식(splitmix64)을 사용합니다.
+공유 상태가 없어 스레드 안전하고, 같은 입력이면 언제 어디서 계산해도 같은 결과가
+나오므로 미리 계산하거나 NumPy로 한꺼번에 계산하기에도 좋습니다.
+"""
+import hashlib
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+# 추첨 용도별 슬롯 (같은 시드라도 용도마다 독립적인 값)
+SLOT_COLOR = 0
+SLOT_OVERALL = 1
+SLOT_LOTTO = 16  # 16 ~ 21: 로또 번호 6개
+
+
+def splitmix64(x):
+    """64비트 정수 해시 (splitmix64 출력 함수)"""
+    x = (x + GOLDEN_GAMMA) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def fortune_seed(name, birth, gender, day):
+    """
+    (이름, 생년월일, 성별, 날짜)로 64비트 시드 생성
+
+    Args:
+        name: 이름
+        birth: 생년월일(date/datetime) 또는 나이(int)
+        gender: 성별
+        day: 날짜 (date)
+    """
+    birth_key = birth.strftime("%Y-%m-%d") if hasattr(birth, "strftime") else f"age:{birth}"
+    return seed_from_key(name.strip(), birth_key, gender or "", day.isoformat())
+
+
+def seed_from_key(name, birth_key, gender, day_key):
+    """이미 정규화된 문자열 키로 시드 생성 (대량 생성용)"""
+    material = f"{name}|{birth_key}|{gender}|{day_key}"
+    return int.from_bytes(hashlib.blake2b(material.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class FortuneRNG:
+    """시드 하나로 여러 추첨을 독립적으로 계산하는 난수 생성기"""
+
+    __slots__ = ("seed",)
+
+    def __init__(self, seed):
+        self.seed = seed & MASK64
+
+    def draw(self, slot):
+        """슬롯 번호에 해당하는 64비트 난수"""
+        return splitmix64((self.seed + slot * GOLDEN_GAMMA) & MASK64)
+
+    def choice(self, seq, slot):
+        """seq 에서 하나 선택"""
+        return seq[self.draw(slot) % len(seq)]
+
+    def lotto(self, count=6, high=45):
+        """1~high 중 count개를 중복 없이 뽑아 정렬 (부분 Fisher-Yates 셔플)"""
+        balls = list(range(1, high + 1))
+        for i in range(count):
+            j = i + self.draw(SLOT_LOTTO + i) % (high - i)
+            balls[i], balls[j] = balls[j], balls[i]
+        return sorted(balls[:count])
+
+
+def main():
+    """전역 random + 잠금 방식과 요청별 FortuneRNG 처리량 비교"""
+    import random
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+
+    colors = list(range(15))
+    overall = list(range(5))
+    lock = threading.Lock()
+    day = date.today()
+    n = 20000
+
+    def global_locked(i):
+        # 전역 상태를 쓰려면 시드 설정부터 추첨까지 잠금 필요
+        with lock:
+            random.seed(f"사용자{i}")
+            random.choice(colors)
+            sorted(random.sample(range(1, 46), 6))
+            random.choice(overall)
+
+    def per_request(i):
+        rng = FortuneRNG(fortune_seed(f"사용자{i}", 30, "남성", day))
+        rng.choice(colors, SLOT_COLOR)
+        rng.lotto()
+        rng.choice(overall, SLOT_OVERALL)
+
+    for label, fn in (("전역 random + 잠금", global_locked), ("요청별 FortuneRNG", per_request)):
+        for threads in (1, 8):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(fn, range(n)))
+            elapsed = time.perf_counter() - start
+            print(f"{label:18s} | 스레드 {threads} | {n / elapsed:10.0f} 건/초")
+
+
+if __name__ == "__main__":
+    main()
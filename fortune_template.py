@@ -0,0 +1,147 @@
+"""
+미리 컴파일하는 운세 템플릿
+
+"{이름}" 자리표시자가 들어 있는 레이아웃을 한 번만 파싱해 고정 조각(fragment)과
+변수 자리 목록으로 바꿔 둡니다. 렌더링할 때는 조각 목록을 복사해 변수 자리만 채운 뒤
+한 번에 join 하므로, 호출마다 큰 f-string을 새로 만들 필요가 없습니다.
+
+마이크로벤치마크 (운세 1건당 할당량/시간): python fortune_template.py
+"""
+import re
+import sys
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class FortuneTemplate:
+    """고정 조각 + 변수 자리로 컴파일된 템플릿"""
+
+    __slots__ = ("source", "fields", "_parts", "_slots")
+
+    def __init__(self, source):
+        """
+        Args:
+            source: "{이름}" 자리표시자가 들어 있는 템플릿 문자열
+        """
+        self.source = source
+        parts = []
+        slots = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            if match.start() > pos:
+                parts.append(sys.intern(source[pos:match.start()]))
+            slots.append((len(parts), match.group(1)))
+            parts.append("")
+            pos = match.end()
+        if pos < len(source):
+            parts.append(sys.intern(source[pos:]))
+
+        self._parts = tuple(parts)
+        self._slots = tuple(slots)
+        self.fields = tuple(name for _, name in slots)
+
+    def render(self, **values):
+        """
+        변수 자리를 채운 문자열 반환
+
+        Raises:
+            KeyError: 값이 빠진 자리표시자가 있을 때
+        """
+        parts = list(self._parts)
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+
+FORTUNE_LAYOUT = FortuneTemplate("""**오늘의 운세**
+{overall}
+
+**행운의 로또 번호**
+{lotto}
+
+**행운의 색상**
+{color}
+
+**추천 상품**
+{products}
+""")
+
+
+def format_product_lines(products):
+    """추천 상품 목록을 "- 이름 (가격원)" 줄로 포맷"""
+    return "\n".join([f"- {p['name']} ({p['price']:,}원)" for p in products])
+
+
+def main():
+    """기존 f-string 방식과 컴파일된 템플릿의 운세 1건당 할당량/시간 비교"""
+    import time
+    import tracemalloc
+
+    from fortune_generator import FortuneGenerator
+
+    generator = FortuneGenerator()
+    color = "빨간색"
+    lotto = "3, 11, 19, 27, 35, 42"
+    overall = generator.OVERALL_FORTUNES[0]
+    n = 20000
+
+    def legacy():
+        # 변경 전 방식: 더미 상품/띠 사전을 매번 만들고 f-string으로 조립
+        from fortune_generator import DEFAULT_DUMMY_SPECS, DUMMY_PRODUCT_SPECS, ZODIAC_FORTUNES
+        dummy = {
+            key: [
+                {"name": f"{color} {name}", "price": price, "image": image, "link": "#",
+                 "rating": rating, "reviews": reviews}
+                for name, price, image, rating, reviews in specs
+            ]
+            for key, specs in DUMMY_PRODUCT_SPECS.items()
+        }
+        default = [
+            {"name": f"{color} {name}", "price": price, "image": image, "link": "#",
+             "rating": rating, "reviews": reviews}
+            for name, price, image, rating, reviews in DEFAULT_DUMMY_SPECS
+        ]
+        products = dummy.get(color, default)
+        zodiac = dict(ZODIAC_FORTUNES).get("쥐")
+        product_recommendation = "\n".join([f"- {p['name']} ({p['price']:,}원)" for p in products])
+        return f"""**오늘의 운세**
+{overall}
+
+**행운의 로또 번호**
+{lotto}
+
+**행운의 색상**
+{color}
+
+**추천 상품**
+{product_recommendation}
+""", zodiac
+
+    def compiled():
+        products = generator._get_dummy_products(color)
+        zodiac = generator._get_zodiac_fortune("쥐")
+        return generator.render(color, lotto, overall, products)[0], zodiac
+
+    assert legacy()[0] == compiled()[0]
+
+    for label, fn in (("기존 f-string", legacy), ("컴파일된 템플릿", compiled)):
+        # 호출 한 번 동안 늘어난 최대 메모리 = 운세 1건을 만드는 데 필요한 임시 할당량
+        tracemalloc.start()
+        total = 0
+        for _ in range(1000):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            total += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:12s} | 1건당 {elapsed / n * 1e6:6.2f}µs | "
+              f"1건당 할당 {total / 1000:7.1f}B")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,15 @@
 Google Gemini API 클라이언트
 """
 import os
+import threading
+import time
 import google.generativeai as genai
 
+from async_llm import on_shared_loop, run_sync
+from prompt_cache import prompt_cache_stats
+
+CONTEXT_CACHE_TTL = 3600  # 명시적 context cache 유지 시간(초)
+
 class GeminiClient:
     """Google Gemini API를 사용하기 위한 클라이언트 클래스"""
     
@@ -21,21 +28,132 @@ class GeminiClient:
                 "환경변수 GOOGLE_API_KEY를 확인해주세요."
             )
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('models/gemini-2.5-flash')
+        self.model_name = 'models/gemini-2.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
+        # GEMINI_CONTEXT_CACHE=1 이면 system 프롬프트를 명시적 context cache로 저장 (보관 비용 발생)
+        self.context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+        self._models = {}  # system 프롬프트 → (모델, 만료 시각)
+        self._models_lock = threading.Lock()
+    
+    def warm_up(self):
+        """모델 정보를 조회해 API 연결을 미리 열어둡니다."""
+        genai.get_model(self.model_name)
     
-    def chat(self, message, max_tokens=2048):
+    def _model_for(self, system):
         """
-        Gemini와 대화하기
+        system 프롬프트용 모델 (system 프롬프트마다 한 번만 생성)
+        
+        같은 system_instruction 접두사는 Gemini가 암묵적으로 캐싱하고,
+        context_cache 가 켜져 있으면 명시적 context cache를 만들어 재사용합니다.
+        """
+        if not system:
+            return self.model
+        entry = self._models.get(system)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        with self._models_lock:
+            entry = self._models.get(system)
+            if entry is None or entry[1] <= time.monotonic():
+                entry = self._create_cached_model(system) if self.context_cache else None
+                if entry is None:
+                    entry = (genai.GenerativeModel(self.model_name, system_instruction=system), float("inf"))
+                self._models[system] = entry
+        return entry[0]
+    
+    def _create_cached_model(self, system):
+        """명시적 context cache 생성 (실패 시 None → system_instruction 사용)"""
+        try:
+            from datetime import timedelta
+            from google.generativeai import caching
+            cached = caching.CachedContent.create(
+                model=self.model_name,
+                system_instruction=system,
+                ttl=timedelta(seconds=CONTEXT_CACHE_TTL),
+            )
+            # 만료 직전 요청이 실패하지 않도록 여유를 두고 새로 만듦
+            expires = time.monotonic() + CONTEXT_CACHE_TTL - 60
+            return genai.GenerativeModel.from_cached_content(cached_content=cached), expires
+        except Exception as e:
+            print(f"Gemini context cache 생성 실패 (system_instruction 사용): {e}")
+            return None
+    
+    def _record_usage(self, response, elapsed):
+        """요청별 입력 토큰/캐시 토큰/지연 기록"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        prompt_cache_stats.record(
+            "gemini", usage.prompt_token_count,
+            getattr(usage, "cached_content_token_count", 0), 0, elapsed
+        )
+    
+    async def _achat(self, model, message):
+        """실제 호출 (항상 공용 이벤트 루프에서 실행)"""
+        try:
+            start = time.perf_counter()
+            response = await model.generate_content_async(message)
+            self._record_usage(response, time.perf_counter() - start)
+            return response.text
+        except Exception as e:
+            return f"오류 발생: {str(e)}"
+    
+    def chat(self, message, max_tokens=2048, system=None):
+        """
+        Gemini와 대화하기 (공용 이벤트 루프의 achat 에 위임)
         
         Args:
             message: 사용자 메시지
             max_tokens: 최대 토큰 수 (Gemini는 자동으로 관리)
+            system: 요청마다 같은 고정 지침 (system_instruction, 캐싱 대상)
             
         Returns:
             Gemini의 응답 메시지
         """
         try:
-            response = self.model.generate_content(message)
-            return response.text
+            # 모델 생성(context cache 생성 포함)은 공용 루프를 막지 않도록 호출 스레드에서
+            return run_sync(self._achat(self._model_for(system), message))
+        except Exception as e:
+            return f"오류 발생: {str(e)}"
+    
+    async def achat(self, message, max_tokens=2048, system=None):
+        """
+        Gemini와 대화하기 (비동기 버전)
+        
+        grpc 비동기 채널은 처음 사용한 이벤트 루프에 묶이므로 호출한 루프와 관계없이
+        공용 루프에서 실행합니다.
+        
+        Args:
+            message: 사용자 메시지
+            max_tokens: 최대 토큰 수 (Gemini는 자동으로 관리)
+            system: 요청마다 같은 고정 지침 (system_instruction, 캐싱 대상)
+            
+        Returns:
+            Gemini의 응답 메시지
+        """
+        try:
+            model = self._model_for(system)
         except Exception as e:
             return f"오류 발생: {str(e)}"
+        return await on_shared_loop(self._achat(model, message))
+    
+    def stream_chat(self, message, max_tokens=2048, system=None):
+        """
+        Gemini와 스트리밍 대화하기
+        
+        Args:
+            message: 사용자 메시지
+            max_tokens: 최대 토큰 수 (Gemini는 자동으로 관리)
+            system: 요청마다 같은 고정 지침 (system_instruction, 캐싱 대상)
+            
+        Yields:
+            스트리밍된 응답 청크
+        """
+        try:
+            start = time.perf_counter()
+            response = self._model_for(system).generate_content(message, stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+            self._record_usage(response, time.perf_counter() - start)
+        except Exception as e:
+            yield f"오류 발생: {str(e)}"
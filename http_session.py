@@ -0,0 +1,271 @@
+"""
+연결 풀 + 재시도를 갖춘 공용 HTTP 세션
+
+requests.get 을 그대로 부르면 요청마다 TCP/TLS 연결을 새로 맺습니다. 이 모듈의 세션은
+keep-alive 연결을 재사용하고, 429/5xx 응답과 연결 오류는 지터(jitter)를 준 지수 백오프로
+다시 시도하며, 시도별 지연 시간을 히스토그램으로 모읍니다.
+
+쿠팡 클라이언트가 사용하며, 다른 HTTP 기반 클라이언트도 get_session("이름")으로 같은
+방식의 세션을 얻을 수 있습니다. 로컬 가짜 서버로 동작 확인: python http_session.py
+
+requests 는 가져오는 데 수십 ms가 걸리므로 세션을 처음 만들 때 import 합니다
+(서버리스 콜드 스타트에서 상품 검색이 필요 없는 요청은 비용을 내지 않음).
+"""
+import random
+import threading
+import time
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class LatencyHistogram:
+    """누적 버킷 방식의 지연 시간 히스토그램 (초 단위)"""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """{"buckets": [(상한, 누적 개수), ...], "sum": 합계, "count": 개수}"""
+        with self._lock:
+            cumulative = []
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+                total += count
+                cumulative.append((bound, total))
+            return {"buckets": cumulative, "sum": self._sum, "count": self._count}
+
+
+class RetryingSession:
+    """keep-alive 연결 풀 + 재시도 + 지연 시간 히스토그램"""
+
+    def __init__(self, pool_connections=4, pool_maxsize=16, max_retries=3,
+                 backoff_base=0.2, backoff_max=5.0, connect_timeout=2.0, read_timeout=5.0,
+                 total_timeout=None, retry_statuses=RETRY_STATUSES):
+        """
+        Args:
+            pool_connections: 연결 풀을 유지할 호스트 수
+            pool_maxsize: 호스트당 최대 연결 수 (동시 요청 수에 맞춤)
+            max_retries: 최대 재시도 횟수
+            backoff_base: 백오프 기본 대기 시간(초). 시도마다 2배씩 늘어남
+            backoff_max: 백오프 최대 대기 시간(초)
+            connect_timeout: 연결 타임아웃(초)
+            read_timeout: 응답 읽기 타임아웃(초)
+            total_timeout: 재시도와 백오프를 모두 포함한 요청 한 건의 최대 시간(초, None이면 제한 없음)
+            retry_statuses: 재시도할 HTTP 상태 코드
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.latency = LatencyHistogram()
+        self._random = random.Random()  # 전역 random 상태(운세 시드)와 분리
+        self._lock = threading.Lock()
+
+        # 통계
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt, response=None):
+        """재시도 전 대기 시간 (full jitter, 429의 Retry-After 우선)"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        """
+        HTTP 요청 (재시도 포함)
+
+        total_timeout 이 있으면 시도별 타임아웃을 남은 시간으로 줄이고, 백오프 후 남은 시간이
+        없으면 더 시도하지 않습니다.
+
+        Returns:
+            requests.Response: 마지막 응답 (재시도 후에도 429/5xx일 수 있음)
+
+        Raises:
+            requests.RequestException: 재시도 후에도 연결/타임아웃 오류가 날 때
+                (total_timeout 을 다 쓰면 requests.Timeout)
+        """
+        import requests
+
+        timeout = kwargs.pop("timeout", self.timeout)
+        deadline = None if self.total_timeout is None else time.monotonic() + self.total_timeout
+        with self._lock:
+            self.requests += 1
+
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            attempt_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self.failures += 1
+                    raise requests.Timeout(f"요청 시간 예산({self.total_timeout}초)을 모두 사용했습니다.")
+                connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+                attempt_timeout = (min(connect, remaining), min(read, remaining))
+
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.latency.observe(time.perf_counter() - start)
+                if last:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+            else:
+                self.latency.observe(time.perf_counter() - start)
+                if response.status_code not in self.retry_statuses or last:
+                    if response.status_code >= 400:
+                        with self._lock:
+                            self.failures += 1
+                    return response
+
+            delay = self._backoff(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                # 기다린 뒤에는 다시 시도할 시간이 없음 → 지금 결과로 끝냄
+                with self._lock:
+                    self.failures += 1
+                if response is not None:
+                    return response
+                raise requests.Timeout(f"요청 시간 예산({self.total_timeout}초)을 모두 사용했습니다.")
+            if response is not None:
+                response.close()
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """요청/재시도/실패 횟수와 지연 시간 히스토그램"""
+        with self._lock:
+            counts = {"requests": self.requests, "retries": self.retries, "failures": self.failures}
+        counts["latency"] = self.latency.snapshot()
+        return counts
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name, **options):
+    """
+    서비스별 공용 세션 반환 (처음 호출 시 options로 생성)
+
+    Args:
+        name: 서비스 이름 (예: "coupang")
+        options: RetryingSession 생성 옵션
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = RetryingSession(**options)
+    return session
+
+
+def collect_session_stats():
+    """
+    /metrics 용 세션별 요청/재시도/실패 수와 지연 시간 히스토그램 (metrics.register_collector 형식)
+
+    만들어진 세션만 보고하므로 세션을 쓰지 않은 인스턴스는 requests 를 import 하지 않습니다.
+    """
+    with _sessions_lock:
+        sessions = sorted(_sessions.items())
+    for name, session in sessions:
+        stats = session.stats()
+        labels = {"service": name}
+        yield "http_client_requests_total", labels, stats["requests"], "counter"
+        yield "http_client_retries_total", labels, stats["retries"], "counter"
+        yield "http_client_failures_total", labels, stats["failures"], "counter"
+        yield "http_client_request_seconds", labels, stats["latency"], "histogram"
+
+
+def main():
+    """느린 응답과 429를 흉내 내는 로컬 가짜 서버로 동작 확인"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"count": 0, "ports": set()}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            with lock:
+                state["count"] += 1
+                state["ports"].add(self.client_address[1])
+                count = state["count"]
+            if count % 5 == 1:
+                # 5건 중 1건은 요청 제한
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                body = b"{}"
+            else:
+                time.sleep(0.05 if count % 3 else 0.3)
+                self.send_response(200)
+                body = b'{"data": {"productData": []}}'
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search"
+
+    session = RetryingSession(backoff_base=0.01)
+    for _ in range(20):
+        session.get(url)
+    server.shutdown()
+
+    stats = session.stats()
+    print(f"요청 {stats['requests']}건 | 재시도 {stats['retries']}건 | 실패 {stats['failures']}건")
+    print(f"서버가 받은 요청 {state['count']}건, 사용된 TCP 연결 {len(state['ports'])}개")
+    print("지연 시간 히스토그램 (누적):")
+    for bound, count in stats["latency"]["buckets"]:
+        print(f"  <= {bound:>5}s : {count}")
+
+
+if __name__ == "__main__":
+    main()
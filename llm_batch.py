@@ -0,0 +1,700 @@
+"""
+제공자 배치 API로 운세 대량 생성 (오프라인 작업용)
+
+내일 운세 풀이나 뉴스레터처럼 기다려도 되는 작업은 요청을 한 건씩 보내지 않고
+Claude Message Batches / OpenAI Batch API에 수천 건씩 묶어 제출합니다.
+(배치 요청은 일반 요청의 절반 가격이며 분당 호출 한도를 쓰지 않습니다)
+
+    1. 작업의 모든 요청을 상태 파일(SQLite)에 기록 (다시 실행해도 중복 추가 없음)
+    2. 아직 완료되지 않은 요청을 배치 크기 단위로 제출
+    3. 끝날 때까지 점점 간격을 늘리며(backoff) 상태 확인
+    4. 결과를 받는 대로 풀/캐시/JSON Lines 파일에 저장하고 완료 표시
+    5. 실패한 요청은 max_attempts 까지 다시 제출
+중간에 중단돼도 같은 명령을 다시 실행하면 제출해 둔 배치부터 이어서 확인합니다.
+
+실행:
+    python llm_batch.py pool --date 2026-10-19                         # 내일 운세 풀
+    python llm_batch.py users users.csv --date 2026-10-19 -o news.jsonl  # 뉴스레터
+    python llm_batch.py pool --date 2026-10-19 --path /tmp/pool.db --mock  # 로컬 가짜 배치 서버
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from fortune_cache import today_kst
+from fortune_pool import AGE_BUCKETS, GENDERS, FortunePool, build_pool_prompt
+from fortune_prompt import FORTUNE_INSTRUCTIONS, build_fortune_prompt
+from prompt_cache import CLAUDE_MIN_CACHE_TOKENS, estimate_tokens
+from zodiac import ZODIAC_ANIMALS, calculate_zodiac
+
+DEFAULT_MODELS = {"claude": "claude-3-5-sonnet-20241022", "openai": "gpt-3.5-turbo"}
+
+
+def custom_id(key):
+    """배치 요청 id (제공자 제한: 영문/숫자/-/_ 64자 이하, 같은 키면 항상 같은 id)"""
+    return "f" + hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def make_request(key, prompt, meta, system=None):
+    """배치 요청 한 건"""
+    return {"custom_id": custom_id(key), "prompt": prompt, "system": system, "meta": meta}
+
+
+class AnthropicBatchBackend:
+    """Claude Message Batches API"""
+
+    name = "claude"
+    max_requests = 100000  # 배치 하나에 넣을 수 있는 최대 요청 수
+
+    def __init__(self, client=None, model=DEFAULT_MODELS["claude"], max_tokens=2048):
+        if client is None:
+            from anthropic import Anthropic
+            client = Anthropic()
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def _params(self, request):
+        params = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": request["prompt"]}],
+        }
+        if request["system"] and estimate_tokens(request["system"]) >= CLAUDE_MIN_CACHE_TOKENS:
+            # 배치 안에서도 같은 고정 지침은 프롬프트 캐시를 공유
+            params["system"] = [
+                {"type": "text", "text": request["system"], "cache_control": {"type": "ephemeral"}}
+            ]
+        elif request["system"]:
+            # 캐시 최소 길이보다 짧은 지침은 캐싱되지 않으므로 일반 system 으로 보냄
+            params["system"] = request["system"]
+        return params
+
+    def submit(self, requests):
+        """배치 제출 → 배치 id"""
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": request["custom_id"], "params": self._params(request)} for request in requests
+        ])
+        return batch.id
+
+    def poll(self, batch_id):
+        """
+        Returns:
+            tuple: (끝났는지, 상태 설명)
+        """
+        batch = self.client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return batch.processing_status == "ended", (
+            f"{batch.processing_status} (처리 중 {counts.processing}, 성공 {counts.succeeded}, "
+            f"실패 {counts.errored + counts.expired + counts.canceled})"
+        )
+
+    def results(self, batch_id):
+        """결과를 (custom_id, 텍스트 또는 None, 오류 또는 None) 로 하나씩"""
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                yield entry.custom_id, result.message.content[0].text, None
+            else:
+                error = getattr(getattr(result, "error", None), "error", None)
+                yield entry.custom_id, None, f"{result.type}: {getattr(error, 'message', '')}".rstrip(": ")
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API (/v1/chat/completions, 24시간 완료 창)"""
+
+    name = "openai"
+    max_requests = 50000
+    ENDED = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, client=None, model=DEFAULT_MODELS["openai"], max_tokens=2048):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def submit(self, requests):
+        lines = []
+        for request in requests:
+            messages = [{"role": "user", "content": request["prompt"]}]
+            if request["system"]:
+                messages.insert(0, {"role": "system", "content": request["system"]})
+            lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": messages, "max_tokens": self.max_tokens},
+            }, ensure_ascii=False))
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        uploaded = self.client.files.create(file=("fortunes.jsonl", data), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    def poll(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        detail = f"{batch.status}"
+        if counts is not None:
+            detail += f" (완료 {counts.completed}/{counts.total}, 실패 {counts.failed})"
+        return batch.status in self.ENDED, detail
+
+    def results(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    yield record["custom_id"], response["body"]["choices"][0]["message"]["content"], None
+                else:
+                    error = record.get("error") or (response.get("body") or {}).get("error") or {}
+                    yield record["custom_id"], None, error.get("message") or f"HTTP {response.get('status_code')}"
+
+
+BACKENDS = {"claude": AnthropicBatchBackend, "openai": OpenAIBatchBackend}
+
+
+class BatchState:
+    """요청별 진행 상태 (다시 실행하면 이어서 처리)"""
+
+    def __init__(self, path="batch_state.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS batch_items ("
+            "job TEXT NOT NULL, custom_id TEXT NOT NULL, prompt TEXT NOT NULL, system TEXT, "
+            "meta TEXT NOT NULL, status TEXT NOT NULL, batch_id TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (job, custom_id))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_items_job ON batch_items (job, status)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_items_batch ON batch_items (batch_id)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "batch_id TEXT PRIMARY KEY, job TEXT NOT NULL, provider TEXT NOT NULL, "
+            "size INTEGER NOT NULL, ended INTEGER NOT NULL DEFAULT 0, submitted_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def add(self, job, requests):
+        """요청 등록 (이미 있는 요청은 그대로)"""
+        now = time.time()
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO batch_items "
+            "(custom_id, job, prompt, system, meta, status, updated_at) VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+            [(r["custom_id"], job, r["prompt"], r["system"], json.dumps(r["meta"], ensure_ascii=False), now)
+             for r in requests]
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def pending(self, job, max_attempts):
+        """제출할 요청 (처음이거나 실패 후 재시도 횟수가 남은 요청)"""
+        rows = self.conn.execute(
+            "SELECT custom_id, prompt, system, meta FROM batch_items "
+            "WHERE job = ? AND (status = 'pending' OR (status = 'failed' AND attempts < ?)) "
+            "ORDER BY custom_id",
+            (job, max_attempts)
+        ).fetchall()
+        return [{"custom_id": c, "prompt": p, "system": s, "meta": json.loads(m)} for c, p, s, m in rows]
+
+    def mark_submitted(self, job, provider, batch_id, custom_ids):
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO batches (batch_id, job, provider, size, submitted_at) VALUES (?, ?, ?, ?, ?)",
+            (batch_id, job, provider, len(custom_ids), now)
+        )
+        self.conn.executemany(
+            "UPDATE batch_items SET status = 'submitted', batch_id = ?, attempts = attempts + 1, "
+            "error = NULL, updated_at = ? WHERE job = ? AND custom_id = ?",
+            [(batch_id, now, job, cid) for cid in custom_ids]
+        )
+        self.conn.commit()
+
+    def open_batches(self, job, provider=None):
+        """
+        제출했지만 결과를 아직 받지 않은 배치
+
+        Returns:
+            list: provider 를 주면 [배치 id], 아니면 [(배치 id, 제공자)]
+        """
+        rows = self.conn.execute(
+            "SELECT batch_id, provider FROM batches WHERE job = ? AND ended = 0 ORDER BY submitted_at", (job,)
+        ).fetchall()
+        if provider is None:
+            return rows
+        return [batch_id for batch_id, p in rows if p == provider]
+
+    def meta(self, batch_id, cid):
+        """배치에 제출한 요청의 meta (이미 처리했거나 모르는 요청이면 None)"""
+        row = self.conn.execute(
+            "SELECT meta FROM batch_items WHERE batch_id = ? AND custom_id = ? AND status = 'submitted'",
+            (batch_id, cid)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def mark_done(self, batch_id, cid):
+        self.conn.execute(
+            "UPDATE batch_items SET status = 'done', error = NULL, updated_at = ? "
+            "WHERE batch_id = ? AND custom_id = ?",
+            (time.time(), batch_id, cid)
+        )
+
+    def mark_failed(self, batch_id, cid, error):
+        self.conn.execute(
+            "UPDATE batch_items SET status = 'failed', error = ?, updated_at = ? "
+            "WHERE batch_id = ? AND custom_id = ?",
+            (error, time.time(), batch_id, cid)
+        )
+
+    def end_batch(self, batch_id):
+        """배치 종료 (결과가 오지 않은 요청은 실패로 표시해 다시 제출)"""
+        self.conn.execute(
+            "UPDATE batch_items SET status = 'failed', error = '결과 없음', updated_at = ? "
+            "WHERE batch_id = ? AND status = 'submitted'",
+            (time.time(), batch_id)
+        )
+        self.conn.execute("UPDATE batches SET ended = 1 WHERE batch_id = ?", (batch_id,))
+        self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def counts(self, job):
+        """상태별 요청 수"""
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) FROM batch_items WHERE job = ? GROUP BY status", (job,)
+        ).fetchall()
+        return dict(rows)
+
+
+def run_job(job, requests, backend, state, sink, batch_size=None, poll_interval=30.0,
+            max_interval=600.0, backoff=1.5, max_attempts=3, sleep=time.sleep):
+    """
+    배치 작업 실행 (중단 후 다시 호출하면 이어서 처리)
+
+    Args:
+        job: 작업 이름 (예: "pool:2026-10-19")
+        requests: make_request 로 만든 요청 목록
+        backend: AnthropicBatchBackend / OpenAIBatchBackend
+        state: BatchState
+        sink: sink(meta, 텍스트, 제공자) - 결과 저장 함수
+        batch_size: 배치 하나의 최대 요청 수 (기본값: 제공자 한도)
+        poll_interval: 첫 상태 확인 간격(초), 이후 backoff 배씩 max_interval 까지 늘림
+        max_attempts: 요청별 최대 제출 횟수
+
+    Returns:
+        dict: 상태별 요청 수
+    """
+    added = state.add(job, requests)
+    print(f"📋 {job}: 요청 {len(requests)}건 (새로 등록 {added}건)")
+    batch_size = min(batch_size or backend.max_requests, backend.max_requests)
+    interval = poll_interval
+    for batch_id, provider in state.open_batches(job):
+        if provider != backend.name:
+            print(f"⚠️ 배치 {batch_id} 는 {provider} 배치입니다 (--provider {provider} 로 다시 실행해 결과 수집)")
+
+    while True:
+        todo = state.pending(job, max_attempts)
+        for start in range(0, len(todo), batch_size):
+            chunk = todo[start:start + batch_size]
+            try:
+                batch_id = backend.submit(chunk)
+            except Exception as e:
+                # 제출 실패분은 pending 으로 남아 다음 실행 때 다시 제출
+                print(f"⚠️ 배치 제출 실패 ({len(chunk)}건): {e}")
+                break
+            state.mark_submitted(job, backend.name, batch_id, [r["custom_id"] for r in chunk])
+            print(f"📤 배치 {batch_id} 제출 ({len(chunk)}건)")
+            interval = poll_interval
+
+        open_batches = state.open_batches(job, backend.name)
+        if not open_batches:
+            break
+
+        sleep(interval)
+        interval = min(interval * backoff, max_interval)
+        for batch_id in open_batches:
+            try:
+                ended, detail = backend.poll(batch_id)
+            except Exception as e:
+                print(f"⚠️ 배치 {batch_id} 상태 확인 실패: {e}")
+                continue
+            print(f"⏳ 배치 {batch_id}: {detail}")
+            if ended:
+                collect_results(batch_id, backend, state, sink)
+
+    counts = state.counts(job)
+    print(f"✅ {job}: " + ", ".join(f"{status} {n}" for status, n in sorted(counts.items())))
+    return counts
+
+
+def collect_results(batch_id, backend, state, sink):
+    """끝난 배치의 결과를 받는 대로 저장하고 완료 표시"""
+    done = failed = 0
+    for cid, text, error in backend.results(batch_id):
+        meta = state.meta(batch_id, cid)
+        if meta is None:
+            continue
+        if text and "오류 발생" not in text:
+            try:
+                sink(meta, text, backend.name)
+            except Exception as e:
+                state.mark_failed(batch_id, cid, f"저장 실패: {e}")
+                failed += 1
+                continue
+            state.mark_done(batch_id, cid)
+            done += 1
+        else:
+            state.mark_failed(batch_id, cid, error or "빈 응답")
+            failed += 1
+        if (done + failed) % 1000 == 0:
+            state.commit()
+    state.end_batch(batch_id)
+    print(f"📥 배치 {batch_id}: 저장 {done}건, 실패 {failed}건")
+
+
+class PoolSink:
+    """운세 풀에 저장"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __call__(self, meta, text, provider):
+        self.pool.put(date.fromisoformat(meta["day"]), meta["zodiac"], meta["gender"], meta["bucket"],
+                      text, provider)
+
+
+class JsonlSink:
+    """JSON Lines 파일에 한 줄씩 추가 (뉴스레터 등)"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, meta, text, provider):
+        self.file.write(json.dumps(dict(meta, fortune=text, provider=provider), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CacheSink:
+    """
+    운세 캐시에 저장 (오늘 날짜 작업 + sqlite/redis 캐시일 때만 웹 서버와 공유됨)
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __call__(self, meta, text, provider):
+        from fortune_payload import with_payload
+
+        birth_date = date.fromisoformat(meta["birth_date"])
+        self.cache.set(
+            self.cache.make_key(meta["name"], birth_date, meta["gender"], date.fromisoformat(meta["date"])),
+            with_payload({
+                "full_text": text,
+                "name": meta["name"],
+                "zodiac": meta["zodiac"],
+                "date": date.fromisoformat(meta["date"]).strftime("%Y년 %m월 %d일"),
+                "provider": provider,
+                "products": [],
+            })
+        )
+
+
+def pool_requests(day, zodiacs):
+    """운세 풀 전체 조합 (띠 x 성별 x 연령대) 요청"""
+    return [
+        make_request(
+            f"pool|{day.isoformat()}|{zodiac['name']}|{gender}|{bucket}",
+            build_pool_prompt(zodiac, gender, bucket, day),
+            {"day": day.isoformat(), "zodiac": zodiac["name"], "gender": gender, "bucket": bucket},
+        )
+        for zodiac in zodiacs
+        for gender in GENDERS
+        for bucket in AGE_BUCKETS
+    ]
+
+
+def user_requests(users, day):
+    """
+    사용자별 개인 운세 요청 (웹과 같은 프롬프트, 날짜별 행운의 색상/로또 번호)
+
+    Args:
+        users: {"name": [...], "birth_date": [...], "gender": [...]} (bulk_fortune.load_users)
+    """
+    from fortune_generator import FortuneGenerator
+
+    generator = FortuneGenerator()
+    requests = []
+    for name, birth, gender in zip(users["name"], users["birth_date"], users["gender"]):
+        birth_date = date.fromisoformat(birth)
+        zodiac = calculate_zodiac(birth_date.year)
+        color, lotto, _ = generator.pick_lucky_items(name, birth_date, gender, day)
+        requests.append(make_request(
+            f"user|{day.isoformat()}|{name.strip()}|{birth}|{gender}",
+            build_fortune_prompt(name, birth_date, gender, zodiac, color, lotto, day),
+            {"date": day.isoformat(), "name": name, "birth_date": birth, "gender": gender,
+             "zodiac": zodiac, "lucky_color": color, "lotto": lotto},
+            system=FORTUNE_INSTRUCTIONS,
+        ))
+    return requests
+
+
+class MockBatchServer:
+    """
+    Claude/OpenAI 배치 API를 흉내 내는 로컬 HTTP 서버 (실제 SDK를 그대로 연결해 시험)
+
+    배치는 ready_after 번 조회한 뒤 끝나고, fail_every 번째 요청마다 처음 한 번은 실패시켜
+    재제출 경로를 확인할 수 있습니다.
+    """
+
+    def __init__(self, ready_after=2, fail_every=7):
+        self.ready_after = ready_after
+        self.fail_every = fail_every
+        self.batches = {}
+        self.files = {}
+        self.failed_once = set()
+        self.submitted = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        from http.server import ThreadingHTTPServer
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    def _answer(self, cid):
+        """요청 하나의 결과 (성공이면 텍스트, 실패면 None)"""
+        with self._lock:
+            self.submitted += 1
+            if self.fail_every and self.submitted % self.fail_every == 0 and cid not in self.failed_once:
+                self.failed_once.add(cid)
+                return None
+        return f"**오늘의 운세**\n{{name}}님, 모의 배치 응답입니다. ({cid})\n\n**행운의 색상**\n빨간색"
+
+    def _create(self, kind, custom_ids):
+        with self._lock:
+            batch_id = f"{kind}_mock{len(self.batches) + 1}"
+            self.batches[batch_id] = {"kind": kind, "ids": custom_ids, "polls": 0, "results": None}
+        return batch_id
+
+    def _poll(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] > self.ready_after and batch["results"] is None:
+            batch["results"] = [(cid, self._answer(cid)) for cid in batch["ids"]]
+        return batch
+
+    def _anthropic_batch(self, batch_id, batch):
+        ended = batch["results"] is not None
+        succeeded = sum(1 for _, text in batch["results"] or () if text)
+        return {
+            "id": batch_id, "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(batch["ids"]),
+                "succeeded": succeeded, "errored": len(batch["ids"]) - succeeded if ended else 0,
+                "canceled": 0, "expired": 0,
+            },
+            "created_at": "2026-01-01T00:00:00Z", "expires_at": "2026-01-02T00:00:00Z",
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _openai_batch(self, batch_id, batch):
+        ended = batch["results"] is not None
+        failed = sum(1 for _, text in batch["results"] or () if not text)
+        return {
+            "id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions",
+            "completion_window": "24h", "created_at": 0, "input_file_id": "file_input",
+            "status": "completed" if ended else "in_progress",
+            "output_file_id": f"file_out_{batch_id}" if ended else None,
+            "error_file_id": f"file_err_{batch_id}" if ended and failed else None,
+            "request_counts": {"total": len(batch["ids"]), "completed": len(batch["ids"]) - failed if ended else 0,
+                               "failed": failed},
+        }
+
+    def _openai_file(self, file_id):
+        batch_id = file_id.split("_", 2)[2]
+        lines = []
+        for cid, text in self.batches[batch_id]["results"]:
+            if file_id.startswith("file_out_") and text:
+                response = {"status_code": 200, "body": {"choices": [{"message": {"content": text}}]}}
+                lines.append({"custom_id": cid, "response": response, "error": None})
+            elif file_id.startswith("file_err_") and not text:
+                lines.append({"custom_id": cid, "response": None,
+                              "error": {"code": "server_error", "message": "모의 실패"}})
+        return "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+
+    def _handler(self):
+        from email.parser import BytesParser
+        from email.policy import default as default_policy
+        from http.server import BaseHTTPRequestHandler
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body, content_type="application/json"):
+                if not isinstance(body, (bytes, str)):
+                    body = json.dumps(body, ensure_ascii=False)
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                body = self._body()
+                if path == "/v1/messages/batches":
+                    ids = [r["custom_id"] for r in json.loads(body)["requests"]]
+                    batch_id = mock._create("msgbatch", ids)
+                    self._send(200, mock._anthropic_batch(batch_id, mock.batches[batch_id]))
+                elif path == "/v1/files":
+                    message = BytesParser(policy=default_policy).parsebytes(
+                        b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+                    )
+                    content = next(part.get_payload(decode=True) for part in message.iter_parts()
+                                   if part.get_param("name", header="content-disposition") == "file")
+                    file_id = f"file_in{len(mock.files) + 1}"
+                    mock.files[file_id] = content
+                    self._send(200, {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+                                     "filename": "fortunes.jsonl", "purpose": "batch", "status": "processed"})
+                elif path == "/v1/batches":
+                    lines = mock.files[json.loads(body)["input_file_id"]].decode("utf-8").splitlines()
+                    batch_id = mock._create("batch", [json.loads(line)["custom_id"] for line in lines if line])
+                    self._send(200, mock._openai_batch(batch_id, mock.batches[batch_id]))
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:3] == ["v1", "messages", "batches"] and len(parts) == 5:
+                    batch = mock.batches[parts[3]]
+                    lines = []
+                    for cid, text in batch["results"]:
+                        if text:
+                            result = {"type": "succeeded", "message": {
+                                "id": "msg_mock", "type": "message", "role": "assistant", "model": "mock",
+                                "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                                "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 1}}}
+                        else:
+                            result = {"type": "errored", "error": {"type": "error", "error": {
+                                "type": "api_error", "message": "모의 실패"}}}
+                        lines.append(json.dumps({"custom_id": cid, "result": result}, ensure_ascii=False))
+                    self._send(200, "\n".join(lines) + "\n", "application/binary")
+                elif parts[:3] == ["v1", "messages", "batches"]:
+                    self._send(200, mock._anthropic_batch(parts[3], mock._poll(parts[3])))
+                elif parts[:2] == ["v1", "batches"]:
+                    self._send(200, mock._openai_batch(parts[2], mock._poll(parts[2])))
+                elif parts[:2] == ["v1", "files"] and parts[-1] == "content":
+                    self._send(200, mock._openai_file(parts[2]), "application/binary")
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 API로 운세 대량 생성")
+    parser.add_argument("job", choices=("pool", "users"), help="pool: 운세 풀, users: 사용자별 운세")
+    parser.add_argument("users_file", nargs="?", help="users 작업의 사용자 목록 (CSV/Parquet)")
+    parser.add_argument("--date", help="운세 날짜 (YYYY-MM-DD, 기본값: KST 오늘)")
+    parser.add_argument("--provider", choices=tuple(BACKENDS), default="claude")
+    parser.add_argument("--model", help="모델 (기본값: 제공자별 기본 모델)")
+    parser.add_argument("--state", default="batch_state.db", help="진행 상태 파일")
+    parser.add_argument("--path", default=os.getenv("FORTUNE_POOL_PATH", "fortune_pool.db"), help="운세 풀 파일")
+    parser.add_argument("-o", "--output", help="users 작업 결과 JSON Lines 파일")
+    parser.add_argument("--cache", action="store_true", help="users 작업 결과를 운세 캐시에도 저장")
+    parser.add_argument("--batch-size", type=int, help="배치 하나의 최대 요청 수")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="첫 상태 확인 간격(초)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="요청별 최대 제출 횟수")
+    parser.add_argument("--mock", action="store_true", help="로컬 가짜 배치 서버 사용")
+    args = parser.parse_args()
+
+    day = date.fromisoformat(args.date) if args.date else today_kst()
+    mock = None
+    if args.mock:
+        mock = MockBatchServer().start()
+        os.environ.update({
+            "ANTHROPIC_BASE_URL": mock.url, "ANTHROPIC_API_KEY": "mock",
+            "OPENAI_BASE_URL": f"{mock.url}/v1", "OPENAI_API_KEY": "mock",
+        })
+        args.poll_interval = min(args.poll_interval, 0.2)
+
+    backend = BACKENDS[args.provider](model=args.model or DEFAULT_MODELS[args.provider])
+    state = BatchState(args.state)
+    closers = []
+
+    if args.job == "pool":
+        requests = pool_requests(day, list(ZODIAC_ANIMALS.values()))
+        sink = PoolSink(FortunePool(args.path))
+    else:
+        if not args.users_file or not (args.output or args.cache):
+            parser.error("users 작업에는 사용자 파일과 -o 또는 --cache 가 필요합니다")
+        from bulk_fortune import load_users
+
+        requests = user_requests(load_users(args.users_file), day)
+        sinks = []
+        if args.output:
+            jsonl = JsonlSink(args.output)
+            sinks.append(jsonl)
+            closers.append(jsonl.close)
+        if args.cache:
+            from fortune_cache import create_fortune_cache_from_env
+            sinks.append(CacheSink(create_fortune_cache_from_env()))
+
+        def sink(meta, text, provider):
+            for target in sinks:
+                target(meta, text, provider)
+
+    start = time.perf_counter()
+    try:
+        run_job(f"{args.job}:{day.isoformat()}", requests, backend, state, sink,
+                batch_size=args.batch_size, poll_interval=args.poll_interval, max_attempts=args.max_attempts)
+    finally:
+        for close in closers:
+            close()
+        if mock is not None:
+            mock.stop()
+    print(f"소요 시간 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+여러 AI 제공자(Gemini, Claude, OpenAI)를 묶는 라우터
+
+- 제공자별 지연 시간(p50/p95)과 오류율 추적
+- 헤징(hedging): 1순위 제공자가 평소 p95 안에 응답하지 않으면 같은 프롬프트를
+  2순위 제공자에게도 보내고 먼저 온 응답을 사용
+- 제공자별 서킷 브레이커: 연속으로 실패하는 제공자는 잠시 건너뜀
+
+generate() 는 스레드 풀에서, agenerate() 는 이벤트 루프에서(ASGI 모드) 같은 규칙으로 동작합니다.
+제공자는 prompt -> 응답 문자열 함수이면 무엇이든 될 수 있으므로
+지연을 주입한 가짜 제공자로도 동작을 확인할 수 있습니다. (python llm_router.py)
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from client_registry import available_providers, get_client
+from metrics import metrics
+
+
+class ProviderError(RuntimeError):
+    """제공자가 오류 응답을 반환함"""
+
+
+class AllProvidersFailed(RuntimeError):
+    """사용 가능한 모든 제공자가 실패함"""
+
+
+class LatencyStats:
+    """최근 N건의 지연 시간과 성공 여부"""
+
+    def __init__(self, window=200):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            if ok:
+                self._latencies.append(latency)
+            self._outcomes.append(ok)
+
+    def percentile(self, p):
+        """성공한 호출의 지연 시간 백분위수 (기록이 없으면 None)"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def error_rate(self):
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def __len__(self):
+        return len(self._latencies)
+
+
+class CircuitBreaker:
+    """연속 실패가 쌓이면 일정 시간 호출을 막는 차단기"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self._lock = threading.Lock()
+
+    def available(self):
+        """
+        지금 호출 후보가 될 수 있는지 (상태를 바꾸지 않는 확인)
+
+        실제로 호출할 때만 allow() 로 시험 호출 자리를 잡아야 합니다.
+        """
+        with self._lock:
+            return self.state == self.CLOSED or self._trial_due(time.monotonic())
+
+    def allow(self):
+        """
+        지금 호출해도 되는지 여부 (열린 상태가 끝나면 시험 호출 1건 허용)
+
+        시험 호출이 reset_timeout 안에 끝나지 않으면(응답 없이 멈춤) 자리를 풀고 다음 시험 호출을 허용합니다.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self._trial_due(now):
+                self.state = self.HALF_OPEN
+                self._trial_at = now
+                return True
+            return False
+
+    def _trial_due(self, now):
+        if self.state == self.OPEN:
+            return now - self._opened_at >= self.reset_timeout
+        if self.state == self.HALF_OPEN:
+            return now - self._trial_at >= self.reset_timeout
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class Provider:
+    """라우터에 등록되는 AI 제공자"""
+
+    def __init__(self, name, call, failure_threshold=5, reset_timeout=30.0, acall=None):
+        """
+        Args:
+            name: 제공자 이름
+            call: prompt를 받아 응답 문자열을 반환하는 함수
+                (system 프롬프트를 쓰는 요청이면 system= 키워드 인자도 받아야 함)
+            acall: call 의 코루틴 함수 버전 (없으면 agenerate 에서 call 을 스레드로 실행)
+        """
+        self.name = name
+        self.call = call
+        self.acall = acall
+        self.stats = LatencyStats()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+
+class LLMRouter:
+    """헤징 + 서킷 브레이커를 갖춘 AI 제공자 라우터"""
+
+    def __init__(self, providers, hedge_percentile=95, default_hedge_delay=2.0,
+                 min_samples=20, max_parallel=2, max_workers=16):
+        """
+        Args:
+            providers: 우선순위 순서의 Provider 목록
+            hedge_percentile: 1순위 제공자의 이 백분위수 지연이 지나면 다음 제공자에게도 요청
+            default_hedge_delay: 지연 기록이 부족할 때 사용할 헤징 대기 시간(초)
+            min_samples: 백분위수를 믿기 위한 최소 기록 수
+            max_parallel: 한 요청에 동시에 보낼 최대 제공자 수
+        """
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.max_parallel = max_parallel
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+        self._tasks = set()  # 헤징에서 진 비동기 호출도 끝까지 기록되도록 참조 유지
+        self._lock = threading.Lock()
+
+        # 통계 (여러 요청 스레드에서 갱신)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def hedge_delay(self, provider):
+        """헤징 요청을 보내기 전 기다릴 시간(초)"""
+        if len(provider.stats) < self.min_samples:
+            return self.default_hedge_delay
+        return provider.stats.percentile(self.hedge_percentile)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _next_allowed(self, remaining):
+        """
+        남은 후보 중 지금 실제로 호출할 제공자 (시험 호출 자리는 여기서만 잡음)
+
+        후보를 고를 때 allow() 를 미리 부르면 호출하지 않은 제공자가 시험 호출 상태로 남아
+        계속 차단되므로, 보내기 직전에 확인합니다. 없으면 None.
+        """
+        while remaining:
+            provider = remaining.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def _record(self, provider, elapsed, ok):
+        provider.stats.record(elapsed, ok)
+        metrics.observe("llm_provider_seconds", elapsed, provider=provider.name)
+        if ok:
+            provider.breaker.record_success()
+        else:
+            provider.breaker.record_failure()
+            metrics.inc("llm_provider_failures_total", provider=provider.name)
+
+    @staticmethod
+    def _check(response):
+        if not response or response.startswith("오류 발생"):
+            raise ProviderError(response or "빈 응답")
+        return response
+
+    def _call(self, provider, prompt, system=None):
+        start = time.perf_counter()
+        try:
+            if system is None:
+                response = self._check(provider.call(prompt))
+            else:
+                response = self._check(provider.call(prompt, system=system))
+        except Exception:
+            self._record(provider, time.perf_counter() - start, False)
+            raise
+        self._record(provider, time.perf_counter() - start, True)
+        return response
+
+    async def _acall(self, provider, prompt, system=None):
+        import asyncio
+
+        kwargs = {} if system is None else {"system": system}
+        start = time.perf_counter()
+        try:
+            if provider.acall is not None:
+                response = self._check(await provider.acall(prompt, **kwargs))
+            else:
+                response = self._check(await asyncio.to_thread(provider.call, prompt, **kwargs))
+        except Exception:
+            self._record(provider, time.perf_counter() - start, False)
+            raise
+        self._record(provider, time.perf_counter() - start, True)
+        return response
+
+    def _candidates(self):
+        """차단되지 않은 제공자 (우선순위 순)"""
+        if not self.providers:
+            raise AllProvidersFailed("등록된 AI 제공자가 없습니다. API 키를 확인해주세요.")
+        remaining = [p for p in self.providers if p.breaker.available()]
+        if not remaining:
+            raise AllProvidersFailed("사용 가능한 AI 제공자가 없습니다. (모두 차단됨)")
+        return remaining
+
+    def generate(self, prompt, system=None):
+        """
+        프롬프트를 제공자에게 보내고 가장 먼저 성공한 응답을 반환
+
+        Args:
+            prompt: 사용자 프롬프트
+            system: 요청마다 같은 고정 지침 (제공자의 프롬프트 캐싱 대상)
+
+        Returns:
+            tuple: (응답 텍스트, 응답한 제공자 이름)
+
+        Raises:
+            AllProvidersFailed: 모든 제공자가 실패했거나 차단된 경우
+        """
+        remaining = self._candidates()
+        pending = {}
+        errors = []
+
+        def launch():
+            provider = self._next_allowed(remaining)
+            if provider is not None:
+                pending[self._pool.submit(self._call, provider, prompt, system)] = provider
+            return provider
+
+        primary = launch()
+        if primary is None:
+            raise AllProvidersFailed("사용 가능한 AI 제공자가 없습니다. (모두 차단됨)")
+        hedge_at = time.monotonic() + self.hedge_delay(primary)
+
+        while pending:
+            timeout = None
+            if remaining and len(pending) < self.max_parallel:
+                timeout = max(0.0, hedge_at - time.monotonic())
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 1순위가 평소보다 느림 → 다음 제공자에게도 요청
+                hedged = launch()
+                if hedged is not None:
+                    self._count("hedges")
+                    hedge_at = time.monotonic() + self.hedge_delay(hedged)
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    if provider is not primary:
+                        self._count("hedge_wins")
+                    return future.result(), provider.name
+                errors.append(f"{provider.name}: {error}")
+
+            if not pending and remaining:
+                # 실패한 제공자 대신 즉시 다음 제공자로 전환
+                failed_over = launch()
+                if failed_over is not None:
+                    self._count("failovers")
+                    hedge_at = time.monotonic() + self.hedge_delay(failed_over)
+
+        raise AllProvidersFailed("; ".join(errors))
+
+    async def agenerate(self, prompt, system=None):
+        """
+        generate 의 비동기 버전 (같은 헤징/장애 전환/서킷 브레이커 규칙)
+
+        Returns:
+            tuple: (응답 텍스트, 응답한 제공자 이름)
+
+        Raises:
+            AllProvidersFailed: 모든 제공자가 실패했거나 차단된 경우
+        """
+        import asyncio
+
+        remaining = self._candidates()
+        pending = {}
+        errors = []
+
+        def launch():
+            provider = self._next_allowed(remaining)
+            if provider is not None:
+                task = asyncio.ensure_future(self._acall(provider, prompt, system))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                pending[task] = provider
+            return provider
+
+        primary = launch()
+        if primary is None:
+            raise AllProvidersFailed("사용 가능한 AI 제공자가 없습니다. (모두 차단됨)")
+        hedge_at = time.monotonic() + self.hedge_delay(primary)
+
+        while pending:
+            timeout = None
+            if remaining and len(pending) < self.max_parallel:
+                timeout = max(0.0, hedge_at - time.monotonic())
+
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedged = launch()
+                if hedged is not None:
+                    self._count("hedges")
+                    hedge_at = time.monotonic() + self.hedge_delay(hedged)
+                continue
+
+            for task in done:
+                provider = pending.pop(task)
+                error = task.exception()
+                if error is None:
+                    if provider is not primary:
+                        self._count("hedge_wins")
+                    return task.result(), provider.name
+                errors.append(f"{provider.name}: {error}")
+
+            if not pending and remaining:
+                failed_over = launch()
+                if failed_over is not None:
+                    self._count("failovers")
+                    hedge_at = time.monotonic() + self.hedge_delay(failed_over)
+
+        raise AllProvidersFailed("; ".join(errors))
+
+    def stats(self):
+        """제공자별 지연/오류율과 헤징 통계"""
+        with self._lock:
+            counts = {"hedges": self.hedges, "hedge_wins": self.hedge_wins, "failovers": self.failovers}
+        return {
+            **counts,
+            "providers": {
+                p.name: {
+                    "p50": p.stats.percentile(50),
+                    "p95": p.stats.percentile(95),
+                    "error_rate": p.stats.error_rate(),
+                    "circuit": p.breaker.state,
+                }
+                for p in self.providers
+            },
+        }
+
+
+def create_router_from_env():
+    """
+    환경변수 설정으로 라우터 생성
+
+    FORTUNE_LLM_PROVIDERS: 우선순위 순서의 제공자 목록 (기본값: gemini,claude,openai)
+        API 키가 설정된 제공자만 등록됩니다.
+    FORTUNE_HEDGE_PERCENTILE: 헤징 기준 백분위수 (기본값: 95)
+    """
+    order = os.getenv("FORTUNE_LLM_PROVIDERS", "gemini,claude,openai").split(",")
+    configured = available_providers()
+    providers = []
+    for name in (n.strip() for n in order):
+        if name in configured:
+            providers.append(Provider(
+                name,
+                lambda prompt, system=None, name=name: get_client(name).chat(prompt, max_tokens=2048, system=system),
+                acall=lambda prompt, system=None, name=name: get_client(name).achat(
+                    prompt, max_tokens=2048, system=system
+                ),
+            ))
+    return LLMRouter(
+        providers,
+        hedge_percentile=float(os.getenv("FORTUNE_HEDGE_PERCENTILE", "95")),
+    )
+
+
+def main():
+    """지연을 주입한 가짜 제공자로 헤징 효과 확인"""
+    import random
+
+    def fake(name, base, slow_ratio, slow):
+        def call(prompt):
+            time.sleep(slow if random.random() < slow_ratio else base)
+            return f"{name} 응답"
+        return call
+
+    def run(max_parallel):
+        router = LLMRouter(
+            [
+                Provider("primary", fake("primary", 0.05, 0.04, 1.0)),
+                Provider("secondary", fake("secondary", 0.08, 0.0, 0.0)),
+            ],
+            default_hedge_delay=0.2,
+            min_samples=10,
+            max_parallel=max_parallel,
+        )
+        latencies = []
+        for _ in range(200):
+            start = time.perf_counter()
+            router.generate("테스트")
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(
+            f"{'헤징' if max_parallel > 1 else '단일'} | p50 {latencies[99] * 1000:5.0f}ms | "
+            f"p99 {latencies[197] * 1000:5.0f}ms | max {latencies[-1] * 1000:5.0f}ms | "
+            f"헤징 {router.hedges}회 (승리 {router.hedge_wins}회)"
+        )
+
+    # 1순위 제공자가 4% 확률로 1초씩 멈추는 상황
+    run(max_parallel=1)
+    run(max_parallel=2)
+
+    # 차단이 풀린 하위 제공자: 1순위가 먼저 답해 호출되지 않았으면 시험 호출 상태로 남지 않아야 함
+    backup = Provider("backup", fake("backup", 0.0, 0.0, 0.0), failure_threshold=1, reset_timeout=0.05)
+    router = LLMRouter([Provider("primary", fake("primary", 0.0, 0.0, 0.0)), backup])
+    backup.breaker.record_failure()
+    time.sleep(0.06)
+    router.generate("테스트")
+    assert backup.breaker.state == CircuitBreaker.OPEN and backup.breaker.available()
+
+    # 멈춘 시험 호출: reset_timeout 이 지나면 다음 시험 호출을 허용
+    assert backup.breaker.allow() and not backup.breaker.allow()
+    time.sleep(0.06)
+    assert backup.breaker.allow()
+    print("서킷 브레이커: 호출하지 않은 제공자/멈춘 시험 호출이 계속 차단되지 않음 확인")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+동기(WSGI) / 비동기(ASGI) 실행 모드 부하 테스트
+
+실제 Gemini 대신 지연 시간만 흉내 내는 가짜 클라이언트를 사용하므로
+API 키나 네트워크 없이 한 프로세스가 동시에 몇 건을 처리하는지 비교할 수 있습니다.
+
+실행:
+    python loadtest.py --concurrency 200 --latency 1.0 --threads 8
+    python loadtest.py --coalesce-check --concurrency 20   # 같은 사용자 동시 요청 병합 확인
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import httpx
+import uvicorn
+
+import client_registry
+import fortune_app
+from asgi_app import app as asgi_app
+from llm_router import LLMRouter, Provider
+
+FORTUNE_TEXT = """**오늘의 운세**
+가짜 운세입니다.
+
+**행운의 로또 번호**
+1, 2, 3, 4, 5, 6
+
+**행운의 색상**
+빨간색
+
+**추천 상품**
+빨간색 티셔츠
+"""
+
+
+class StubGeminiClient:
+    """지연 시간만 흉내 내는 가짜 Gemini 클라이언트"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0  # 상류(AI) 호출 수 (병합 확인용)
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def chat(self, message, max_tokens=2048, system=None):
+        self._count()
+        time.sleep(self.latency)
+        return FORTUNE_TEXT
+
+    async def achat(self, message, max_tokens=2048, system=None):
+        self._count()
+        await asyncio.sleep(self.latency)
+        return FORTUNE_TEXT
+
+    def stream_chat(self, message, max_tokens=2048, system=None):
+        self._count()
+        time.sleep(self.latency)
+        for line in FORTUNE_TEXT.splitlines(keepends=True):
+            yield line
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """고정 크기 스레드 풀 WSGI 서버 (gunicorn gthread 워커와 같은 조건)"""
+
+    def __init__(self, *args, threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_wsgi(port, threads):
+    server = make_server(
+        "127.0.0.1", port, fortune_app.app,
+        server_class=lambda *a, **k: PooledWSGIServer(*a, threads=threads, **k),
+        handler_class=QuietHandler,
+    )
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi(port):
+    config = uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning", backlog=2048)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return stop
+
+
+async def fire(port, concurrency):
+    """
+    서로 다른 사용자로 동시에 요청 (캐시 적중 방지)
+
+    Returns:
+        (총 시간, 성공 요청 지연 목록, 실패 응답 코드별 건수)
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post(
+                f"http://127.0.0.1:{port}/get_fortune",
+                json={"name": f"부하{time.time_ns()}-{i}", "birth_date": "1990-01-01", "gender": "남성"},
+            )
+            return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(latency for status, latency in results if status < 400)
+        failures = Counter(status for status, latency in results if status >= 400)
+        return elapsed, latencies, failures
+
+
+async def fire_same_user(port, path, concurrency, name):
+    """
+    같은 사용자로 동시에 요청 (premium: 운세 풀을 건너뛰고 AI 경로로)
+
+    Returns:
+        list: (응답 코드, 본문) 목록
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    body = {"name": name, "birth_date": "1990-01-01", "gender": "남성", "premium": True}
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one():
+            response = await client.post(f"http://127.0.0.1:{port}{path}", json=body)
+            return response.status_code, response.text
+
+        return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+
+def coalesce_check(stub, concurrency):
+    """
+    /get_fortune, /stream_fortune 에 같은 사용자 요청 N건을 동시에 보내
+    fortune_flight 로 병합돼 상류(AI) 호출이 정확히 1번인지 확인
+
+    leader 가 예외를 던져도 기다린 요청이 500 이 아니라 백업 운세를 받는지도 확인합니다.
+    """
+    cases = [
+        ("WSGI", 8703, "/get_fortune", lambda: start_wsgi(8703, concurrency)),
+        ("WSGI", 8704, "/stream_fortune", lambda: start_wsgi(8704, concurrency)),
+        ("ASGI", 8705, "/get_fortune", lambda: start_asgi(8705)),
+    ]
+    for mode, port, path, start in cases:
+        stop = start()
+        before = stub.calls
+        results = asyncio.run(fire_same_user(port, path, concurrency, f"병합{time.time_ns()}"))
+        stop()
+        calls = stub.calls - before
+        statuses = Counter(status for status, text in results)
+        assert statuses == {200: concurrency}, statuses
+        assert calls == 1, f"{mode} {path}: 상류 호출 {calls}번"
+        if path == "/stream_fortune":
+            assert all("event: done" in text for status, text in results)
+        print(f"{mode:5s} {path:16s} | 동시 {concurrency}건 → 상류 호출 {calls}번")
+
+    # leader 실패: 기다린 요청도 모두 백업 운세 (200)
+    generate_fortune = fortune_app.generate_fortune
+
+    def failing(*args):
+        stub.chat("실패")
+        raise RuntimeError("leader 실패")
+
+    fortune_app.generate_fortune = failing
+    stop = start_wsgi(8706, concurrency)
+    try:
+        before = stub.calls
+        results = asyncio.run(fire_same_user(8706, "/get_fortune", concurrency, f"실패{time.time_ns()}"))
+    finally:
+        stop()
+        fortune_app.generate_fortune = generate_fortune
+    statuses = Counter(status for status, text in results)
+    assert statuses == {200: concurrency}, statuses
+    assert stub.calls - before == 1
+    assert all(json.loads(text).get("is_backup") for status, text in results)
+    print(f"WSGI  /get_fortune     | leader 실패 → 동시 {concurrency}건 모두 백업 운세")
+    print(f"병합 통계: {fortune_app.fortune_flight.stats()}")
+
+
+def report(mode, elapsed, latencies, failures):
+    failed = ", ".join(f"{status} {count}건" for status, count in sorted(failures.items())) or "없음"
+    if not latencies:
+        print(f"{mode:5s} | 성공 0건 | 실패 {failed}")
+        return
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{mode:5s} | 성공 {len(latencies):4d}건 | 총 {elapsed:6.2f}s | "
+        f"처리량 {len(latencies) / elapsed:7.1f} req/s | "
+        f"p50 {statistics.median(latencies):6.2f}s | p95 {p95:6.2f}s | 실패 {failed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WSGI/ASGI 부하 테스트")
+    parser.add_argument("--concurrency", type=int, default=200, help="동시 요청 수")
+    parser.add_argument("--latency", type=float, default=1.0, help="가짜 AI 응답 지연(초)")
+    parser.add_argument("--threads", type=int, default=8, help="WSGI 워커 스레드 수")
+    parser.add_argument("--coalesce-check", action="store_true",
+                        help="같은 사용자 동시 요청이 상류 호출 1번으로 병합되는지만 확인")
+    args = parser.parse_args()
+
+    # 가짜 백엔드 설치 (마감 시간은 지연보다 넉넉하게)
+    stub = StubGeminiClient(args.latency)
+    client_registry._clients["gemini"] = stub
+    # WSGI(generate)와 ASGI(agenerate)가 같은 라우터 경로를 거치도록 동기/비동기 호출을 모두 등록
+    fortune_app.llm_router = LLMRouter([Provider("gemini", stub.chat, acall=stub.achat)])
+    fortune_app.llm_executor.timeout = 600
+    fortune_app.llm_executor.max_queue = args.concurrency
+    fortune_app.product_executor.max_queue = args.concurrency
+    # 모든 요청이 127.0.0.1 에서 오므로 클라이언트별 한도(429)와 동시 호출 상한(백업 응답)을 끔
+    # (asgi_app 도 같은 admission 객체를 import 하므로 속성을 바꿔 두 모드에 함께 적용)
+    fortune_app.admission.rate = 0
+    fortune_app.admission.max_inflight = 0
+
+    if args.coalesce_check:
+        coalesce_check(stub, args.concurrency)
+        return
+
+    print(f"동시 요청 {args.concurrency}건, AI 지연 {args.latency}s, WSGI 스레드 {args.threads}개\n")
+
+    stop = start_wsgi(8701, args.threads)
+    report("WSGI", *asyncio.run(fire(8701, args.concurrency)))
+    stop()
+
+    stop = start_asgi(8702)
+    report("ASGI", *asyncio.run(fire(8702, args.concurrency)))
+    stop()
+
+
+if __name__ == "__main__":
+    main()
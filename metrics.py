@@ -0,0 +1,230 @@
+"""
+요청 단계별 지연 시간 계측과 Prometheus /metrics
+
+    with metrics.span("products"):
+        products = find_products(color)
+    metrics.inc("fortune_backup_total")
+
+span 은 단계별 히스토그램(fortune_stage_seconds{stage=...})에 걸린 시간을 기록하고,
+카운터는 백업 모드 사용, 제공자별 실패 등을 셉니다. 모두 프로세스 메모리에만 있으므로
+워커/서버리스 인스턴스마다 따로 집계됩니다.
+
+요청당 오버헤드 측정: python metrics.py
+"""
+import functools
+import threading
+import time
+
+from http_session import LatencyHistogram
+
+STAGE_METRIC = "fortune_stage_seconds"
+
+
+class Counter:
+    """단조 증가 카운터"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Span:
+    """with 블록의 실행 시간을 히스토그램에 기록"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class MetricsRegistry:
+    """카운터/히스토그램 모음 + Prometheus 텍스트 형식 출력"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # (이름, 레이블) -> Counter
+        self._histograms = {}  # (이름, 레이블) -> LatencyHistogram
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        """지표 설명 (# HELP 줄)"""
+        self._help[name] = help_text
+
+    def _get(self, table, factory, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = table.get(key)
+        if metric is None:
+            with self._lock:
+                metric = table.get(key)
+                if metric is None:
+                    metric = table[key] = factory()
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(self._counters, Counter, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(self._histograms, LatencyHistogram, name, labels)
+
+    def inc(self, name, amount=1, **labels):
+        """카운터 증가"""
+        self.counter(name, **labels).inc(amount)
+
+    def observe(self, name, value, **labels):
+        """히스토그램에 값(초) 기록"""
+        self.histogram(name, **labels).observe(value)
+
+    def span(self, stage):
+        """
+        단계 실행 시간 측정
+
+        Args:
+            stage: 단계 이름 (예: "llm_wait", "products", "render", "serialize")
+        """
+        return Span(self.histogram(STAGE_METRIC, stage=stage))
+
+    def timed(self, stage):
+        """함수 전체 실행 시간을 span 으로 기록하는 데코레이터"""
+        def decorator(fn):
+            histogram = self.histogram(STAGE_METRIC, stage=stage)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with Span(histogram):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_collector(self, collect):
+        """
+        /metrics 를 만들 때마다 호출할 수집 함수 등록
+
+        Args:
+            collect: (이름, 레이블 dict, 값[, 종류]) 목록을 반환하는 함수
+                (종류는 "gauge" 기본, 누적값은 "counter" - 이름은 _total 로 끝나야 rate() 로 볼 수 있음,
+                "histogram" 이면 값은 LatencyHistogram.snapshot() 결과)
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """Prometheus 텍스트 형식 (text/plain; version=0.0.4)"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), counter in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {counter.value}")
+
+        def histogram_lines(name, labels, snapshot):
+            header(name, "histogram")
+            for bound, count in snapshot["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+        for (name, labels), histogram in histograms:
+            histogram_lines(name, labels, histogram.snapshot())
+
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                print(f"지표 수집 실패: {e}")
+                continue
+            for sample in samples:
+                name, labels, value = sample[:3]
+                kind = sample[3] if len(sample) > 3 else "gauge"
+                labels = tuple(sorted(labels.items()))
+                if kind == "histogram":
+                    histogram_lines(name, labels, value)
+                    continue
+                header(name, kind)
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe(STAGE_METRIC, "요청 단계별 소요 시간(초)")
+metrics.describe("fortune_results_total", "운세 응답 수 (source: cache/pool/ai/backup/error/coalesced)")
+metrics.describe("fortune_backup_total", "백업(템플릿) 모드로 생성한 운세 수")
+metrics.describe("llm_provider_seconds", "AI 제공자 호출 시간(초)")
+metrics.describe("llm_provider_failures_total", "AI 제공자별 실패 수")
+metrics.describe("http_client_request_seconds", "외부 HTTP API 시도별 응답 시간(초)")
+metrics.describe("http_client_requests_total", "외부 HTTP API 요청 수 (재시도 제외)")
+metrics.describe("http_client_retries_total", "외부 HTTP API 재시도 수")
+metrics.describe("http_client_failures_total", "재시도 후에도 실패한 외부 HTTP API 요청 수")
+metrics.describe("product_cache_lookups_total", "상품 캐시 조회 수 (result: hit/stale_hit/miss/coalesced)")
+metrics.describe("product_cache_refreshes_total", "오래된 상품 검색 결과의 백그라운드 새로 고침 수")
+metrics.describe("product_cache_upstream_calls_total", "상품 캐시가 쿠팡 API 를 호출한 수")
+metrics.describe("llm_prompt_requests_total", "사용량을 기록한 AI 제공자 요청 수")
+metrics.describe("llm_prompt_cache_hits_total", "프롬프트 캐시에서 입력을 읽은 AI 요청 수")
+metrics.describe("llm_prompt_tokens_total", "AI 입력 토큰 수 (kind: input/cache_read/cache_write)")
+
+
+def main():
+    """요청 하나에 해당하는 span/카운터 기록 비용 측정"""
+    registry = MetricsRegistry()
+    stages = ("parse", "cache", "llm_wait", "products", "render", "serialize")
+    n = 20000
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with registry.span("request"):
+            for stage in stages:
+                with registry.span(stage):
+                    pass
+            registry.inc("fortune_results_total", source="ai")
+            registry.inc("fortune_backup_total")
+    elapsed = time.perf_counter() - start
+    print(f"요청당 계측 오버헤드: {elapsed / n * 1e6:.1f}µs (span {len(stages) + 1}개, 카운터 2개)")
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"/metrics 생성: {(time.perf_counter() - start) * 1e3:.2f}ms, {len(text)}B")
+
+
+if __name__ == "__main__":
+    main()
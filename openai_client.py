@@ -2,7 +2,11 @@
 OpenAI API 클라이언트
 """
 import os
-from openai import OpenAI
+import time
+from openai import AsyncOpenAI, OpenAI
+
+from async_llm import on_shared_loop, run_sync
+from prompt_cache import prompt_cache_stats
 
 class OpenAIClient:
     """OpenAI API를 사용하기 위한 클라이언트 클래스"""
@@ -21,28 +25,55 @@ class OpenAIClient:
                 "환경변수 OPENAI_API_KEY를 설정하거나 api_key 파라미터를 제공하세요."
             )
         self.client = OpenAI(api_key=self.api_key)
+        self._async_client = None  # 공용 이벤트 루프에서 처음 쓸 때 생성
+    
+    def warm_up(self):
+        """모델 목록을 조회해 API 연결을 미리 열어둡니다."""
+        self.client.models.list()
+    
+    async def _achat(self, message, model, max_tokens, system):
+        """실제 호출 (항상 공용 이벤트 루프에서 실행)"""
+        messages = [{"role": "user", "content": message}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        try:
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(api_key=self.api_key)
+            start = time.perf_counter()
+            response = await self._async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens
+            )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                details = getattr(usage, "prompt_tokens_details", None)
+                cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+                prompt_cache_stats.record("openai", usage.prompt_tokens, cached, 0, time.perf_counter() - start)
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"오류 발생: {str(e)}"
     
-    def chat(self, message, model="gpt-3.5-turbo", max_tokens=2048):
+    def chat(self, message, model="gpt-3.5-turbo", max_tokens=2048, system=None):
         """
-        OpenAI와 대화하기
+        OpenAI와 대화하기 (공용 이벤트 루프의 achat 에 위임)
         
         Args:
             message: 사용자 메시지
             model: 사용할 모델 (기본값: gpt-3.5-turbo)
             max_tokens: 최대 토큰 수
+            system: 요청마다 같은 고정 지침 (맨 앞에 두면 OpenAI가 접두사를 자동 캐싱)
             
         Returns:
             OpenAI의 응답 메시지
         """
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": message}
-                ],
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+            return run_sync(self._achat(message, model, max_tokens, system))
         except Exception as e:
             return f"오류 발생: {str(e)}"
-
+    
+    async def achat(self, message, model="gpt-3.5-turbo", max_tokens=2048, system=None):
+        """
+        OpenAI와 대화하기 (비동기 버전, 인자/반환값은 chat 과 같음)
+        """
+        return await on_shared_loop(self._achat(message, model, max_tokens, system))
@@ -0,0 +1,180 @@
+"""
+쿠팡 상품 검색 캐시 (stale-while-revalidate)
+
+행운의 색상은 15가지뿐이라 검색어 종류도 몇 개 되지 않습니다. 검색 결과를 검색어별로
+저장해 두고, 유효 기간(ttl)이 지난 결과는 일단 바로 돌려준 뒤 백그라운드에서 새로 고칩니다.
+같은 검색어로 동시에 캐시 미스가 나면 쿠팡 API는 한 번만 호출합니다 (single_flight).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from single_flight import FlightTimeout, SingleFlight
+
+
+class _Entry:
+    __slots__ = ("products", "fresh_until", "stale_until")
+
+    def __init__(self, products, fresh_until, stale_until):
+        self.products = products
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ProductCache:
+    """검색어별 상품 검색 결과 캐시"""
+
+    def __init__(self, fetch, ttl=3600, stale_ttl=86400, empty_ttl=60, wait_timeout=6.0):
+        """
+        Args:
+            fetch: (keyword, limit) -> 상품 리스트 함수 (예: CoupangClient().search_products)
+            ttl: 결과를 새것으로 보는 시간(초)
+            stale_ttl: 오래된 결과라도 돌려줄 수 있는 최대 시간(초)
+            empty_ttl: 빈 결과(API 실패 등)를 보관하는 시간(초)
+            wait_timeout: 같은 검색어의 진행 중인 검색을 기다리는 최대 시간(초)
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.empty_ttl = empty_ttl
+        self.wait_timeout = wait_timeout
+        self._entries = {}
+        self._flight = SingleFlight(timeout=wait_timeout)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="product-refresh")
+
+        # 통계
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.upstream_max = 0.0
+
+    def get(self, keyword, limit=3):
+        """
+        상품 검색 (캐시 우선)
+
+        Returns:
+            list: 상품 정보 리스트
+        """
+        key = (keyword, limit)
+        products = self._peek(key)
+        if products is not None:
+            return products
+
+        try:
+            # 다른 요청이 이미 검색 중이면 그 결과를 함께 사용
+            return self._flight.do(key, self._fetch_miss, key)
+        except FlightTimeout:
+            return []
+
+    async def aget(self, keyword, limit=3):
+        """
+        get 의 비동기 버전
+
+        캐시 적중은 이벤트 루프에서 바로 반환하고, 미스일 때만 스레드에서 검색해
+        동기 호출과 같은 검색어 병합을 공유합니다.
+        """
+        products = self._peek((keyword, limit))
+        if products is not None:
+            return products
+        import asyncio
+
+        return await asyncio.to_thread(self.get, keyword, limit)
+
+    def _peek(self, key):
+        """새 결과나 오래된 결과가 있으면 반환 (오래된 결과는 백그라운드 새로 고침 예약)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.stale_until:
+                return None
+            if now < entry.fresh_until:
+                self.hits += 1
+                return entry.products
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                self._refresher.submit(self._refresh, key)
+            return entry.products
+
+    def _fetch_miss(self, key):
+        with self._lock:
+            self.misses += 1
+        return self._fetch_and_store(key)
+
+    def _refresh(self, key):
+        try:
+            self._fetch_and_store(key, keep_stale=True)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            print(f"상품 캐시 새로 고침 실패: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _fetch_and_store(self, key, keep_stale=False):
+        start = time.perf_counter()
+        try:
+            products = self.fetch(*key) or []
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.upstream_calls += 1
+                self.upstream_seconds += elapsed
+                self.upstream_max = max(self.upstream_max, elapsed)
+
+        now = time.monotonic()
+        with self._lock:
+            if products:
+                self._entries[key] = _Entry(products, now + self.ttl, now + self.stale_ttl)
+            elif not (keep_stale and key in self._entries):
+                # 빈 결과는 잠깐만 보관해 API 장애 시 매 요청마다 호출하지 않도록 함
+                self._entries[key] = _Entry(products, now + self.empty_ttl, now + self.empty_ttl)
+        return products
+
+    def stats(self):
+        """캐시 통계"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self._flight.coalesced,
+                "refreshes": self.refreshes,
+                "upstream_calls": self.upstream_calls,
+                "upstream_avg": self.upstream_seconds / self.upstream_calls if self.upstream_calls else 0.0,
+                "upstream_max": self.upstream_max,
+            }
+
+
+_product_cache = None
+_product_cache_lock = threading.Lock()
+
+
+def get_product_cache():
+    """쿠팡 검색용 프로세스 공용 캐시"""
+    global _product_cache
+    if _product_cache is None:
+        with _product_cache_lock:
+            if _product_cache is None:
+                from coupang_client import CoupangClient
+                _product_cache = ProductCache(CoupangClient().search_products)
+    return _product_cache
+
+
+def collect_product_cache_stats():
+    """/metrics 용 상품 캐시 적중/새로 고침/상류 호출 수 (metrics.register_collector 형식, 캐시를 만든 뒤에만)"""
+    if _product_cache is None:
+        return
+    stats = _product_cache.stats()
+    yield "product_cache_entries", {}, stats["entries"]
+    for result, key in (("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses"), ("coalesced", "coalesced")):
+        yield "product_cache_lookups_total", {"result": result}, stats[key], "counter"
+    yield "product_cache_refreshes_total", {}, stats["refreshes"], "counter"
+    yield "product_cache_upstream_calls_total", {}, stats["upstream_calls"], "counter"
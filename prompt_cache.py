@@ -0,0 +1,139 @@
+"""
+프롬프트 캐싱 통계
+
+운세 프롬프트는 대부분 고정된 작성 지침(system)이고 사용자 정보만 바뀝니다.
+고정 부분을 system 프롬프트로 분리하면 제공자의 프롬프트 캐싱을 쓸 수 있습니다.
+    - Claude: system 이 CLAUDE_MIN_CACHE_TOKENS 이상일 때만 cache_control 지정 (캐시 읽기는 입력 단가의 10%)
+    - Gemini: system_instruction 접두사의 암묵적 캐싱, GEMINI_CONTEXT_CACHE=1 이면 명시적 context cache
+    - OpenAI: 같은 접두사 자동 캐싱
+
+제공자마다 캐싱되는 최소 길이가 있습니다. 현재 FORTUNE_INSTRUCTIONS 는 약 300 토큰이라
+Claude 최소 길이(1024 토큰)에 못 미치므로 Claude 요청에는 캐시 지점을 붙이지 않습니다.
+(지침을 늘리면 자동으로 다시 붙습니다. 실제 적용 여부는 /metrics 의 캐시 토큰으로 확인하세요.)
+
+각 클라이언트는 요청마다 입력 토큰, 캐시에서 읽은 토큰, 지연 시간을 여기에 기록하고,
+누적값은 collect_prompt_cache_stats 로 /metrics 에 내보냅니다. (요청별 로그는 log=True 일 때만)
+실제 API로 캐시 적중/미적중 비교: python prompt_cache.py
+"""
+import threading
+
+CACHE_READ_DISCOUNT = 0.9  # 캐시 읽기 토큰은 입력 단가의 약 10%만 과금
+CLAUDE_MIN_CACHE_TOKENS = 1024  # Claude Sonnet/Opus 가 캐싱하는 최소 접두사 길이
+
+
+def estimate_tokens(text):
+    """
+    토크나이저 없이 어림한 토큰 수
+
+    영문/숫자/기호는 약 4자에 1토큰, 한글 등 비ASCII 문자는 글자당 약 1토큰으로 셉니다.
+    캐시 최소 길이를 넘는지 판단하는 용도라 정확할 필요는 없습니다.
+    """
+    wide = sum(1 for ch in text if ord(ch) > 127)
+    return wide + (len(text) - wide) // 4
+
+
+class PromptCacheStats:
+    """제공자별 프롬프트 캐시 적중/절약 토큰/지연 통계"""
+
+    def __init__(self, log=False):
+        self.log = log
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def record(self, provider, input_tokens, cached_tokens=0, cache_write_tokens=0, elapsed=None):
+        """
+        요청 한 건 기록
+
+        Args:
+            provider: 제공자 이름
+            input_tokens: 캐시 포함 전체 입력 토큰 수
+            cached_tokens: 캐시에서 읽은 입력 토큰 수
+            cache_write_tokens: 이번 요청에서 캐시에 새로 쓴 토큰 수
+            elapsed: 응답 지연(초)
+        """
+        input_tokens = input_tokens or 0
+        cached_tokens = cached_tokens or 0
+        cache_write_tokens = cache_write_tokens or 0
+        with self._lock:
+            entry = self._providers.setdefault(provider, {
+                "requests": 0, "cache_hits": 0, "input_tokens": 0, "cached_tokens": 0,
+                "cache_write_tokens": 0, "hit_latency": 0.0, "miss_latency": 0.0,
+            })
+            entry["requests"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["cached_tokens"] += cached_tokens
+            entry["cache_write_tokens"] += cache_write_tokens
+            if cached_tokens:
+                entry["cache_hits"] += 1
+            if elapsed is not None:
+                entry["hit_latency" if cached_tokens else "miss_latency"] += elapsed
+
+        if self.log:
+            latency = f" | {elapsed:.2f}s" if elapsed is not None else ""
+            print(f"[{provider}] 입력 {input_tokens} 토큰 "
+                  f"(캐시 읽기 {cached_tokens}, 캐시 쓰기 {cache_write_tokens}){latency}")
+
+    def stats(self):
+        """제공자별 누적 통계 (절약 토큰, 캐시 적중/미적중 평균 지연 포함)"""
+        with self._lock:
+            result = {}
+            for provider, entry in self._providers.items():
+                hits = entry["cache_hits"]
+                misses = entry["requests"] - hits
+                result[provider] = dict(
+                    entry,
+                    saved_tokens=int(entry["cached_tokens"] * CACHE_READ_DISCOUNT),
+                    hit_latency=entry["hit_latency"] / hits if hits else None,
+                    miss_latency=entry["miss_latency"] / misses if misses else None,
+                )
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+def collect_prompt_cache_stats():
+    """/metrics 용 제공자별 입력/캐시 토큰 누적값 (metrics.register_collector 형식)"""
+    for provider, entry in sorted(prompt_cache_stats.stats().items()):
+        labels = {"provider": provider}
+        yield "llm_prompt_requests_total", labels, entry["requests"], "counter"
+        yield "llm_prompt_cache_hits_total", labels, entry["cache_hits"], "counter"
+        for kind, key in (("input", "input_tokens"), ("cache_read", "cached_tokens"),
+                          ("cache_write", "cache_write_tokens")):
+            yield "llm_prompt_tokens_total", dict(labels, kind=kind), entry[key], "counter"
+
+
+def main():
+    """
+    Claude로 같은 고정 지침 + 다른 사용자 정보를 보내 캐시 적중 전후 비교
+
+    지침이 CLAUDE_MIN_CACHE_TOKENS 보다 짧으면 캐시 지점을 붙이지 않으므로 적중 0건이 정상입니다.
+    """
+    from datetime import datetime
+
+    from claude_client import ClaudeClient
+    from fortune_prompt import FORTUNE_INSTRUCTIONS, build_fortune_prompt
+    from zodiac import calculate_zodiac
+
+    prompt_cache_stats.log = True
+    print(f"고정 지침 약 {estimate_tokens(FORTUNE_INSTRUCTIONS)} 토큰 "
+          f"(Claude 캐시 최소 {CLAUDE_MIN_CACHE_TOKENS} 토큰)")
+    claude = ClaudeClient()
+    birth = datetime(1990, 5, 1)
+    zodiac = calculate_zodiac(birth.year)
+    for i in range(5):
+        prompt = build_fortune_prompt(f"사용자{i}", birth, "남성", zodiac, "빨간색", "1, 2, 3, 4, 5, 6")
+        claude.chat(prompt, max_tokens=512, system=FORTUNE_INSTRUCTIONS)
+
+    for provider, entry in prompt_cache_stats.stats().items():
+        print(f"\n{provider}: 요청 {entry['requests']}건, 캐시 적중 {entry['cache_hits']}건, "
+              f"절약 입력 토큰 약 {entry['saved_tokens']}")
+        print(f"  평균 지연 - 적중 {entry['hit_latency']}, 미적중 {entry['miss_latency']}")
+
+
+if __name__ == "__main__":
+    main()
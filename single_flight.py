@@ -0,0 +1,249 @@
+"""
+같은 작업의 동시 실행 병합 (single-flight)
+
+같은 사용자가 제출 버튼을 두 번 누르거나 여러 탭에서 동시에 요청하면 똑같은 AI 호출이
+여러 번 나갑니다. 같은 키로 이미 진행 중인 작업이 있으면 새로 실행하지 않고
+그 결과를 함께 받습니다.
+
+    fortune = fortune_flight.do(cache_key, generate_fortune, name, birth_date, gender, zodiac)
+
+먼저 들어온 요청(leader)만 fn 을 실행하고, 나머지는 결과를 최대 timeout 초 기다립니다.
+leader 가 실패하면 같은 예외를, 시간이 지나면 FlightTimeout 을 받으므로
+호출 측에서 백업 경로로 넘어가면 됩니다. 결과는 저장하지 않습니다 (캐시는 따로).
+
+결과를 한 번에 돌려주지 않는 작업(스트리밍 등)은 claim → (leader 면 실행 후 finish, 아니면 wait)
+으로 직접 나눠 씁니다.
+
+N개 동시 요청 → 상류 호출 1번 확인: python single_flight.py
+"""
+import threading
+
+
+class FlightTimeout(TimeoutError):
+    """진행 중인 작업의 결과를 기다리다 시간 초과"""
+
+
+class FlightAborted(RuntimeError):
+    """leader 가 결과를 내지 못하고 중단됨 (예: 스트리밍 연결 끊김)"""
+
+
+class _Call:
+    """진행 중인 작업 하나 (기다리는 요청들이 공유)"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """키별 진행 중인 작업 병합 (스레드 + asyncio)"""
+
+    def __init__(self, timeout=None):
+        """
+        Args:
+            timeout: 다른 요청이 실행 중인 작업을 기다리는 최대 시간(초, None이면 무제한)
+        """
+        self.timeout = timeout
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        key 로 진행 중인 작업이 없으면 fn(*args, **kwargs) 실행, 있으면 그 결과를 기다림
+
+        Raises:
+            FlightTimeout: 기다리는 시간 초과
+            Exception: leader 의 fn 이 던진 예외
+        """
+        call, leader = self.claim(key)
+        if not leader:
+            return self.wait(call)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def claim(self, key):
+        """
+        key 작업 참여
+
+        Returns:
+            (call, leader): leader 면 작업을 실행하고 반드시 finish 로 끝내야 하며,
+            아니면 wait(call) 로 결과를 받음
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                return call, True
+            self.coalesced += 1
+            return call, False
+
+    def wait(self, call):
+        """
+        leader 결과 대기
+
+        Raises:
+            FlightTimeout: 기다리는 시간 초과
+            Exception: leader 가 finish 로 넘긴 예외
+        """
+        if not call.event.wait(self.timeout):
+            self._count_timeout()
+            raise FlightTimeout(f"진행 중인 작업 대기 시간 초과 ({self.timeout}초)")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def finish(self, key, call, result=None, error=None):
+        """leader 작업 종료 - 기다리던 요청에 결과(또는 예외)를 전달하고 key 를 비움"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if error is not None:
+                self.failures += 1
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    async def ado(self, key, fn, *args, **kwargs):
+        """
+        do 의 비동기 버전 (fn 은 코루틴 함수, 같은 이벤트 루프 안에서 병합)
+
+        leader 요청이 끊겨도 작업은 취소되지 않고 기다리는 요청에 결과를 전달합니다.
+        """
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda done: self._finish_task(key, done))
+            with self._lock:
+                self.leaders += 1
+            return await asyncio.shield(task)
+
+        with self._lock:
+            self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self._count_timeout()
+            raise FlightTimeout(f"진행 중인 작업 대기 시간 초과 ({self.timeout}초)") from None
+
+    def _finish_task(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            with self._lock:
+                self.failures += 1
+
+    def _count_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self):
+        """병합 통계"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+            }
+
+
+def main():
+    """N개 동시 요청이 상류 호출 1번으로 처리되는지 확인 (스레드 + asyncio)"""
+    import asyncio
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    n = 50
+    calls = []
+
+    def upstream(prompt):
+        calls.append(prompt)
+        time.sleep(0.2)
+        return f"응답: {prompt}"
+
+    flight = SingleFlight(timeout=5)
+    barrier = threading.Barrier(n)
+
+    def request(_):
+        barrier.wait()
+        return flight.do("홍길동|1990-05-01|남성", upstream, "홍길동 운세")
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(request, range(n)))
+    assert len(calls) == 1 and len(set(results)) == 1, calls
+    print(f"스레드 {n}개 동시 요청 → 상류 호출 {len(calls)}번 | {flight.stats()}")
+
+    # leader 실패: 기다리던 요청도 같은 예외를 받고 각자 백업 경로로
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("AI 호출 실패")
+
+    def request_failing(_):
+        try:
+            return flight.do("실패", failing)
+        except RuntimeError:
+            return "백업"
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        assert list(pool.map(request_failing, range(5))) == ["백업"] * 5
+
+    # 시간 초과: leader 가 오래 걸리면 기다리던 요청은 FlightTimeout
+    slow_flight = SingleFlight(timeout=0.05)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(slow_flight.do, "느림", time.sleep, 0.3)
+        time.sleep(0.01)
+        try:
+            slow_flight.do("느림", time.sleep, 0.3)
+            raise AssertionError("FlightTimeout 이 발생해야 함")
+        except FlightTimeout:
+            pass
+        leader.result()
+
+    # claim/finish: leader 가 결과 없이 중단하면 기다리던 요청은 FlightAborted
+    call, is_leader = flight.claim("스트림")
+    assert is_leader and not flight.claim("스트림")[1]
+    flight.finish("스트림", call, error=FlightAborted("연결 끊김"))
+    try:
+        flight.wait(call)
+        raise AssertionError("FlightAborted 가 발생해야 함")
+    except FlightAborted:
+        pass
+    print("leader 실패/중단/대기 시간 초과 시 백업 경로 확인")
+
+    acalls = []
+
+    async def aupstream(prompt):
+        acalls.append(prompt)
+        await asyncio.sleep(0.2)
+        return f"응답: {prompt}"
+
+    async def arun():
+        aflight = SingleFlight(timeout=5)
+        results = await asyncio.gather(*(aflight.ado("키", aupstream, "운세") for _ in range(n)))
+        assert len(acalls) == 1 and len(set(results)) == 1, acalls
+        print(f"asyncio {n}개 동시 요청 → 상류 호출 {len(acalls)}번 | {aflight.stats()}")
+
+    asyncio.run(arun())
+
+
+if __name__ == "__main__":
+    main()
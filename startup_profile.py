@@ -0,0 +1,124 @@
+"""
+서버리스 콜드 스타트 import 시간 측정
+
+새 파이썬 프로세스에서 api/index.py 를 import 하고 "/" 를 한 번 요청해
+    - 전체 import 시간 (여러 번 측정한 중앙값)
+    - 패키지별 import 비용 (python -X importtime 결과를 최상위 패키지 단위로 합산)
+    - "/" 를 처리한 뒤에도 무거운 SDK(AI, requests 등)가 로드되지 않았는지
+를 보고합니다. import 시간이 예산(기본 DEFAULT_BUDGET_MS, STARTUP_BUDGET_MS 로 변경)을 넘거나
+SDK가 로드되면 종료 코드 1로 실패합니다.
+
+실행:
+    python startup_profile.py                 # 패키지별 비용 보고 + 기본 예산 검사 (CI 등)
+    python startup_profile.py --budget-ms 500 # 예산 변경 (0 이면 시간 검사 안 함)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# api/index.py import 시간 예산(ms) - 지연 import 적용 후 약 180ms 에 여유를 둔 값
+DEFAULT_BUDGET_MS = 300
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# "/" 같은 정적 응답에서는 로드되면 안 되는 모듈
+HEAVY_MODULES = (
+    "google.generativeai",
+    "anthropic",
+    "openai",
+    "requests",
+    "httpx",
+    "dotenv",
+    "numpy",
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api.index
+elapsed = time.perf_counter() - start
+status = api.index.app.test_client().get("/").status_code
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "status": status,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(importtime=False):
+    """
+    새 프로세스에서 api.index import + "/" 요청
+
+    Returns:
+        tuple: (결과 dict, -X importtime 출력 문자열)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE.format(heavy=HEAVY_MODULES)]
+    env = dict(os.environ, FORTUNE_WARMUP="0")
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def import_costs(importtime_output):
+    """
+    -X importtime 출력을 최상위 패키지별 자체 시간(ms) 합계로 변환
+
+    Returns:
+        list: [(패키지, ms), ...] 큰 순서
+    """
+    totals = defaultdict(float)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트 import 시간 측정")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="보고할 패키지 수")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help=f"import 시간 예산(ms). 넘으면 실패, 0 이면 검사 안 함 (기본 {DEFAULT_BUDGET_MS})")
+    args = parser.parse_args()
+    if args.budget_ms <= 0:
+        args.budget_ms = None
+
+    result, importtime_output = run_probe(importtime=True)
+    print("패키지별 import 비용 (자체 시간 합계):")
+    for name, ms in import_costs(importtime_output)[:args.top]:
+        print(f"  {name:30s} {ms:8.1f}ms")
+
+    samples = [run_probe()[0]["import_ms"] for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"\napi.index import: 중앙값 {median:.1f}ms (최소 {min(samples):.1f}, 최대 {max(samples):.1f}, {args.runs}회)")
+    print(f'"/" 응답: {result["status"]}, 로드된 무거운 모듈: {", ".join(result["loaded"]) or "없음"}')
+
+    failures = []
+    if result["status"] != 200:
+        failures.append(f'"/" 응답 코드 {result["status"]}')
+    if result["loaded"]:
+        failures.append(f'"/" 처리 중 무거운 모듈 로드: {", ".join(result["loaded"])}')
+    if args.budget_ms is not None and median > args.budget_ms:
+        failures.append(f"import 시간 {median:.1f}ms > 예산 {args.budget_ms:.0f}ms")
+
+    if failures:
+        print("\n❌ 콜드 스타트 회귀:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    if args.budget_ms is not None:
+        print("\n✅ 콜드 스타트 예산 통과")
+
+
+if __name__ == "__main__":
+    main()
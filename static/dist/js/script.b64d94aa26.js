@@ -0,0 +1,22 @@
+const fortuneForm=document.getElementById('fortuneForm');const formContainer=document.getElementById('formContainer');const loading=document.getElementById('loading');const resultContainer=document.getElementById('resultContainer');console.log('Script loaded v5.2 (Structured payload)');function hideLoading(){loading.classList.remove('show');loading.style.display='none';}
+function showResult(){resultContainer.classList.remove('hidden');resultContainer.setAttribute('style','display: block !important; visibility: visible !important; opacity: 1 !important;');formContainer.classList.add('hidden');formContainer.style.display='none';}
+function renderHeader(data){document.getElementById('userName').textContent=`${data.name}님의 운세`;if(data.zodiac){document.getElementById('zodiacEmoji').textContent=data.zodiac.emoji;document.getElementById('zodiacName').textContent=data.zodiac.name;}
+document.getElementById('resultDate').textContent=data.date;if(data.quote){document.getElementById('quoteText').textContent=data.quote.text;document.getElementById('quoteAuthor').textContent=data.quote.author;}}
+function createSectionNodes(section){const nodes=[];if(section.title){const title=document.createElement('h3');title.textContent=section.title;nodes.push(title);}
+const body=document.createElement('p');section.body.split('\n').forEach((line,i)=>{if(i>0)body.appendChild(document.createElement('br'));body.appendChild(document.createTextNode(line));});nodes.push(body);return nodes;}
+const NO_IMAGE="data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='200' height='200'%3E%3Crect fill='%23ddd' width='200' height='200'/%3E%3Ctext fill='%23999' font-family='sans-serif' font-size='14' x='50%25' y='50%25' text-anchor='middle' dy='.3em'%3E이미지 없음%3C/text%3E%3C/svg%3E";function createProductCard(product){const card=document.createElement('div');card.className='product-card';const link=document.createElement('a');link.href=product.link;link.target='_blank';link.rel='noopener noreferrer';const img=document.createElement('img');img.src=product.image;img.alt=product.name;img.onerror=()=>{img.onerror=null;img.src=NO_IMAGE;};const info=document.createElement('div');info.className='product-info';const name=document.createElement('h4');name.textContent=product.name;const price=document.createElement('p');price.className='product-price';price.textContent=`${product.price.toLocaleString()}원`;info.append(name,price);if(product.rating>0){const rating=document.createElement('p');rating.className='product-rating';rating.textContent=`⭐ ${product.rating} (리뷰 ${product.reviews}개)`;info.appendChild(rating);}
+link.append(img,info);card.appendChild(link);return card;}
+function renderProducts(products){const productsSection=document.getElementById('productsSection');const productsGrid=document.getElementById('productsGrid');if(!productsGrid||!productsSection){console.error("Products section elements not found!");return;}
+if(!products||products.length===0){productsSection.style.display='none';return;}
+const fragment=document.createDocumentFragment();products.forEach(product=>fragment.appendChild(createProductCard(product)));productsGrid.textContent='';productsGrid.appendChild(fragment);productsSection.style.display='block';}
+function renderPayload(payload){const started=performance.now();const fragment=document.createDocumentFragment();payload.sections.forEach(section=>fragment.append(...createSectionNodes(section)));const container=document.getElementById('fortuneContent');container.textContent='';container.appendChild(fragment);renderProducts(payload.products);console.log(`payload v${payload.version} 렌더링 ${(performance.now() - started).toFixed(2)}ms`);}
+async function readEventStream(response,onEvent){const reader=response.body.getReader();const decoder=new TextDecoder();let buffer='';while(true){const{value,done}=await reader.read();if(done)break;buffer+=decoder.decode(value,{stream:true});let boundary;while((boundary=buffer.indexOf('\n\n'))!==-1){const raw=buffer.slice(0,boundary);buffer=buffer.slice(boundary+2);let event='message';let data='';raw.split('\n').forEach(line=>{if(line.startsWith('event: '))event=line.slice(7);else if(line.startsWith('data: '))data+=line.slice(6);});onEvent(event,data?JSON.parse(data):{});}}}
+async function fetchFortuneStream(payload){const response=await fetch('/stream_fortune',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(payload)});if(!response.ok){const data=await response.json();throw new Error(data.error||'요청 실패');}
+const container=document.getElementById('fortuneContent');const preview=document.createElement('p');preview.className='fortune-stream-preview';container.textContent='';container.appendChild(preview);let text='';await readEventStream(response,(event,data)=>{if(event==='meta'){renderHeader(data);}else if(event==='delta'){if(!text){hideLoading();showResult();}
+text+=data.text;preview.textContent=text;}else if(event==='reset'){text='';preview.textContent='';}else if(event==='done'){if(data.error){throw new Error(data.error);}
+renderPayload(data.payload);}});}
+async function fetchFortuneJson(payload){const response=await fetch('/get_fortune',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(Object.assign({format:'structured'},payload))});const data=await response.json();console.log("API Response:",data);if(data.error){throw new Error(data.error);}
+renderHeader(data);renderPayload(data.payload);}
+fortuneForm.addEventListener('submit',async(e)=>{e.preventDefault();const name=document.getElementById('name').value;const birthDate=document.getElementById('birthDate').value;const gender=document.querySelector('input[name="gender"]:checked')?.value;if(!name||!birthDate||!gender){alert('모든 정보를 입력해주세요!');return;}
+formContainer.classList.add('hidden');formContainer.style.display='none';loading.classList.add('show');loading.setAttribute('style','display: block !important;');resultContainer.classList.add('hidden');const payload={name,birth_date:birthDate,gender};try{if(window.ReadableStream&&window.TextDecoder){await fetchFortuneStream(payload);}else{await fetchFortuneJson(payload);}
+hideLoading();showResult();console.log("Result forced visible");setTimeout(()=>{resultContainer.scrollIntoView({behavior:'smooth',block:'start'});},100);}catch(error){console.error(error);alert("오류가 발생했습니다: "+error.message);hideLoading();resultContainer.classList.add('hidden');resultContainer.style.display='none';formContainer.classList.remove('hidden');formContainer.style.display='block';}});const birthDateInput=document.getElementById('birthDate');if(birthDateInput){const today=new Date().toISOString().split('T')[0];birthDateInput.setAttribute('max',today);birthDateInput.setAttribute('value','1995-01-01');}
\ No newline at end of file
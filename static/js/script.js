@@ -4,17 +4,225 @@ const formContainer = document.getElementById('formContainer');
 const loading = document.getElementById('loading');
 const resultContainer = document.getElementById('resultContainer');
 
-console.log('Script loaded v4.0 (Fix display logic)');
+console.log('Script loaded v5.2 (Structured payload)');
+
+// 로딩 숨기기
+function hideLoading() {
+    loading.classList.remove('show');
+    loading.style.display = 'none'; // 강제 숨김
+}
+
+// 결과 화면 표시 (가장 중요!)
+function showResult() {
+    resultContainer.classList.remove('hidden');
+    resultContainer.setAttribute('style', 'display: block !important; visibility: visible !important; opacity: 1 !important;');
+
+    // 폼 강제 숨김
+    formContainer.classList.add('hidden');
+    formContainer.style.display = 'none';
+}
+
+// 이름, 띠, 날짜, 명언 채우기
+function renderHeader(data) {
+    document.getElementById('userName').textContent = `${data.name}님의 운세`;
+    if (data.zodiac) {
+        document.getElementById('zodiacEmoji').textContent = data.zodiac.emoji;
+        document.getElementById('zodiacName').textContent = data.zodiac.name;
+    }
+    document.getElementById('resultDate').textContent = data.date;
+
+    if (data.quote) {
+        document.getElementById('quoteText').textContent = data.quote.text;
+        document.getElementById('quoteAuthor').textContent = data.quote.author;
+    }
+}
+
+// 섹션 하나를 DOM 노드로 (제목 h3 + 줄바꿈을 <br>로 바꾼 본문 p)
+function createSectionNodes(section) {
+    const nodes = [];
+    if (section.title) {
+        const title = document.createElement('h3');
+        title.textContent = section.title;
+        nodes.push(title);
+    }
+    const body = document.createElement('p');
+    section.body.split('\n').forEach((line, i) => {
+        if (i > 0) body.appendChild(document.createElement('br'));
+        body.appendChild(document.createTextNode(line));
+    });
+    nodes.push(body);
+    return nodes;
+}
+
+// 상품 카드 하나 만들기
+const NO_IMAGE = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='200' height='200'%3E%3Crect fill='%23ddd' width='200' height='200'/%3E%3Ctext fill='%23999' font-family='sans-serif' font-size='14' x='50%25' y='50%25' text-anchor='middle' dy='.3em'%3E이미지 없음%3C/text%3E%3C/svg%3E";
+
+function createProductCard(product) {
+    const card = document.createElement('div');
+    card.className = 'product-card';
+
+    const link = document.createElement('a');
+    link.href = product.link;
+    link.target = '_blank';
+    link.rel = 'noopener noreferrer';
+
+    const img = document.createElement('img');
+    img.src = product.image;
+    img.alt = product.name;
+    img.onerror = () => { img.onerror = null; img.src = NO_IMAGE; };
+
+    const info = document.createElement('div');
+    info.className = 'product-info';
+    const name = document.createElement('h4');
+    name.textContent = product.name;
+    const price = document.createElement('p');
+    price.className = 'product-price';
+    price.textContent = `${product.price.toLocaleString()}원`;
+    info.append(name, price);
+    if (product.rating > 0) {
+        const rating = document.createElement('p');
+        rating.className = 'product-rating';
+        rating.textContent = `⭐ ${product.rating} (리뷰 ${product.reviews}개)`;
+        info.appendChild(rating);
+    }
+
+    link.append(img, info);
+    card.appendChild(link);
+    return card;
+}
+
+// 상품 정보 표시 (화면 밖에서 카드를 모두 만든 뒤 한 번에 교체)
+function renderProducts(products) {
+    const productsSection = document.getElementById('productsSection');
+    const productsGrid = document.getElementById('productsGrid');
+    if (!productsGrid || !productsSection) {
+        console.error("Products section elements not found!");
+        return;
+    }
+    if (!products || products.length === 0) {
+        productsSection.style.display = 'none';
+        return;
+    }
+
+    const fragment = document.createDocumentFragment();
+    products.forEach(product => fragment.appendChild(createProductCard(product)));
+    productsGrid.textContent = '';
+    productsGrid.appendChild(fragment);
+    productsSection.style.display = 'block';
+}
+
+// 서버가 파싱한 payload 그리기 (섹션과 상품을 화면 밖에서 만든 뒤 한 번에 교체)
+function renderPayload(payload) {
+    const started = performance.now();
+    const fragment = document.createDocumentFragment();
+    payload.sections.forEach(section => fragment.append(...createSectionNodes(section)));
+    const container = document.getElementById('fortuneContent');
+    container.textContent = '';
+    container.appendChild(fragment);
+    renderProducts(payload.products);
+    console.log(`payload v${payload.version} 렌더링 ${(performance.now() - started).toFixed(2)}ms`);
+}
+
+// SSE 스트림 읽기: "event: xxx\ndata: {...}\n\n" 단위로 콜백 호출
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            raw.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
+// 스트리밍 API로 운세 받기
+async function fetchFortuneStream(payload) {
+    const response = await fetch('/stream_fortune', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload)
+    });
+
+    if (!response.ok) {
+        const data = await response.json();
+        throw new Error(data.error || '요청 실패');
+    }
+
+    // 생성 중인 텍스트는 그대로 보여주고, 섹션 구조는 done 의 payload(서버가 파싱)로 한 번에 그림
+    const container = document.getElementById('fortuneContent');
+    const preview = document.createElement('p');
+    preview.className = 'fortune-stream-preview';
+    container.textContent = '';
+    container.appendChild(preview);
+    let text = '';
+
+    await readEventStream(response, (event, data) => {
+        if (event === 'meta') {
+            renderHeader(data);
+        } else if (event === 'delta') {
+            if (!text) {
+                // 첫 조각이 오면 바로 결과 화면 표시
+                hideLoading();
+                showResult();
+            }
+            text += data.text;
+            preview.textContent = text;
+        } else if (event === 'reset') {
+            // AI 생성이 중간에 실패 → 백업 운세로 다시 받음
+            text = '';
+            preview.textContent = '';
+        } else if (event === 'done') {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            renderPayload(data.payload);
+        }
+    });
+}
+
+// 일반(JSON) API로 운세 받기
+async function fetchFortuneJson(payload) {
+    const response = await fetch('/get_fortune', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({ format: 'structured' }, payload))
+    });
+
+    const data = await response.json();
+    console.log("API Response:", data);
+
+    if (data.error) {
+        throw new Error(data.error);
+    }
+
+    renderHeader(data);
+    renderPayload(data.payload);
+}
 
 // 폼 제출 이벤트
 fortuneForm.addEventListener('submit', async (e) => {
     e.preventDefault();
-    
+
     // 입력값 가져오기
     const name = document.getElementById('name').value;
     const birthDate = document.getElementById('birthDate').value;
     const gender = document.querySelector('input[name="gender"]:checked')?.value;
-    
+
     if (!name || !birthDate || !gender) {
         alert('모든 정보를 입력해주세요!');
         return;
@@ -23,102 +231,25 @@ fortuneForm.addEventListener('submit', async (e) => {
     // UI 상태 변경: 폼 숨기고 로딩 표시
     formContainer.classList.add('hidden');
     formContainer.style.display = 'none'; // 폼 즉시 숨김
-    
+
     loading.classList.add('show');
     loading.setAttribute('style', 'display: block !important;'); // 로딩 강제 표시
     resultContainer.classList.add('hidden');
-    
-    try {
-        const response = await fetch('/get_fortune', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ name, birth_date: birthDate, gender })
-        });
-        
-        const data = await response.json();
-        console.log("API Response:", data);
-        
-        // 로딩 숨기기
-        loading.classList.remove('show');
-        loading.style.display = 'none'; // 강제 숨김
-        console.log("Loading hidden");
-
-        if (data.error) {
-            throw new Error(data.error);
-        }
 
-        // 데이터 채우기
-        console.log("Populating data...");
-        document.getElementById('userName').textContent = `${data.name}님의 운세`;
-        if (data.zodiac) {
-            document.getElementById('zodiacEmoji').textContent = data.zodiac.emoji;
-            document.getElementById('zodiacName').textContent = data.zodiac.name;
-        }
-        document.getElementById('resultDate').textContent = data.date;
-        
-        // 텍스트 변환 (마크다운 -> HTML)
-        let htmlContent = data.full_text;
-        if (htmlContent) {
-            htmlContent = htmlContent.replace(/\*\*([^*]+)\*\*/g, '<h3>$1</h3>');
-            htmlContent = htmlContent.replace(/\n/g, '<br>');
-            document.getElementById('fortuneContent').innerHTML = htmlContent;
-        }
-        
-        if (data.quote) {
-            document.getElementById('quoteText').textContent = data.quote.text;
-            document.getElementById('quoteAuthor').textContent = data.quote.author;
-        }
+    const payload = { name, birth_date: birthDate, gender };
 
-        // 상품 정보 표시
-        console.log("Products data:", data.products); // 디버깅용
-        if (data.products && data.products.length > 0) {
-            console.log("Displaying products:", data.products.length); // 디버깅용
-            const productsGrid = document.getElementById('productsGrid');
-            const productsSection = document.getElementById('productsSection');
-            
-            if (!productsGrid || !productsSection) {
-                console.error("Products section elements not found!");
-                return;
-            }
-            
-            productsGrid.innerHTML = ''; // 기존 내용 초기화
-            
-            data.products.forEach(product => {
-                const productCard = document.createElement('div');
-                productCard.className = 'product-card';
-                productCard.innerHTML = `
-                    <a href="${product.link}" target="_blank" rel="noopener noreferrer">
-                        <img src="${product.image}" alt="${product.name}" onerror="this.src='data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'200\\' height=\\'200\\'%3E%3Crect fill=\\'%23ddd\\' width=\\'200\\' height=\\'200\\'/%3E%3Ctext fill=\\'%23999\\' font-family=\\'sans-serif\\' font-size=\\'14\\' x=\\'50%25\\' y=\\'50%25\\' text-anchor=\\'middle\\' dy=\\'.3em\\'%3E이미지 없음%3C/text%3E%3C/svg%3E'">
-                        <div class="product-info">
-                            <h4>${product.name}</h4>
-                            <p class="product-price">${product.price.toLocaleString()}원</p>
-                            ${product.rating > 0 ? `<p class="product-rating">⭐ ${product.rating} (리뷰 ${product.reviews}개)</p>` : ''}
-                        </div>
-                    </a>
-                `;
-                productsGrid.appendChild(productCard);
-            });
-            
-            productsSection.style.display = 'block';
-            console.log("Products section displayed");
+    try {
+        // 스트리밍을 지원하는 브라우저는 SSE, 아니면 기존 JSON API
+        if (window.ReadableStream && window.TextDecoder) {
+            await fetchFortuneStream(payload);
         } else {
-            console.log("No products data found");
-            const productsSection = document.getElementById('productsSection');
-            if (productsSection) {
-                productsSection.style.display = 'none';
-            }
+            await fetchFortuneJson(payload);
         }
 
-        // 결과 화면 표시 (가장 중요!)
-        resultContainer.classList.remove('hidden');
-        resultContainer.setAttribute('style', 'display: block !important; visibility: visible !important; opacity: 1 !important;');
-        
-        // 폼 강제 숨김
-        formContainer.classList.add('hidden');
-        formContainer.style.display = 'none';
-
+        hideLoading();
+        showResult();
         console.log("Result forced visible");
-        
+
         // 스크롤 이동
         setTimeout(() => {
             resultContainer.scrollIntoView({ behavior: 'smooth', block: 'start' });
@@ -127,10 +258,11 @@ fortuneForm.addEventListener('submit', async (e) => {
     } catch (error) {
         console.error(error);
         alert("오류가 발생했습니다: " + error.message);
-        
+
         // 복구
-        loading.classList.remove('show');
-        loading.style.display = 'none';
+        hideLoading();
+        resultContainer.classList.add('hidden');
+        resultContainer.style.display = 'none';
         formContainer.classList.remove('hidden');
         formContainer.style.display = 'block';
     }
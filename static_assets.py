@@ -0,0 +1,147 @@
+"""
+빌드된 정적 파일(static/dist) 제공
+
+    <link rel="stylesheet" href="{{ asset_url('css/style.css') }}">
+
+asset_url() 은 static/dist/manifest.json 을 보고 내용 해시가 들어간 파일 주소
+(/static/dist/css/style.<해시>.css)를 돌려줍니다. 빌드하지 않았거나 원본이 빌드 이후
+수정됐으면 원본 주소(+ 수정 시각 쿼리)를 씁니다.
+
+/static/dist/ 요청은 Accept-Encoding 에 따라 미리 압축해 둔 .br/.gz 파일을 그대로 보내고
+Cache-Control: immutable 로 1년간 캐시하게 합니다 (요청마다 압축하지 않음).
+빌드: python build_assets.py
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from flask import abort, request, send_from_directory, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Accept-Encoding 선호 순서 (코딩, 확장자)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def source_hash(data):
+    """원본 파일 내용 해시 (빌드 이후 수정 여부 확인용)"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class AssetManifest:
+    """원본 경로 -> 해시 파일명 (첫 사용 시 한 번만 읽음)"""
+
+    def __init__(self, static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self._files = None
+        self._lock = threading.Lock()
+
+    def files(self):
+        if self._files is None:
+            with self._lock:
+                if self._files is None:
+                    self._files = self._load()
+        return self._files
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+
+        files = {}
+        for path, entry in manifest.get("assets", {}).items():
+            if self._is_stale(path, entry):
+                print(f"⚠️ {path} 가 빌드 이후 수정됨 - 원본을 사용합니다 (python build_assets.py)")
+                continue
+            files[path] = entry["file"]
+        return files
+
+    def _is_stale(self, path, entry):
+        # 배포 환경에 원본이 없으면 manifest 를 그대로 믿음
+        try:
+            with open(os.path.join(self.static_dir, path), "rb") as f:
+                return source_hash(f.read()) != entry.get("source_hash")
+        except OSError:
+            return False
+
+    def url_path(self, path):
+        """
+        static/ 기준 경로
+
+        Returns:
+            tuple: (static 기준 파일 경로, 해시 파일 여부)
+        """
+        hashed = self.files().get(path)
+        if hashed is not None:
+            return f"dist/{hashed}", True
+        return path, False
+
+    def reload(self):
+        with self._lock:
+            self._files = None
+
+
+def negotiate(accept_encoding, dist_dir, filename):
+    """
+    브라우저가 받을 수 있고 미리 압축된 파일이 있는 인코딩 선택
+
+    Returns:
+        tuple: (보낼 파일 이름, Content-Encoding 또는 None)
+    """
+    accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").lower().split(",")}
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+            return filename + suffix, encoding
+    return filename, None
+
+
+def register_assets(app, manifest=None):
+    """
+    Flask 앱에 asset_url() 템플릿 함수와 /static/dist/ 라우트 등록
+
+    Args:
+        app: Flask 앱
+        manifest: AssetManifest (None이면 기본 경로)
+    """
+    manifest = manifest or AssetManifest()
+
+    def asset_url(path):
+        filename, hashed = manifest.url_path(path)
+        if hashed:
+            return url_for("static", filename=filename)
+        # 빌드 전: 수정 시각으로 캐시 무효화
+        try:
+            version = int(os.path.getmtime(os.path.join(manifest.static_dir, path)))
+        except OSError:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    @app.route("/static/dist/<path:filename>")
+    def dist_asset(filename):
+        """해시 파일명 정적 파일 (미리 압축된 파일 + immutable 캐시)"""
+        if filename.endswith((".gz", ".br")) or filename == MANIFEST_NAME:
+            abort(404)
+        chosen, encoding = negotiate(request.headers.get("Accept-Encoding"), manifest.dist_dir, filename)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(manifest.dist_dir, chosen, mimetype=mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE
+        return response
+
+    return manifest
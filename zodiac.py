@@ -0,0 +1,33 @@
+"""
+12띠 정보 (웹 앱, 운세 풀, 대량/배치 생성이 함께 사용)
+"""
+
+# 12띠 정보
+ZODIAC_ANIMALS = {
+    0: {"name": "원숭이", "emoji": "🐵"},
+    1: {"name": "닭", "emoji": "🐔"},
+    2: {"name": "개", "emoji": "🐶"},
+    3: {"name": "돼지", "emoji": "🐷"},
+    4: {"name": "쥐", "emoji": "🐭"},
+    5: {"name": "소", "emoji": "🐮"},
+    6: {"name": "호랑이", "emoji": "🐯"},
+    7: {"name": "토끼", "emoji": "🐰"},
+    8: {"name": "용", "emoji": "🐲"},
+    9: {"name": "뱀", "emoji": "🐍"},
+    10: {"name": "말", "emoji": "🐴"},
+    11: {"name": "양", "emoji": "🐑"}
+}
+
+
+def calculate_zodiac(birth_year):
+    """
+    생년으로 띠 계산
+    
+    Args:
+        birth_year: 생년 (int)
+        
+    Returns:
+        dict: 띠 정보 (이름, 이모지)
+    """
+    zodiac_index = birth_year % 12
+    return ZODIAC_ANIMALS[zodiac_index]